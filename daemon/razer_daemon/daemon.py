@@ -3,31 +3,105 @@ Daemon class
 
 This class is the main core of the daemon, this serves a basic dbus module to control the main bit of the daemon
 """
+import asyncio
 import configparser
+import functools
+import json
 import logging
 import logging.handlers
 import os
-import subprocess
 import sys
 import signal
-import time
 import tempfile
+import time
 
 import setproctitle
+import dbus
+import dbus.exceptions
 import dbus.mainloop.glib
 import gi
 gi.require_version('Gdk', '3.0')
-import gi.repository
+from gi.repository import GLib
 
 
 import razer_daemon.hardware
 from razer_daemon.dbus_services.service import DBusService
 from razer_daemon.device import DeviceCollection
-from razer_daemon.misc.screensaver_thread import ScreensaverThread
+from razer_daemon.misc.device_probe import DeviceProber
+from razer_daemon.misc.driver_trace import close_trace_writers
+from razer_daemon.misc.glib_asyncio import GLibEventLoop
+from razer_daemon.misc.hotplug import HotplugMonitor, HID_DEVICES_PATH
+from razer_daemon.misc.instance_lock import InstanceLock, get_lock_path
+from razer_daemon.misc.scheduler import get_scheduler
+from razer_daemon.misc.screensaver_thread import ScreensaverMonitor
+from razer_daemon.misc.shutdown import ShutdownCoordinator
+from razer_daemon.misc.state_checkpoint import StateCheckpoint
+from razer_daemon.misc.startup_profile import StartupProfiler
+
+DEVICE_CHECK_INTERVAL = 5 # Seconds
+# Rescan interval when uevents are available, only there to catch anything the monitor missed
+HOTPLUG_FALLBACK_INTERVAL = 60 # Seconds
+# Rescans are not time critical so can be moved to line up with other jobs
+DEVICE_CHECK_JITTER = 1 # Seconds
+IO_STATS_LOG_JITTER = 5 # Seconds
+# Delay before retrying a device whose driver files were not ready when the uevent arrived
+HOTPLUG_SETTLE_DELAY = 0.5 # Seconds
+# How long cancelled tasks get to finish when quitting
+TASK_CANCEL_TIMEOUT = 1 # Seconds
+# How long --replace waits for the old daemon to exit
+REPLACE_TIMEOUT = 10 # Seconds
+
+
+def stop_running_daemon():
+    """
+    Ask the running daemon to stop over DBus
 
-DEVICE_CHECK_INTERVAL = 5000 # Milliseconds
+    :return: True if the stop message was delivered
+    :rtype: bool
+    """
+    # Private connection as this can run before forking
+    session_bus = dbus.SessionBus(private=True)
+    try:
+        daemon_object = session_bus.get_object(RazerDaemon.BUS_PATH, '/org/razer')
+        dbus.Interface(daemon_object, 'razer.daemon').stop()
+        return True
+    except dbus.exceptions.DBusException as err:
+        print("Could not stop the running daemon. Error: {0}".format(err), file=sys.stderr)
+        return False
+    finally:
+        session_bus.close()
+
+def acquire_instance_lock(run_dir=None, replace=False):
+    """
+    Make sure only one daemon runs
 
-def daemonize(foreground=False, verbose=False, log_dir=None, console_log=False, run_dir=None, config_file=None, pid_file=None):
+    :param run_dir: Run/Home directory
+    :type run_dir: str
+
+    :param replace: Stop the running daemon and wait for it to exit
+    :type replace: bool
+
+    :return: Held lock
+    :rtype: razer_daemon.misc.instance_lock.InstanceLock
+    """
+    instance_lock = InstanceLock(get_lock_path(run_dir))
+
+    if not instance_lock.acquire():
+        owner_pid = instance_lock.owner_pid()
+
+        if not replace:
+            print("Daemon already exists (PID {0}). Please stop that one or use --replace.".format(owner_pid), file=sys.stderr)
+            sys.exit(-1)
+
+        print("Replacing daemon (PID {0})".format(owner_pid))
+        stop_running_daemon()
+        if not instance_lock.acquire(timeout=REPLACE_TIMEOUT):
+            print("Daemon (PID {0}) did not exit within {1} seconds.".format(owner_pid, REPLACE_TIMEOUT), file=sys.stderr)
+            sys.exit(-1)
+
+    return instance_lock
+
+def daemonize(foreground=False, verbose=False, log_dir=None, console_log=False, run_dir=None, config_file=None, pid_file=None, startup_profiler=None, replace=False):
     """
     Performs double fork behaviour of daemons
 
@@ -51,7 +125,15 @@ def daemonize(foreground=False, verbose=False, log_dir=None, console_log=False,
 
     :param pid_file: PID filepath (wont create a file if None)
     :type pid_file: str or None
+
+    :param startup_profiler: Profiler to record startup timings
+    :type startup_profiler: razer_daemon.misc.startup_profile.StartupProfiler or None
+
+    :param replace: Replace an already running daemon
+    :type replace: bool
     """
+    # Locked before forking so errors still reach the terminal, the forked children inherit the lock
+    instance_lock = acquire_instance_lock(run_dir, replace)
 
     if not foreground:
         # Attempt to double fork
@@ -97,6 +179,7 @@ def daemonize(foreground=False, verbose=False, log_dir=None, console_log=False,
         os.chdir(run_dir)
 
     # Write PID
+    instance_lock.write_pid()
     if pid_file is not None:
         try:
             with open(pid_file, 'w') as pid_file_obj:
@@ -105,7 +188,7 @@ def daemonize(foreground=False, verbose=False, log_dir=None, console_log=False,
             print("Error: {0}".format(err))
 
     # Create daemon and run
-    daemon = RazerDaemon(verbose, log_dir, console_log, run_dir, config_file)
+    daemon = RazerDaemon(verbose, log_dir, console_log, run_dir, config_file, startup_profiler, instance_lock)
     try:
         daemon.run()
     except Exception as err:
@@ -115,6 +198,9 @@ def daemonize(foreground=False, verbose=False, log_dir=None, console_log=False,
     if pid_file is not None and os.path.exists(pid_file):
         os.remove(pid_file)
 
+    # Last so a replacing daemon only starts once this one has cleaned up
+    instance_lock.release()
+
 
 class RazerDaemon(DBusService):
     """
@@ -125,20 +211,24 @@ class RazerDaemon(DBusService):
 
     Serves the following functions via DBus
     * getDevices - Returns a list of serial numbers
-    * enableTurnOffOnScreensaver - Starts/Continues the run loop on the screensaver thread
-    * disableTurnOffOnScreensaver - Pauses the run loop on the screensaver thread
+    * enableTurnOffOnScreensaver - Starts/Continues the run loop on the screensaver monitor
+    * disableTurnOffOnScreensaver - Pauses the run loop on the screensaver monitor
+    * getSchedulerStats - Returns JSON of the run time stats of the scheduled jobs
+    * getIoStats - Returns JSON of the driver I/O latency histograms of the devices
+    * applyBatch - Runs a batch of device methods on each of the given devices
     """
 
     BUS_PATH = 'org.razer'
 
-    def __init__(self, verbose=False, log_dir=None, console_log=False, run_dir=None, config_file=None):
+    def __init__(self, verbose=False, log_dir=None, console_log=False, run_dir=None, config_file=None, startup_profiler=None, instance_lock=None):
+        if startup_profiler is None:
+            startup_profiler = StartupProfiler()
+        self._startup_profiler = startup_profiler
 
-        # Check if process exists
-        exit_code = subprocess.call(['pgrep', 'razerdaemon'], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-
-        if exit_code == 0:
-            print("Daemon already exists. Please stop that one.", file=sys.stderr)
-            exit(-1)
+        # Check if another daemon is running, daemonize will have already taken the lock
+        if instance_lock is None:
+            instance_lock = acquire_instance_lock(run_dir)
+        self._instance_lock = instance_lock
 
         setproctitle.setproctitle('razerdaemon')
 
@@ -156,14 +246,23 @@ class RazerDaemon(DBusService):
         self._data_dir = run_dir
         self._config_file = config_file
         self._config = configparser.ConfigParser()
-        self.read_config(config_file)
+        with self._startup_profiler.phase('read config'):
+            self.read_config(config_file)
 
         # Setup DBus to use gobject main loop
-        dbus.mainloop.glib.threads_init()
-        dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
-        DBusService.__init__(self, self.BUS_PATH, '/org/razer')
-
-        self._main_loop = gi.repository.GObject.MainLoop()
+        with self._startup_profiler.phase('connect to dbus'):
+            dbus.mainloop.glib.threads_init()
+            dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+            DBusService.__init__(self, self.BUS_PATH, '/org/razer')
+
+        self._main_loop = GLib.MainLoop()
+        # Coroutines, timers and fd readers of every device run on the GLib main context
+        self._event_loop = GLibEventLoop()
+        asyncio.set_event_loop(self._event_loop)
+        self._event_loop.attach()
+        self._scheduler = get_scheduler()
+        self._device_check_job = None
+        self._hotplug_source = None
 
         # Logging
         logging_level = logging.INFO
@@ -191,12 +290,33 @@ class RazerDaemon(DBusService):
 
         self.logger.info("Initialising Daemon. Pid: %d", os.getpid())
 
-        # Setup screensaver thread
-        self._screensaver_thread = ScreensaverThread(self, active=self._config.getboolean('Startup', 'devices_off_on_screensaver'))
-        self._screensaver_thread.start()
+        # Setup screensaver monitor
+        with self._startup_profiler.phase('start screensaver'):
+            self._screensaver_monitor = ScreensaverMonitor(self, active=self._config.getboolean('Startup', 'devices_off_on_screensaver'))
+            self._screensaver_monitor.start()
+
+        # Device state is saved in the run dir and put back when the daemon restarts
+        self._state_checkpoint = None
+        if run_dir is not None and self._config.getboolean('Startup', 'restore_state'):
+            self._state_checkpoint = StateCheckpoint(run_dir)
 
         self._razer_devices = DeviceCollection()
-        self._load_devices()
+        self._device_number = 0
+        self._sync_effects_enabled = False
+
+        # Serials are read in a thread pool, devices get published on DBus from the main loop as they answer
+        self._device_prober = DeviceProber()
+        self._probing_devices = set()
+        with self._startup_profiler.phase('scan devices'):
+            self._load_devices()
+
+        # Listen for kernel uevents so devices are added and removed as they appear
+        with self._startup_profiler.phase('start hotplug monitor'):
+            try:
+                self._hotplug_monitor = HotplugMonitor(self._hotplug_add, self._remove_device)
+            except OSError as err:
+                self.logger.warning("Could not listen for uevents, falling back to polling. Error: %s", err)
+                self._hotplug_monitor = None
 
         # Add DBus methods
         self.logger.info("Adding razer.devices.getDevices method to DBus")
@@ -209,14 +329,20 @@ class RazerDaemon(DBusService):
         self.add_dbus_method('razer.devices', 'syncEffects', self.sync_effects, in_signature='b')
         self.logger.info("Adding razer.daemon.stop method to DBus")
         self.add_dbus_method('razer.daemon', 'stop', self.stop)
+        self.logger.info("Adding razer.daemon.getSchedulerStats method to DBus")
+        self.add_dbus_method('razer.daemon', 'getSchedulerStats', self.get_scheduler_stats, out_signature='s')
+        self.logger.info("Adding razer.daemon.getIoStats method to DBus")
+        self.add_dbus_method('razer.daemon', 'getIoStats', self.get_io_stats, out_signature='s')
+        self.logger.info("Adding razer.devices.applyBatch method to DBus")
+        self.add_dbus_method('razer.devices', 'applyBatch', self.apply_batch, in_signature='asa(sav)', out_signature='a{sa(bs)}')
 
         # TODO remove
         self.sync_effects(self._config.getboolean('Startup', 'sync_effects_enabled'))
         # TODO ======
 
-        # Setup quit signals
-        signal.signal(signal.SIGINT, self.quit)
-        signal.signal(signal.SIGTERM, self.quit)
+        # Setup quit signals, handled as GLib sources so they are dispatched by the main loop
+        GLib.unix_signal_add(GLib.PRIORITY_HIGH, signal.SIGINT, self._quit_signal_handler, signal.SIGINT)
+        GLib.unix_signal_add(GLib.PRIORITY_HIGH, signal.SIGTERM, self._quit_signal_handler, signal.SIGTERM)
 
     def read_config(self, config_file):
         """
@@ -234,6 +360,12 @@ class RazerDaemon(DBusService):
             'sync_effects_enabled': True,
             'devices_off_on_screensaver': True,
             'key_statistics': False,
+            'restore_state': True,
+            'custom_frame_rate': 30,
+            'hidraw_devices': '',
+            'driver_trace': '',
+            'io_stats': False,
+            'io_stats_log_interval': 0,
         }
 
         if config_file is not None and os.path.exists(config_file):
@@ -245,13 +377,13 @@ class RazerDaemon(DBusService):
         """
         Enable the turning off of devices when the screensaver is active
         """
-        self._screensaver_thread.active = True
+        self._screensaver_monitor.active = True
 
     def disable_turn_off_on_screensaver(self):
         """
         Disable the turning off of devices when the screensaver is active
         """
-        self._screensaver_thread.active = False
+        self._screensaver_monitor.active = False
 
     def suspend_devices(self):
         """
@@ -275,6 +407,60 @@ class RazerDaemon(DBusService):
         self.logger.debug('DBus called get_serial_list')
         return serial_list
 
+    def get_scheduler_stats(self):
+        """
+        Get the run time stats of the scheduled jobs
+
+        :return: JSON of job ID to stats
+        :rtype: str
+        """
+        return json.dumps(self._scheduler.stats())
+
+    def get_io_stats(self):
+        """
+        Get the driver I/O latency histograms of the devices, io_stats has to be enabled in the config
+
+        :return: JSON of serial to driver filename to read or write to stats
+        :rtype: str
+        """
+        return json.dumps({device.serial: device.dbus.get_io_stats() for device in self._razer_devices})
+
+    def _log_io_stats(self):
+        """
+        Log the driver I/O latencies, run by the scheduler
+        """
+        for device in self._razer_devices:
+            for driver_filename, operations in sorted(device.dbus.get_io_stats().items()):
+                for operation, stats in sorted(operations.items()):
+                    self.logger.info("I/O %s %s %s: %d calls, %d errors, p50 %dus p90 %dus p99 %dus max %dus", device.serial, driver_filename, operation,
+                                     stats['count'], stats['errors'], stats['p50_us'], stats['p90_us'], stats['p99_us'], stats['max_us'])
+
+    def apply_batch(self, serials, operations):
+        """
+        Run a batch of device methods on several devices, see razer.device.misc.applyBatch
+
+        :param serials: Device serials
+        :type serials: list of str
+
+        :param operations: DBus method name and arguments of each operation
+        :type operations: list of (str, list)
+
+        :return: Serial to the success and error message of each operation
+        :rtype: dict
+        """
+        self.logger.debug('DBus called apply_batch')
+
+        results = {}
+        for serial in serials:
+            try:
+                device = self._razer_devices.get(serial)
+            except IndexError:
+                results[serial] = [(False, "No device with serial {0}".format(serial))]
+                continue
+            results[serial] = device.dbus.apply_batch(operations)
+
+        return results
+
     def sync_effects(self, enabled):
         """
         Sync the effects across the devices
@@ -282,6 +468,8 @@ class RazerDaemon(DBusService):
         :param enabled: True to sync effects
         :type enabled: bool
         """
+        self._sync_effects_enabled = enabled
+
         # Todo perhaps move logic to device collection
         for device in self._razer_devices.devices:
             device.dbus.effect_sync = enabled
@@ -290,41 +478,153 @@ class RazerDaemon(DBusService):
         """
         Go through supported devices and load them
 
-        Loops through the available hardware classes, loops through
-        each device in the system and adds it if needs be.
+        Loops through each device in the system and adds it if needs be.
         """
         try:
-            devices = os.listdir('/sys/bus/hid/devices')
+            devices = os.listdir(HID_DEVICES_PATH)
         except FileNotFoundError:
             devices = []
-        classes = razer_daemon.hardware.get_device_classes()
-
-        device_number = 0
-        for device_class in classes:
-            for device_id in devices:
-                if device_id in self._razer_devices:
-                    continue
-
-                if device_class.match(device_id):
-                    self.logger.info('Found device.%d: %s', device_number, device_id)
-                    device_path = os.path.join('/sys/bus/hid/devices', device_id)
-                    razer_device = device_class(device_path, device_number, self._config)
-
-                    # Wireless devices sometimes dont listen
-                    count = 0
-                    while count < 3:
-                        # Loop to get serial, exit early if it gets one
-                        device_serial = razer_device.get_serial()
-                        if len(device_serial) > 0:
-                            break
-                        count += 1
-                    else:
-                        logging.warning("Could not get serial for device {0}. Skipping".format(device_id))
-                        continue
-
-                    self._razer_devices.add(device_id, device_serial, razer_device)
-
-                    device_number += 1
+
+        for device_id in devices:
+            if device_id not in self._razer_devices:
+                self._add_device(device_id)
+
+    def _add_device(self, device_id):
+        """
+        Match a HID device against the hardware classes and queue it to be probed
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :return: True if the device is being added or already exists
+        :rtype: bool
+        """
+        if device_id in self._razer_devices or device_id in self._probing_devices:
+            return True
+
+        device_class = razer_daemon.hardware.get_device_class(device_id)
+        if device_class is None:
+            return False
+
+        # Devices already seen this boot are known from the checkpoint, matching the class is check enough
+        if self._state_checkpoint is not None:
+            device_serial = self._state_checkpoint.known_serial(device_id, device_class.__name__)
+            if device_serial is not None:
+                self.logger.debug("Device %s is in the state checkpoint, not probing", device_id)
+                self._publish_device(device_class, device_id, device_serial)
+                return True
+
+        self._probing_devices.add(device_id)
+        device_path = os.path.join(HID_DEVICES_PATH, device_id)
+        self._device_prober.probe(device_id, device_path, functools.partial(self._probe_finished, device_class))
+
+        return True
+
+    def _probe_finished(self, device_class, device_id, device_serial):
+        """
+        Prober callback, runs in a worker thread so hands the device over to the main loop
+
+        :param device_class: Hardware class
+        :type device_class: callable
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param device_serial: Serial or None if the device didnt answer
+        :type device_serial: str or None
+        """
+        GLib.idle_add(self._publish_device, device_class, device_id, device_serial)
+
+    def _publish_device(self, device_class, device_id, device_serial):
+        """
+        Create the device object and publish it on DBus
+
+        :param device_class: Hardware class
+        :type device_class: callable
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param device_serial: Serial or None if the device didnt answer
+        :type device_serial: str or None
+
+        :return: False so GLib removes the idle source
+        :rtype: bool
+        """
+        self._probing_devices.discard(device_id)
+        device_path = os.path.join(HID_DEVICES_PATH, device_id)
+
+        # The prober has already logged devices which didnt answer
+        if device_serial is not None and device_id not in self._razer_devices and os.path.exists(device_path):
+            self.logger.info('Found device.%d: %s', self._device_number, device_id)
+            with self._startup_profiler.phase('publish {0}'.format(device_id)):
+                razer_device = device_class(device_path, self._device_number, self._config, device_serial)
+                razer_device.effect_sync = self._sync_effects_enabled
+
+                if self._state_checkpoint is not None:
+                    self._state_checkpoint.restore(razer_device)
+                    self._state_checkpoint.attach(device_id, razer_device)
+
+                self._razer_devices.add(device_id, device_serial, razer_device)
+
+            self._startup_profiler.mark('published device.{0} {1}'.format(self._device_number, device_id))
+            self._device_number += 1
+
+        return False
+
+    def _hotplug_add(self, device_id):
+        """
+        Uevent add callback
+
+        The add uevent can be processed before the driver has created its files, so try once more a bit later
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+        """
+        if not self._add_device(device_id):
+            self._scheduler.call_later(HOTPLUG_SETTLE_DELAY, self._hotplug_retry, device_id, name='hotplug retry')
+
+    def _hotplug_retry(self, device_id):
+        """
+        Retry adding a device
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+        """
+        if os.path.exists(os.path.join(HID_DEVICES_PATH, device_id)):
+            self._add_device(device_id)
+
+    def _on_uevent(self, fd, condition):
+        """
+        GLib IO watch callback for the uevent socket
+
+        :return: True so GLib keeps the watch
+        :rtype: bool
+        """
+        # pylint: disable=unused-argument
+        self._hotplug_monitor.process_events()
+
+        return True
+
+    def _remove_device(self, device_id):
+        """
+        Remove a device from DBus
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+        """
+        if device_id not in self._razer_devices:
+            return
+
+        device = self._razer_devices[device_id]
+
+        # Remove from DBus
+        self.logger.warning("Device %s is missing. Removing from DBus", device_id)
+        device.dbus.remove_from_connection()
+        del self._razer_devices[device_id]
+
+        # Stops the device's helpers and closes its cached driver files
+        device.dbus.close()
 
     def _remove_devices(self):
         """
@@ -333,40 +633,44 @@ class RazerDaemon(DBusService):
         devices_to_remove = []
 
         for device in self._razer_devices:
-            device_path = os.path.join('/sys/bus/hid/devices', device.device_id)
+            device_path = os.path.join(HID_DEVICES_PATH, device.device_id)
             if not os.path.exists(device_path):
-                # Remove from DBus
-                device.dbus.remove_from_connection()
                 devices_to_remove.append(device.device_id)
 
         for device_id in devices_to_remove:
-            # Remove device
-            self.logger.warning("Device %s is missing. Removing from DBus", device_id)
-            del self._razer_devices[device_id]
+            self._remove_device(device_id)
+
+    def _check_devices(self):
+        """
+        Periodic device rescan, run by the scheduler
+        """
+        self._remove_devices()
+        self._load_devices()
 
     def run(self):
         """
         Run the daemon
+
+        Blocks in the GLib main loop until quit is called, the loop sleeps until a DBus message,
+        signal or scheduled job needs dispatching.
         """
         self.logger.info('Serving DBus')
+        self._startup_profiler.report(self.logger)
+
+        if self._hotplug_monitor is not None:
+            self._hotplug_source = GLib.io_add_watch(self._hotplug_monitor.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, self._on_uevent)
+            check_interval = HOTPLUG_FALLBACK_INTERVAL
+        else:
+            check_interval = DEVICE_CHECK_INTERVAL
 
-        # Counter for managing periodic tasks
-        counter = 0
+        self._device_check_job = self._scheduler.call_every(check_interval, self._check_devices, name='device rescan', jitter=DEVICE_CHECK_JITTER)
 
-        # Can't just use mainloop.run() as that blocks and
-        # then signaling exit doesn't work
-        main_loop_context = self._main_loop.get_context()
-        while self._main_loop is not None:
-            if main_loop_context.pending():
-                main_loop_context.iteration()
-            else:
-                time.sleep(0.001)
+        io_stats_log_interval = self._config.getfloat('General', 'io_stats_log_interval')
+        if self._config.getboolean('General', 'io_stats') and io_stats_log_interval > 0:
+            self._scheduler.call_every(io_stats_log_interval, self._log_io_stats, name='io stats log', jitter=IO_STATS_LOG_JITTER)
 
-            if counter > DEVICE_CHECK_INTERVAL: # Time sleeps 1ms so DEVICE_CHECK_INTERVAL is in milliseconds
-                self._remove_devices()
-                self._load_devices()
-                counter = 0
-            counter += 1
+        self._startup_profiler.mark('entering main loop')
+        self._main_loop.run()
 
     def stop(self):
         """
@@ -374,22 +678,74 @@ class RazerDaemon(DBusService):
         """
         self.quit(None, None)
 
+    def _quit_signal_handler(self, signum):
+        """
+        GLib unix signal callback
+
+        :param signum: Signal number
+        :type signum: int
+
+        :return: False so GLib removes the signal source
+        :rtype: bool
+        """
+        self.quit(signum, None)
+
+        return False
+
     def quit(self, signum, frame):
         """
-        Quit by stopping the main loop and screensaver thread
+        Quit by stopping the main loop, screensaver monitor and event loop
+
+        First everything on the main loop is stopped from this thread, as the asyncio loop isnt thread safe. This only
+        cancels jobs, tasks and fd watches so is quick, and the cancelled tasks are run to completion. Then the
+        blocking part of closing the devices, finishing their writes and closing their backends, is done in parallel
+        under one deadline.
         """
         # pylint: disable=unused-argument
         self.logger.info('Stopping daemon.')
-        self._main_loop = None
+        start_time = time.monotonic()
+
+        # Phase 1, stop all the periodic work, coroutines and event sources
+        for job_id, stats in sorted(self._scheduler.stats().items()):
+            self.logger.debug("Job %d %s ran %d times, mean %.6fs max %.6fs", job_id, stats['name'], stats['runs'], stats['mean_time'], stats['max_time'])
+        self._scheduler.close()
+        self._device_check_job = None
 
-        # Stop screensaver
-        self._screensaver_thread.shutdown = True
-        self._screensaver_thread.join(timeout=2)
-        if self._screensaver_thread.is_alive():
-            self.logger.warning('Could not stop the screensaver thread')
+        if self._hotplug_source is not None:
+            GLib.source_remove(self._hotplug_source)
+            self._hotplug_source = None
+        if self._hotplug_monitor is not None:
+            self._hotplug_monitor.close()
+        self._device_prober.close()
+
+        self._screensaver_monitor.close()
+
+        if self._state_checkpoint is not None:
+            self._state_checkpoint.flush()
 
         for device in self._razer_devices:
-            device.dbus.close()
+            device.dbus.stop()
+
+        tasks = asyncio.all_tasks(self._event_loop)
+        for task in tasks:
+            task.cancel()
+        if tasks and not self._event_loop.is_running():
+            # Let the tasks handle their cancellation rather than being destroyed whilst pending
+            self._event_loop.run_until_complete(asyncio.wait(tasks, timeout=TASK_CANCEL_TIMEOUT))
+        # Nothing on the event loop gets dispatched from here on
+        self._event_loop.detach()
+
+        self._main_loop.quit()
+
+        # Phase 2, close the devices in parallel
+        shutdown = ShutdownCoordinator()
+        for device in self._razer_devices:
+            shutdown.add('{0} ({1})'.format(device.dbus.__class__.__name__, device.device_id), device.dbus.close)
+        shutdown.run()
+        close_trace_writers()
+
+        self._event_loop.close()
+        self.logger.info('Stopped in %.3fs', time.monotonic() - start_time)
 
 
 if __name__ == '__main__':
@@ -5,7 +5,7 @@ Has an endpoint decorator to wrap a method for DBus
 """
 from functools import wraps
 
-def endpoint(interface_name, function_name, in_sig=None, out_sig=None, byte_arrays=False):
+def endpoint(interface_name, function_name, in_sig=None, out_sig=None, byte_arrays=False, run_async=False):
     """
     DBus Endpoint
 
@@ -24,6 +24,9 @@ def endpoint(interface_name, function_name, in_sig=None, out_sig=None, byte_arra
     :param byte_arrays: is Byte Array
     :type byte_arrays: bool
 
+    :param run_async: Run off the main loop, for methods which can wait on the device
+    :type run_async: bool
+
     :return: Function
     :rtype: callable
     """
@@ -37,9 +40,11 @@ def endpoint(interface_name, function_name, in_sig=None, out_sig=None, byte_arra
         wrapped.in_sig = in_sig
         wrapped.out_sig = out_sig
         wrapped.byte_arrays = byte_arrays
+        wrapped.run_async = run_async
         wrapped.code = func.__code__
         wrapped.globals = func.__globals__
         wrapped.defaults = func.__defaults__
+        wrapped.kwdefaults = func.__kwdefaults__
         wrapped.closure = func.__closure__
         return wraps(func)(wrapped)
     return inner_render
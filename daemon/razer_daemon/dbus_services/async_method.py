@@ -0,0 +1,67 @@
+"""
+Asynchronous DBus methods
+
+DBus methods normally run in the main loop, so one which waits on a slow device, like reading the battery of a
+sleeping wireless mouse, holds up every other call. Asynchronous methods are run on an executor belonging to their
+service instead and answer through dbus-python's async callbacks once done.
+"""
+import functools
+import inspect
+
+REPLY_HANDLER = 'reply_handler'
+ERROR_HANDLER = 'error_handler'
+# Passed to dbus.service.method as async_callbacks
+ASYNC_CALLBACKS = (REPLY_HANDLER, ERROR_HANDLER)
+
+
+def make_async(function, get_executor, call_in_main_loop):
+    """
+    Wrap a method so it runs on an executor and replies through callbacks
+
+    The wrapper has the method's arguments plus reply_handler and error_handler, which is what dbus-python expects
+    from a method with async_callbacks.
+
+    :param function: Method, first argument is the service
+    :type function: callable
+
+    :param get_executor: Gets the executor to run on from the service
+    :type get_executor: callable
+
+    :param call_in_main_loop: Schedules a call on the main loop like GLib.idle_add, the callbacks are called with it
+    :type call_in_main_loop: callable
+
+    :return: Wrapped method
+    :rtype: callable
+    """
+    @functools.wraps(function)
+    def async_wrapper(self, *args, reply_handler=None, error_handler=None):
+        def method_done(future):
+            # Queued calls are cancelled when the service closes, future.exception() would raise
+            if future.cancelled():
+                call_in_main_loop(error_handler, RuntimeError("{0} was cancelled, the service is closing".format(function.__name__)))
+                return
+
+            error = future.exception()
+            if error is not None:
+                call_in_main_loop(error_handler, error)
+            elif future.result() is None:
+                call_in_main_loop(reply_handler)
+            else:
+                call_in_main_loop(reply_handler, future.result())
+
+        try:
+            future = get_executor(self).submit(function, self, *args)
+        except RuntimeError as err:
+            # Executor has been shut down, the service is closing
+            error_handler(err)
+            return
+
+        future.add_done_callback(method_done)
+
+    # dbus-python finds the method's arguments and the callbacks by inspecting the signature
+    signature = inspect.signature(function)
+    parameters = [parameter for parameter in signature.parameters.values() if parameter.kind == parameter.POSITIONAL_OR_KEYWORD]
+    parameters.extend(inspect.Parameter(name, inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None) for name in ASYNC_CALLBACKS)
+    async_wrapper.__signature__ = signature.replace(parameters=parameters)
+
+    return async_wrapper
@@ -0,0 +1,208 @@
+"""
+Batched DBus calls
+
+A profile switch is usually a few setters and an effect, each a DBus round trip of its own. A batch sends them as one
+array of (method name, arguments) instead. Each operation is checked against the methods the device serves and run in
+order, and the status of each is returned, so one bad operation doesnt stop the rest.
+"""
+import collections
+
+# Methods which cant be batched, besides the asynchronous ones
+UNBATCHABLE_METHODS = ('applyBatch',)
+
+# Range of each DBus integer type
+INTEGER_RANGES = {
+    'y': (0, 0xFF),
+    'n': (-0x8000, 0x7FFF),
+    'q': (0, 0xFFFF),
+    'i': (-0x80000000, 0x7FFFFFFF),
+    'u': (0, 0xFFFFFFFF),
+    'x': (-0x8000000000000000, 0x7FFFFFFFFFFFFFFF),
+    't': (0, 0xFFFFFFFFFFFFFFFF),
+}
+
+BatchMethod = collections.namedtuple('BatchMethod', ['name', 'function', 'in_sig', 'byte_arrays', 'run_async'])
+
+
+def split_signature(signature):
+    """
+    Split a DBus signature into its complete types
+
+    :param signature: Signature like 'yyy' or 'sa(yy)'
+    :type signature: str or None
+
+    :return: Complete types like ['s', 'a(yy)']
+    :rtype: list of str
+
+    :raises ValueError: If the signature is not valid
+    """
+    signature = signature or ''
+    types = []
+    start = 0
+    closing = {'(': ')', '{': '}'}
+    expected = []
+
+    for index, char in enumerate(signature):
+        if char in closing:
+            expected.append(closing[char])
+        elif char in (')', '}'):
+            if not expected or expected.pop() != char:
+                raise ValueError("Unbalanced signature {0}".format(signature))
+
+        # An array is completed by its element type
+        if not expected and char != 'a':
+            types.append(signature[start:index + 1])
+            start = index + 1
+
+    if expected or start != len(signature):
+        raise ValueError("Incomplete signature {0}".format(signature))
+
+    return types
+
+
+def make_method_table(methods):
+    """
+    Make the table of methods a batch can call
+
+    :param methods: Arguments of razer_daemon.dbus_services.service.make_dbus_method for each method
+    :type methods: iterable of tuple
+
+    :return: Dictionary of DBus method name to method
+    :rtype: dict
+    """
+    table = {}
+
+    for _, function_name, function, in_sig, _, byte_arrays, run_async in methods:
+        table[function_name] = BatchMethod(function_name, function, split_signature(in_sig), byte_arrays, run_async)
+
+    return table
+
+
+def check_type(arg_type, arg):
+    """
+    Check an argument can be given as a DBus type
+
+    Containers other than byte arrays are left to the method.
+
+    :param arg_type: Complete type like 'y' or 'ay'
+    :type arg_type: str
+
+    :param arg: Argument from the variant
+    :type arg: object
+
+    :return: True if the argument fits the type
+    :rtype: bool
+    """
+    if arg_type in INTEGER_RANGES:
+        minimum, maximum = INTEGER_RANGES[arg_type]
+        return isinstance(arg, int) and not isinstance(arg, bool) and minimum <= arg <= maximum
+
+    if arg_type == 'b':
+        # dbus.Boolean is an int
+        return isinstance(arg, int) and arg in (0, 1)
+
+    if arg_type == 'd':
+        return isinstance(arg, (int, float)) and not isinstance(arg, bool)
+
+    if arg_type in ('s', 'o', 'g'):
+        return isinstance(arg, str)
+
+    if arg_type == 'ay':
+        if isinstance(arg, (bytes, bytearray)):
+            return True
+        return isinstance(arg, (list, tuple)) and all(check_type('y', item) for item in arg)
+
+    return True
+
+
+def check_operation(method_table, method_name, args):
+    """
+    Check an operation against the methods a device serves
+
+    :param method_table: Methods from make_method_table
+    :type method_table: dict
+
+    :param method_name: DBus method name
+    :type method_name: str
+
+    :param args: Arguments
+    :type args: list
+
+    :return: Method
+    :rtype: BatchMethod
+
+    :raises ValueError: If the method cant be called with the arguments
+    """
+    try:
+        method = method_table[method_name]
+    except KeyError:
+        raise ValueError("Unknown method {0}".format(method_name))
+
+    if method.run_async or method_name in UNBATCHABLE_METHODS:
+        raise ValueError("{0} cant be batched".format(method_name))
+
+    if len(args) != len(method.in_sig):
+        raise ValueError("{0} takes {1} arguments, got {2}".format(method_name, len(method.in_sig), len(args)))
+
+    for index, (arg_type, arg) in enumerate(zip(method.in_sig, args)):
+        if not check_type(arg_type, arg):
+            raise ValueError("Argument {0} of {1} is not a valid {2}: {3!r}".format(index, method_name, arg_type, arg))
+
+    return method
+
+
+def _convert_args(method, args):
+    """
+    Give the arguments to a method as a direct call would
+
+    :param method: Method
+    :type method: BatchMethod
+
+    :param args: Arguments
+    :type args: list
+
+    :return: Arguments
+    :rtype: list
+    """
+    if not method.byte_arrays:
+        return list(args)
+
+    # Byte arrays arrive as lists of bytes within a variant
+    return [bytes(arg) if arg_type == 'ay' else arg for arg_type, arg in zip(method.in_sig, args)]
+
+
+def apply_batch(service, method_table, operations, logger=None):
+    """
+    Run operations on a service in order
+
+    Return values are not passed back, getters are best called on their own.
+
+    :param service: Device
+    :type service: razer_daemon.hardware.device_base.RazerDevice
+
+    :param method_table: Methods from make_method_table
+    :type method_table: dict
+
+    :param operations: DBus method name and arguments of each operation
+    :type operations: iterable of (str, list)
+
+    :param logger: Logs failed operations
+    :type logger: logging.Logger or None
+
+    :return: True and an empty string for each operation which succeeded, False and the error if not
+    :rtype: list of (bool, str)
+    """
+    results = []
+
+    for method_name, args in operations:
+        try:
+            method = check_operation(method_table, method_name, args)
+            method.function(service, *_convert_args(method, args))
+        except Exception as err: # pylint: disable=broad-except
+            if logger is not None:
+                logger.warning("Batched %s failed: %s", method_name, err)
+            results.append((False, str(err) or err.__class__.__name__))
+        else:
+            results.append((True, ''))
+
+    return results
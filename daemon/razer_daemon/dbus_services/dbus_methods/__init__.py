@@ -3,9 +3,29 @@ All of these effects will be DBus methods
 """
 
 # pylint: disable=wildcard-import
+import types
+
 from razer_daemon.dbus_services.dbus_methods.all import *
 from razer_daemon.dbus_services.dbus_methods.chroma_keyboard import *
 from razer_daemon.dbus_services.dbus_methods.bw2013 import *
 from razer_daemon.dbus_services.dbus_methods.mamba import *
 from razer_daemon.dbus_services.dbus_methods.macro import *
 
+
+def _find_endpoints():
+    """
+    Get the endpoints defined in this module
+
+    :return: Dictionary of function name to endpoint
+    :rtype: dict
+    """
+    endpoints = {}
+
+    for function_name, function in globals().items():
+        if isinstance(function, types.FunctionType) and getattr(function, 'endpoint', False):
+            endpoints[function_name] = function
+
+    return endpoints
+
+# Built once, hardware classes look their METHODS up in it
+ENDPOINTS = _find_endpoints()
@@ -13,10 +13,7 @@ def get_firmware(self):
     """
     self.logger.debug("DBus call get_firmware")
 
-    driver_path = self.get_driver_path('get_firmware_version')
-
-    with open(driver_path, 'r') as driver_file:
-        return driver_file.read().strip()
+    return self.attributes.firmware_version
 
 @endpoint('razer.device.misc', 'getDeviceName', out_sig='s')
 def get_device_name(self):
@@ -28,10 +25,7 @@ def get_device_name(self):
     """
     self.logger.debug("DBus call get_device_name")
 
-    driver_path = self.get_driver_path('device_type')
-
-    with open(driver_path, 'r') as driver_file:
-        return driver_file.read().strip()
+    return self.attributes.device_name
 
 # Functions to define a hardware class
 @endpoint('razer.device.misc', 'getDeviceType', out_sig='s')
@@ -3,7 +3,7 @@ BlackWidow Ultimate 2013 effects
 """
 from razer_daemon.dbus_services import endpoint
 
-@endpoint('razer.device.lighting.bw2013', 'getEffect', out_sig='y')
+@endpoint('razer.device.lighting.bw2013', 'getEffect', out_sig='y', run_async=True)
 def bw_get_effect(self):
     """
     Get current effect
@@ -13,11 +13,8 @@ def bw_get_effect(self):
     """
     self.logger.debug("DBus call bw_get_effect")
 
-    driver_path = self.get_driver_path('mode_pulsate')
-
-    with open(driver_path, 'r') as driver_file:
-        brightness = int(driver_file.read().strip())
-        return brightness
+    brightness = self.read_attribute('mode_pulsate', retry=True)
+    return brightness
 
 @endpoint('razer.device.lighting.bw2013', 'setPulsate')
 def bw_set_pulsate(self):
@@ -26,10 +23,7 @@ def bw_set_pulsate(self):
     """
     self.logger.debug("DBus call bw_set_pulsate")
 
-    driver_path = self.get_driver_path('mode_pulsate')
-
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write('1')
+    self.write_attribute('mode_pulsate', True)
 
     # Notify others
     self.send_effect_event('setPulsate')
@@ -41,10 +35,7 @@ def bw_set_static(self):
     """
     self.logger.debug("DBus call bw_set_static")
 
-    driver_path = self.get_driver_path('mode_static')
-
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write('1')
+    self.write_attribute('mode_static', b'1')
 
     # Notify others
     self.send_effect_event('setStatic')
@@ -4,20 +4,20 @@ BlackWidow Chroma Effects
 from razer_daemon.dbus_services import endpoint
 
 @endpoint('razer.device.lighting.brightness', 'getBrightness', out_sig='d')
-def get_brightness(self):
+def get_brightness(self, *, force_refresh=False):
     """
     Get the device's brightness
 
+    :param force_refresh: Read the driver instead of the shadow state
+    :type force_refresh: bool
+
     :return: Brightness
     :rtype: float
     """
     self.logger.debug("DBus call get_brightness")
 
-    driver_path = self.get_driver_path('set_brightness')
-
-    with open(driver_path, 'r') as driver_file:
-        brightness = float(driver_file.read()) * (100.0/255.0)
-        return round(brightness, 2)
+    brightness = self.shadow_state.get('brightness', force_refresh) * (100.0/255.0)
+    return round(brightness, 2)
 
 @endpoint('razer.device.lighting.brightness', 'setBrightness', in_sig='d')
 def set_brightness(self, brightness):
@@ -29,34 +29,32 @@ def set_brightness(self, brightness):
     """
     self.logger.debug("DBus call set_brightness")
 
-    driver_path = self.get_driver_path('set_brightness')
-
-    brightness = int(round(brightness * (255.0/100.0)))
-    if brightness > 255:
-        brightness = 255
-    elif brightness < 0:
-        brightness = 0
+    driver_brightness = int(round(brightness * (255.0/100.0)))
+    if driver_brightness > 255:
+        driver_brightness = 255
+    elif driver_brightness < 0:
+        driver_brightness = 0
 
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write(str(brightness))
+    self.write_attribute('set_brightness', driver_brightness)
+    self.shadow_state.set('brightness', driver_brightness)
 
-    # Notify others
+    # Notify others, sent as a percentage so it can be passed back to setBrightness
     self.send_effect_event('setBrightness', brightness)
 
 @endpoint('razer.device.led.gamemode', 'getGameMode', out_sig='b')
-def get_game_mode(self):
+def get_game_mode(self, *, force_refresh=False):
     """
     Get game mode LED state
 
+    :param force_refresh: Read the driver instead of the shadow state
+    :type force_refresh: bool
+
     :return: Game mode LED state
     :rtype: bool
     """
     self.logger.debug("DBus call get_game_mode")
 
-    driver_path = self.get_driver_path('mode_game')
-
-    with open(driver_path, 'r') as driver_file:
-        return driver_file.read().strip() == '1'
+    return self.shadow_state.get('game_mode', force_refresh)
 
 @endpoint('razer.device.led.gamemode', 'setGameMode', in_sig='b')
 def set_game_mode(self, enable):
@@ -68,28 +66,25 @@ def set_game_mode(self, enable):
     """
     self.logger.debug("DBus call set_game_mode")
 
-    driver_path = self.get_driver_path('mode_game')
+    self.write_attribute('mode_game', enable)
+    self.shadow_state.set('game_mode', bool(enable))
 
-    with open(driver_path, 'w') as driver_file:
-        if enable:
-            driver_file.write('1')
-        else:
-            driver_file.write('0')
+    self.send_state_event('setGameMode', bool(enable))
 
 @endpoint('razer.device.led.macromode', 'getMacroMode', out_sig='b')
-def get_macro_mode(self):
+def get_macro_mode(self, *, force_refresh=False):
     """
     Get macro mode LED state
 
+    :param force_refresh: Read the driver instead of the shadow state
+    :type force_refresh: bool
+
     :return: Status of macro mode
     :rtype: bool
     """
     self.logger.debug("DBus call get_macro_mode")
 
-    driver_path = self.get_driver_path('mode_macro')
-
-    with open(driver_path, 'r') as driver_file:
-        return driver_file.read().strip() == '1'
+    return self.shadow_state.get('macro_mode', force_refresh)
 
 @endpoint('razer.device.led.macromode', 'setMacroMode', in_sig='b')
 def set_macro_mode(self, enable):
@@ -101,28 +96,25 @@ def set_macro_mode(self, enable):
     """
     self.logger.debug("DBus call set_macro_mode")
 
-    driver_path = self.get_driver_path('mode_macro')
+    self.write_attribute('mode_macro', enable)
+    self.shadow_state.set('macro_mode', bool(enable))
 
-    with open(driver_path, 'w') as driver_file:
-        if enable:
-            driver_file.write('1')
-        else:
-            driver_file.write('0')
+    self.send_state_event('setMacroMode', bool(enable))
 
 @endpoint('razer.device.led.macromode', 'getMacroEffect', out_sig='i')
-def get_macro_effect(self):
+def get_macro_effect(self, *, force_refresh=False):
     """
     Get the effect on the macro LED
 
+    :param force_refresh: Read the driver instead of the shadow state
+    :type force_refresh: bool
+
     :return: Macro LED effect ID
     :rtype: int
     """
     self.logger.debug("DBus call get_macro_effect")
 
-    driver_path = self.get_driver_path('mode_macro_effect')
-
-    with open(driver_path, 'r') as driver_file:
-        return int(driver_file.read().strip())
+    return self.shadow_state.get('macro_effect', force_refresh)
 
 @endpoint('razer.device.led.macromode', 'setMacroEffect', in_sig='y')
 def set_macro_effect(self, effect):
@@ -134,10 +126,10 @@ def set_macro_effect(self, effect):
     """
     self.logger.debug("DBus call set_macro_effect")
 
-    driver_path = self.get_driver_path('mode_macro_effect')
+    self.write_attribute('mode_macro_effect', effect)
+    self.shadow_state.set('macro_effect', int(effect))
 
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write(str(int(effect)))
+    self.send_state_event('setMacroEffect', int(effect))
 
 
 @endpoint('razer.device.lighting.chroma', 'setWave', in_sig='i')
@@ -153,13 +145,10 @@ def set_wave_effect(self, direction):
     # Notify others
     self.send_effect_event('setWave', direction)
 
-    driver_path = self.get_driver_path('mode_wave')
-
     if direction not in (1, 2):
         direction = 1
 
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write(str(direction))
+    self.write_attribute('mode_wave', direction)
 
 @endpoint('razer.device.lighting.chroma', 'setStatic', in_sig='yyy')
 def set_static_effect(self, red, green, blue):
@@ -180,12 +169,9 @@ def set_static_effect(self, red, green, blue):
     # Notify others
     self.send_effect_event('setStatic', red, green, blue)
 
-    driver_path = self.get_driver_path('mode_static')
-
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    self.write_attribute('mode_static', payload)
 
 @endpoint('razer.device.lighting.chroma', 'setSpectrum')
 def set_spectrum_effect(self):
@@ -197,10 +183,7 @@ def set_spectrum_effect(self):
     # Notify others
     self.send_effect_event('setSpectrum')
 
-    driver_path = self.get_driver_path('mode_spectrum')
-
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write('1')
+    self.write_attribute('mode_spectrum', True)
 
 @endpoint('razer.device.lighting.chroma', 'setNone')
 def set_none_effect(self):
@@ -212,10 +195,7 @@ def set_none_effect(self):
     # Notify others
     self.send_effect_event('setNone')
 
-    driver_path = self.get_driver_path('mode_none')
-
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write('1')
+    self.write_attribute('mode_none', True)
 
 @endpoint('razer.device.lighting.chroma', 'setReactive', in_sig='yyyy')
 def set_reactive_effect(self, red, green, blue, speed):
@@ -236,8 +216,6 @@ def set_reactive_effect(self, red, green, blue, speed):
     """
     self.logger.debug("DBus call set_reactive_effect")
 
-    driver_path = self.get_driver_path('mode_reactive')
-
     # Notify others
     self.send_effect_event('setReactive', red, green, blue, speed)
 
@@ -246,8 +224,7 @@ def set_reactive_effect(self, red, green, blue, speed):
 
     payload = bytes([red, green, blue, speed])
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    self.write_attribute('mode_reactive', payload)
 
 @endpoint('razer.device.lighting.chroma', 'setBreathRandom')
 def set_breath_random_effect(self):
@@ -259,12 +236,9 @@ def set_breath_random_effect(self):
     # Notify others
     self.send_effect_event('setBreathRandom')
 
-    driver_path = self.get_driver_path('mode_breath')
-
     payload = b'1'
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    self.write_attribute('mode_breath', payload)
 
 @endpoint('razer.device.lighting.chroma', 'setBreathSingle', in_sig='yyy')
 def set_breath_single_effect(self, red, green, blue):
@@ -285,12 +259,9 @@ def set_breath_single_effect(self, red, green, blue):
     # Notify others
     self.send_effect_event('setBreathSingle', red, green, blue)
 
-    driver_path = self.get_driver_path('mode_breath')
-
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    self.write_attribute('mode_breath', payload)
 
 @endpoint('razer.device.lighting.chroma', 'setBreathDual', in_sig='yyyyyy')
 def set_breath_dual_effect(self, red1, green1, blue1, red2, green2, blue2):
@@ -320,27 +291,25 @@ def set_breath_dual_effect(self, red1, green1, blue1, red2, green2, blue2):
     # Notify others
     self.send_effect_event('setBreathDual', red1, green1, blue1, red2, green2, blue2)
 
-    driver_path = self.get_driver_path('mode_breath')
-
     payload = bytes([red1, green1, blue1, red2, green2, blue2])
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    self.write_attribute('mode_breath', payload)
 
-@endpoint('razer.device.lighting.chroma', 'setCustom')
+@endpoint('razer.device.lighting.chroma', 'setCustom', out_sig='u')
 def set_custom_effect(self):
     """
     Set the device to use custom LED matrix
+
+    Ends a frame of setKeyRow calls, frames are sent at most at the configured frame rate and only the newest waiting
+    frame is kept.
+
+    :return: Number of frames dropped since the last call, render slower if this is often above 0
+    :rtype: int
     """
     # TODO uncomment
     # self.logger.debug("DBus call set_custom_effect")
 
-    driver_path = self.get_driver_path('mode_custom')
-
-    payload = b'1'
-
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    return self.frame_pacer.submit()
 
 @endpoint('razer.device.lighting.chroma', 'setKeyRow', in_sig='ay', byte_arrays=True)
 def set_key_row(self, payload):
@@ -360,10 +329,23 @@ def set_key_row(self, payload):
     # TODO uncomment
     # self.logger.debug("DBus call set_key_row")
 
-    driver_path = self.get_driver_path('set_key_row')
+    self.frame_pacer.add_rows(payload)
+
+@endpoint('razer.device.lighting.chroma', 'setFrame', in_sig='ay', out_sig='u', byte_arrays=True)
+def set_frame(self, payload):
+    """
+    Set the RGB matrix and show it, setKeyRow and setCustom in one call
+
+    Takes rows like setKeyRow, either the whole matrix or only some rows. The device is only switched to custom mode
+    if something else is showing, frames are paced like setCustom.
+
+    :param payload: Binary payload
+    :type payload: bytes
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    :return: Number of frames dropped since the last call, render slower if this is often above 0
+    :rtype: int
+    """
+    return self.frame_pacer.submit_frame(payload)
 
 # Not sure if works on firefly
 @endpoint('razer.device.lighting.chroma', 'clearKeyRow', in_sig='y')
@@ -376,10 +358,7 @@ def clear_key_row(self, row_id):
     """
     self.logger.debug("DBus call clear_key_row")
 
-    driver_path = self.get_driver_path('temp_clear_row')
-
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write(str(int(row_id)))
+    self.write_attribute('temp_clear_row', row_id, coalesce_key=('temp_clear_row', int(row_id)))
 
 
 
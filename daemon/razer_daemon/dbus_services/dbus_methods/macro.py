@@ -10,10 +10,7 @@ def enable_macro_keys(self):
     """
     self.logger.debug("DBus call enable_macro_keys")
 
-    driver_path = self.get_driver_path('macro_keys')
-
-    with open(driver_path, 'w') as driver_file:
-        return driver_file.write('1')
+    self.write_attribute('macro_keys', True)
 
 @endpoint('razer.device.macro', 'getMacros', out_sig='s')
 def get_macros(self):
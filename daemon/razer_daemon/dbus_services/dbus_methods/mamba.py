@@ -5,34 +5,41 @@ import math
 import struct
 from razer_daemon.dbus_services import endpoint
 
-@endpoint('razer.device.power', 'getBattery', out_sig='d')
+
+def battery_level_valid(value):
+    """
+    Check a battery level read from the driver, wireless devices answer -1 when they miss the request
+
+    :param value: Battery level 0-255
+    :type value: int
+
+    :return: True if valid
+    :rtype: bool
+    """
+    return value >= 0
+
+@endpoint('razer.device.power', 'getBattery', out_sig='d', run_async=True)
 def get_battery(self):
     """
     Get mouse's battery level
     """
     self.logger.debug("DBus call get_battery")
 
-    driver_path = self.get_driver_path('get_battery')
-
-    with open(driver_path, 'r') as driver_file:
-        battery_255 = float(driver_file.read().strip())
-        if battery_255 < 0:
-            return -1.0
+    battery_255 = float(self.read_attribute('get_battery', retry=True, valid_func=battery_level_valid))
+    if battery_255 < 0:
+        return -1.0
 
-        battery_100 = (battery_255 / 255) * 100
-        return battery_100
+    battery_100 = (battery_255 / 255) * 100
+    return battery_100
 
-@endpoint('razer.device.power', 'isCharging', out_sig='b')
+@endpoint('razer.device.power', 'isCharging', out_sig='b', run_async=True)
 def is_charging(self):
     """
     Get charging status
     """
     self.logger.debug("DBus call is_charging")
 
-    driver_path = self.get_driver_path('is_charging')
-
-    with open(driver_path, 'r') as driver_file:
-        return bool(int(driver_file.read().strip()))
+    return self.read_attribute('is_charging', retry=True)
 
 @endpoint('razer.device.power', 'setIdleTime', in_sig='q')
 def set_idle_time(self, idle_time):
@@ -44,10 +51,7 @@ def set_idle_time(self, idle_time):
     """
     self.logger.debug("DBus call set_idle_time")
 
-    driver_path = self.get_driver_path('set_idle_time')
-
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write(str(idle_time))
+    self.write_attribute('set_idle_time', idle_time)
 
 @endpoint('razer.device.power', 'setLowBatteryThreshold', in_sig='y')
 def set_low_battery_threshold(self, threshold):
@@ -59,12 +63,9 @@ def set_low_battery_threshold(self, threshold):
     """
     self.logger.debug("DBus call set_low_battery_threshold")
 
-    driver_path = self.get_driver_path('set_idle_time')
-
     threshold = math.floor((threshold/100) * 255)
 
-    with open(driver_path, 'w') as driver_file:
-        driver_file.write(str(threshold))
+    self.write_attribute('set_idle_time', threshold)
 
 @endpoint('razer.device.lighting.power', 'setChargeEffect', in_sig='y')
 def set_charge_effect(self, charge_effect):
@@ -80,10 +81,7 @@ def set_charge_effect(self, charge_effect):
     """
     self.logger.debug("DBus call set_charge_effect")
 
-    driver_path = self.get_driver_path('set_charging_effect')
-
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(bytes([charge_effect]))
+    self.write_attribute('set_charging_effect', bytes([charge_effect]))
 
 @endpoint('razer.device.lighting.power', 'setChargeColour', in_sig='yyy')
 def set_charge_colour(self, red, green, blue):
@@ -101,12 +99,9 @@ def set_charge_colour(self, red, green, blue):
     """
     self.logger.debug("DBus call set_charge_colour")
 
-    driver_path = self.get_driver_path('set_charging_colour')
-
     payload = bytes([red, green, blue])
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(payload)
+    self.write_attribute('set_charging_colour', payload)
 
 @endpoint('razer.device.dpi', 'setDPI', in_sig='qq')
 def set_dpi_xy(self, dpi_x, dpi_y):
@@ -120,9 +115,6 @@ def set_dpi_xy(self, dpi_x, dpi_y):
     """
     self.logger.debug("DBus call set_dpi_both")
 
-    driver_path = self.get_driver_path('set_mouse_dpi')
-
     dpi_bytes = struct.pack('>HH', dpi_x, dpi_y)
 
-    with open(driver_path, 'wb') as driver_file:
-        driver_file.write(dpi_bytes)
+    self.write_attribute('set_mouse_dpi', dpi_bytes)
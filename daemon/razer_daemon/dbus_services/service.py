@@ -5,9 +5,13 @@ Service Object for DBus
 # Disable some pylint stuff
 # pylint: disable=no-member
 
+import concurrent.futures
 import types
 import dbus
 import dbus.service
+from gi.repository import GLib
+
+from razer_daemon.dbus_services.async_method import ASYNC_CALLBACKS, make_async
 
 
 def copy_func(function_reference, name=None):
@@ -24,37 +28,76 @@ def copy_func(function_reference, name=None):
     :rtype: func
     """
     if hasattr(function_reference, 'code'):
-        return types.FunctionType(function_reference.code, function_reference.globals, name or function_reference.func_name, function_reference.defaults, function_reference.closure)
+        new_function = types.FunctionType(function_reference.code, function_reference.globals, name or function_reference.func_name, function_reference.defaults, function_reference.closure)
+        # Keyword only arguments are for calls from within the daemon, DBus doesnt see them
+        new_function.__kwdefaults__ = function_reference.kwdefaults
     else:
-        return types.FunctionType(function_reference.__code__, function_reference.__globals__, name or function_reference.func_name, function_reference.__defaults__, function_reference.__closure__)
+        new_function = types.FunctionType(function_reference.__code__, function_reference.__globals__, name or function_reference.func_name, function_reference.__defaults__, function_reference.__closure__)
+        new_function.__kwdefaults__ = function_reference.__kwdefaults__
+
+    return new_function
 
-class DBusServiceFactory(object):
+def make_dbus_method(interface_name, function_name, function, in_signature=None, out_signature=None, byte_arrays=False, run_async=False):
     """
-    Factory object to create differnet service objects.
+    Make a DBus method out of a function
+
+    :param interface_name: DBus interface name
+    :type interface_name: str
+
+    :param function_name: DBus function name
+    :type function_name: str
+
+    :param function: Function reference
+    :type function: object
+
+    :param in_signature: DBus function signature
+    :type in_signature: str
+
+    :param out_signature: DBus function signature
+    :type out_signature: str
+
+    :param byte_arrays: Is byte array
+    :type byte_arrays: bool
+
+    :param run_async: Run on the service's executor and reply when done, instead of in the main loop
+    :type run_async: bool
 
-    Different service objects are useful, as the DBus service table is stored in the class which would be shared
-    between all class instances.
+    :return: DBus method named function_name
+    :rtype: callable
     """
-    service_number = 0
+    # Create a copy of the function so that if its used multiple times it wont affect other instances if the names changed
+    function_deepcopy = copy_func(function, function_name)
 
-    @staticmethod
-    def get_service(bus_name, object_path):
-        """
-        Get an instance of the service history
+    async_callbacks = None
+    if run_async:
+        function_deepcopy = make_async(function_deepcopy, DBusService.get_method_executor, GLib.idle_add)
+        async_callbacks = ASYNC_CALLBACKS
 
-        :param bus_name: DBus bus name
-        :type bus_name: str
+    return dbus.service.method(interface_name, in_signature=in_signature, out_signature=out_signature, byte_arrays=byte_arrays, async_callbacks=async_callbacks)(function_deepcopy)
 
-        :param object_path: DBus Object name
-        :type object_path: str
+def make_service_class(base_class, methods):
+    """
+    Make a subclass of a service with DBus methods
 
-        :return: New object
-        :rtype: DBusService
-        """
-        new_service = type("DBUSService{0:04}".format(DBusServiceFactory.service_number), (DBusService,), {})
-        DBusServiceFactory.service_number += 1
+    dbus-python builds the method table of a class when it is created, so the subclass has its own table and methods
+    added to it dont show up on other classes. It keeps the name of the base class but lives in this module, as
+    the table is keyed by module and name.
+
+    :param base_class: Service class
+    :type base_class: type
 
-        return new_service(bus_name, object_path)
+    :param methods: Arguments of make_dbus_method for each method
+    :type methods: iterable of tuple
+
+    :return: Subclass
+    :rtype: type
+    """
+    namespace = {'__module__': __name__, '__doc__': base_class.__doc__}
+    for method_args in methods:
+        method = make_dbus_method(*method_args)
+        namespace[method.__name__] = method
+
+    return type(base_class.__name__, (base_class,), namespace)
 
 class DBusService(dbus.service.Object):
     """
@@ -76,6 +119,7 @@ class DBusService(dbus.service.Object):
         """
         self.bus_name = bus_name
         self.object_path = object_path
+        self._method_executor = None
 
         if DBusService.BUS_TYPE == 'session':
             bus_object = dbus.service.BusName(bus_name, bus=dbus.SessionBus())
@@ -84,7 +128,36 @@ class DBusService(dbus.service.Object):
 
         super(DBusService, self).__init__(bus_object, object_path)
 
-    def add_dbus_method(self, interface_name, function_name, function, in_signature=None, out_signature=None, byte_arrays=False):
+    def get_method_executor(self):
+        """
+        Get the executor asynchronous methods run on
+
+        A single thread, so calls to one device happen one at a time but never hold up other devices.
+
+        :return: Executor
+        :rtype: concurrent.futures.ThreadPoolExecutor
+        """
+        if self._method_executor is None:
+            self._method_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.object_path)
+        return self._method_executor
+
+    def close_method_executor(self):
+        """
+        Stop running asynchronous methods, queued calls are cancelled
+        """
+        if self._method_executor is not None:
+            self._method_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dbus_class_key(self):
+        """
+        Get the key of this class in the DBus introspection table
+
+        :return: Module and class name
+        :rtype: str
+        """
+        return self.__class__.__module__ + '.' + self.__class__.__name__
+
+    def add_dbus_method(self, interface_name, function_name, function, in_signature=None, out_signature=None, byte_arrays=False, run_async=False):
         """
         Add method to DBus Object
 
@@ -105,14 +178,13 @@ class DBusService(dbus.service.Object):
 
         :param byte_arrays: Is byte array
         :type byte_arrays: bool
-        """
 
-        # Get class key for use in the DBus introspection table
-        class_key = [key for key in self._dbus_class_table.keys() if key.endswith(self.__class__.__name__)][0]
+        :param run_async: Run on the service's executor and reply when done, instead of in the main loop
+        :type run_async: bool
+        """
 
-        # Create a copy of the function so that if its used multiple times it wont affect other instances if the names changed
-        function_deepcopy = copy_func(function, function_name)
-        func = dbus.service.method(interface_name, in_signature=in_signature, out_signature=out_signature, byte_arrays=byte_arrays)(function_deepcopy)
+        class_key = self._dbus_class_key()
+        func = make_dbus_method(interface_name, function_name, function, in_signature, out_signature, byte_arrays, run_async)
 
         # Add method to DBus tables
         try:
@@ -134,14 +206,13 @@ class DBusService(dbus.service.Object):
         :type function_name: str
         """
 
-        # Get class key for use in the DBus introspection table
-        class_key = [key for key in self._dbus_class_table.keys() if key.endswith(self.__class__.__name__)][0]
+        class_key = self._dbus_class_key()
 
         # Remove method from DBus tables
         # Remove method from class
         try:
             del self._dbus_class_table[class_key][interface_name][function_name]
-            delattr(DBusService, function_name)
+            delattr(self.__class__, function_name)
 
         except (KeyError, AttributeError):
             pass
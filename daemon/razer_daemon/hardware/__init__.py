@@ -1,14 +1,17 @@
 """
 Hardware collection
 """
+import logging
 
-from razer_daemon.hardware.keyboards import RazerBlackWidow2013, RazerBlackWidowChroma, RazerBlackWidowChromaTournamentEdition
+from razer_daemon.hardware.device_base import parse_device_id, find_event_files
+from razer_daemon.hardware.keyboards import RazerBlackWidow2013, RazerBlackWidowChroma, RazerBlackWidowChromaTournamentEdition, RazerBlackWidowChromaX
 from razer_daemon.hardware.mouse_mat import RazerFireFly
 from razer_daemon.hardware.mouse import RazerMambaChromaWireless
 
-def get_device_classes():
+
+def _find_device_classes():
     """
-    Get a list of hardware classes
+    Get a list of hardware classes defined in this module
 
     :return: List of RazerDevice subclasses
     :rtype: list of callable
@@ -24,6 +27,73 @@ def get_device_classes():
 
     return classes
 
+def _build_class_index(classes):
+    """
+    Build a (VID, PID) -> classes lookup
+
+    :param classes: Hardware classes
+    :type classes: list of callable
+
+    :return: Dictionary of (VID, PID) to list of classes
+    :rtype: dict
+    """
+    index = {}
+
+    for device_class in classes:
+        index.setdefault((device_class.USB_VID, device_class.USB_PID), []).append(device_class)
+
+    return index
+
+_DEVICE_CLASSES = _find_device_classes()
+_DEVICE_CLASS_INDEX = _build_class_index(_DEVICE_CLASSES)
+
+
+def get_device_classes():
+    """
+    Get a list of hardware classes
+
+    :return: List of RazerDevice subclasses
+    :rtype: list of callable
+    """
+    return list(_DEVICE_CLASSES)
+
+def get_device_class(device_id, event_files=None):
+    """
+    Get the hardware class for a HID device
+
+    Classes which share a VID/PID (like the BlackWidow Chroma and Chroma X) are told apart by the names of
+    the names of the event files which belong to the device.
+
+    :param device_id: Device ID like 0000:0000:0000.0000
+    :type device_id: str
+
+    :param event_files: Filenames from /dev/input/by-id/ of the device, only found if needed when None
+    :type event_files: list of str or None
+
+    :return: Hardware class or None
+    :rtype: callable or None
+    """
+    vid_pid = parse_device_id(device_id)
+    if vid_pid is None:
+        return None
+
+    candidates = _DEVICE_CLASS_INDEX.get(vid_pid)
+    if candidates is None or not candidates[0].has_driver(device_id):
+        return None
+
+    if len(candidates) == 1:
+        return candidates[0]
+
+    if event_files is None:
+        event_files = find_event_files(device_id)
+
+    for device_class in candidates:
+        if device_class.match_event_files(event_files):
+            return device_class
+
+    logging.getLogger('razer.hardware').warning("No event file of %s matches %s, assuming %s", device_id,
+                                                ', '.join(device_class.__name__ for device_class in candidates), candidates[0].__name__)
+    return candidates[0]
 
 
 if __name__ == '__main__':
@@ -3,12 +3,146 @@ Hardware base class
 """
 import re
 import os
-import types
+import glob
+import json
+import functools
 import logging
 
-from razer_daemon.dbus_services.service import DBusService
-import razer_daemon.dbus_services.dbus_methods
+from razer_daemon.dbus_services.batch import apply_batch, make_method_table
+from razer_daemon.dbus_services.service import DBusService, make_service_class
+from razer_daemon.dbus_services.dbus_methods import ENDPOINTS
 from razer_daemon.misc import effect_sync
+from razer_daemon.misc.device_attributes import DeviceAttributes
+from razer_daemon.misc.device_writer import DeviceWriter
+from razer_daemon.misc.driver_backend import RecordingBackend, decode_attribute, encode_attribute
+from razer_daemon.misc.driver_trace import get_trace_writer
+from razer_daemon.misc.driver_files import DriverFileCache
+from razer_daemon.misc.frame_diff import FrameDiff
+from razer_daemon.misc.frame_pacer import FramePacer
+from razer_daemon.misc.hidraw import HidrawDriverFiles, HidrawTransport, find_hidraw_node
+from razer_daemon.misc.io_policy import IOPolicy
+from razer_daemon.misc.io_stats import IoStatsBackend
+from razer_daemon.misc.shadow_state import ShadowState
+
+HID_DEVICES_PATH = '/sys/bus/hid/devices'
+EVENT_FILES_PATH = '/dev/input/by-id/'
+
+# Bus:VID:PID.Instance like 0003:1532:0203.0001
+DEVICE_ID_REGEX = re.compile(r'^[0-9A-F]{4}:([0-9A-F]{4}):([0-9A-F]{4})\.[0-9A-F]{4}$')
+
+
+def parse_device_id(device_id):
+    """
+    Get the USB VID and PID from a HID device ID
+
+    :param device_id: Device ID like 0000:0000:0000.0000
+    :type device_id: str
+
+    :return: Tuple of (VID, PID) or None if the ID is malformed
+    :rtype: tuple of int or None
+    """
+    match = DEVICE_ID_REGEX.match(device_id)
+    if match is None:
+        return None
+
+    return int(match.group(1), 16), int(match.group(2), 16)
+
+
+def find_event_files(device_id):
+    """
+    Get the event files of a HID device
+
+    The keyboard events can come from another interface than the one the driver files are on, so the event devices
+    under the input/ children of every HID device on the same USB device are used.
+
+    :param device_id: Device ID like 0000:0000:0000.0000
+    :type device_id: str
+
+    :return: Filenames from /dev/input/by-id/ which link to the event devices
+    :rtype: list of str
+    """
+    # HID device -> USB interface -> USB device
+    device_path = os.path.realpath(os.path.join(HID_DEVICES_PATH, device_id))
+    if not os.path.isdir(device_path):
+        return []
+    usb_device_path = os.path.dirname(os.path.dirname(device_path))
+
+    event_nodes = set(os.path.basename(event_path) for event_path in glob.glob(os.path.join(usb_device_path, '*', '*', 'input', 'input*', 'event*')))
+    if not event_nodes:
+        return []
+
+    try:
+        by_id_files = os.listdir(EVENT_FILES_PATH)
+    except FileNotFoundError:
+        return []
+
+    event_files = []
+    for event_file in by_id_files:
+        try:
+            target = os.readlink(os.path.join(EVENT_FILES_PATH, event_file))
+        except OSError:
+            continue
+
+        if os.path.basename(target) in event_nodes:
+            event_files.append(event_file)
+
+    return sorted(event_files)
+
+
+def hidraw_serials(config):
+    """
+    Get the serials of devices to drive with the hidraw backend
+
+    :param config: Config
+    :type config: configparser.ConfigParser
+
+    :return: Serials
+    :rtype: set of str
+    """
+    return {serial.strip() for serial in config.get('General', 'hidraw_devices').split(',') if serial.strip()}
+
+
+def parse_led_state(value):
+    """
+    Parse a mode LED driver file
+
+    :param value: Contents of the file
+    :type value: str
+
+    :return: True if on
+    :rtype: bool
+    """
+    return value == '1'
+
+
+# Settings kept in the shadow state if the device has the getter. Getter, attribute name, driver file, parse function
+SHADOWED_ATTRIBUTES = (
+    ('get_brightness', 'brightness', 'set_brightness', float),
+    ('get_game_mode', 'game_mode', 'mode_game', parse_led_state),
+    ('get_macro_mode', 'macro_mode', 'mode_macro', parse_led_state),
+    ('get_macro_effect', 'macro_effect', 'mode_macro_effect', int),
+)
+
+# Effect events which leave the custom frame on the matrix
+MATRIX_KEEPING_EFFECTS = ('setBrightness',)
+
+# Methods every device has. Interface, DBus name, method, in signature, out signature, run asynchronously
+DEVICE_METHODS = (
+    ('razer.device.misc', 'getSerial', 'get_serial', None, 's', False),
+    ('razer.device.misc', 'suspendDevice', 'suspend_device', None, None, False),
+    ('razer.device.misc', 'resumeDevice', 'resume_device', None, None, False),
+    ('razer.device.misc', 'getVidPid', 'get_vid_pid', None, 'ai', False),
+    ('razer.device.misc', 'refreshAttribute', 'refresh_attribute', 's', 's', True),
+    ('razer.device.misc', 'forceRefresh', 'force_refresh', None, 'as', True),
+    ('razer.device.misc', 'flushWrites', 'flush_writes', None, 'b', True),
+    ('razer.device.misc', 'getWriteQueueStats', 'get_write_queue_stats', None, 's', False),
+    ('razer.device.misc', 'getFrameStats', 'get_frame_stats', None, 's', False),
+    ('razer.device.misc', 'getHealth', 'get_health', None, 's', False),
+    ('razer.device.misc', 'applyBatch', 'apply_batch', 'a(sav)', 'a(bs)', False),
+)
+
+# Hardware class to its DBus service class, and each service class to itself
+_SERVICE_CLASSES = {}
 
 # pylint: disable=too-many-instance-attributes
 class RazerDevice(DBusService):
@@ -20,6 +154,8 @@ class RazerDevice(DBusService):
     BUS_PATH = 'org.razer'
     OBJECT_PATH = '/org/razer/device/'
     METHODS = []
+    # DBus method name to method for batches, set on the service class
+    METHOD_TABLE = {}
 
     EVENT_FILE_REGEX = None
 
@@ -27,8 +163,15 @@ class RazerDevice(DBusService):
     USB_PID = None
     HAS_MATRIX = False
     MATRIX_DIMS = [-1, -1]
+    # USB interface the driver sends its reports to, set on devices the hidraw backend can drive
+    HIDRAW_INTERFACE = None
 
-    def __init__(self, device_path, device_number, config):
+    def __new__(cls, *args, **kwargs):
+        # pylint: disable=unused-argument
+        # Devices are instances of their hardware class's service class, which has the DBus methods
+        return super(RazerDevice, cls).__new__(cls.get_service_class())
+
+    def __init__(self, device_path, device_number, config, device_serial=None, driver_backend=None):
 
         self._observer_list = []
         self._effect_sync_propagate_up = False
@@ -38,39 +181,62 @@ class RazerDevice(DBusService):
         self._parent = None
         self._device_path = device_path
         self._device_number = device_number
-        self.serial = self.get_serial()
+        # Every driver read and write goes through the backend, sysfs unless another is given
+        self.driver_backend = driver_backend if driver_backend is not None else DriverFileCache(device_path)
+        # Retries failed driver I/O and stops calling the device once it keeps failing
+        self.io_policy = IOPolicy(device_number)
+        # Writes are done off the main loop, newer writes to an attribute replace queued ones
+        self._writer = DeviceWriter(self._write_driver_file_now, device_number)
+        self._writer.start()
+        # Serial, firmware version and name are read once, the serial is usually known from probing the device
+        self.attributes = DeviceAttributes(self.read_driver_file, device_serial)
+        self.serial = self.attributes.serial
 
         self._effect_sync = effect_sync.EffectSync(self, device_number)
 
+        self._is_stopped = False
         self._is_closed = False
 
         self.logger = logging.getLogger('razer.device{0}'.format(device_number))
         self.logger.info("Initialising device.%d %s", device_number, self.__class__.__name__)
 
+        if self.serial in hidraw_serials(config):
+            self._use_hidraw()
+
+        # Latency histograms per attribute, the backend is left as is when disabled
+        self.io_stats = None
+        if config.getboolean('General', 'io_stats'):
+            self.io_stats = self.driver_backend = IoStatsBackend(self.driver_backend)
+
+        # Record every driver call on top of whichever backend is used
+        trace_file = config.get('General', 'driver_trace')
+        if trace_file:
+            trace_writer = get_trace_writer(os.path.expanduser(trace_file))
+            self.driver_backend = RecordingBackend(self.driver_backend, max_calls=0, listener=functools.partial(trace_writer.record, self.serial))
+
         # Find event files in /dev/input/by-id/ by matching against regex
         self.event_files = []
-        for event_file in os.listdir('/dev/input/by-id/'):
+        for event_file in os.listdir(EVENT_FILES_PATH):
             if self.EVENT_FILE_REGEX is not None and self.EVENT_FILE_REGEX.match(event_file) is not None:
-                self.event_files.append(os.path.join('/dev/input/by-id/', event_file))
+                self.event_files.append(os.path.join(EVENT_FILES_PATH, event_file))
 
+        # The DBus methods are already on the class, see get_service_class
         object_path = os.path.join(self.OBJECT_PATH, self.serial)
         DBusService.__init__(self, self.BUS_PATH, object_path)
 
-        # Register method to get the devices serial
-        self.logger.debug("Adding getSerial method to DBus")
-        self.add_dbus_method('razer.device.misc', 'getSerial', self.get_serial, out_signature='s')
-
-        # Set up methods to suspend and restore device operation
+        # Arguments of the last effect set before suspending
         self.suspend_args = {}
-        self.logger.debug("Adding razer.device.misc.suspendDevice method to DBus")
-        self.add_dbus_method('razer.device.misc', 'suspendDevice', self.suspend_device)
-        self.logger.debug("Adding razer.device.misc.resumeDevice method to DBus")
-        self.add_dbus_method('razer.device.misc', 'resumeDevice', self.resume_device)
-        self.logger.debug("Adding razer.device.misc.getVidPid method to DBus")
-        self.add_dbus_method('razer.device.misc', 'getVidPid', self.get_vid_pid, out_signature='ai')
 
-        # Load additional DBus methods
-        self.load_methods()
+        # Custom frames are released at most at the frame rate, only rows which changed are written
+        self.frame_pacer = FramePacer(self, device_number, config.getfloat('General', 'custom_frame_rate'),
+                                      FrameDiff.row_length_for(self.MATRIX_DIMS))
+
+        # Readable settings are answered from memory, seeded with one read now and reconciled on the method executor
+        self.shadow_state = ShadowState(self.read_driver_file, device_number, self.get_method_executor())
+        for getter_name, attribute_name, driver_filename, parse_func in SHADOWED_ATTRIBUTES:
+            if getter_name in self.METHODS:
+                self.shadow_state.add(attribute_name, driver_filename, parse_func)
+        self.shadow_state.start()
 
     def send_effect_event(self, effect_name, *args):
         """
@@ -82,11 +248,31 @@ class RazerDevice(DBusService):
         :param args: Effect arguments
         :type args: list
         """
+        # The effect replaces whatever custom frame was on the matrix, unless it only changes how bright it is
+        if effect_name not in MATRIX_KEEPING_EFFECTS:
+            self.frame_pacer.reset()
+
         payload = ['effect', self, effect_name]
         payload.extend(args)
 
         self.notify_observers(tuple(payload))
 
+    def send_state_event(self, state_name, *args):
+        """
+        Send state event, unlike effects these are only for this device's observers
+
+        :param state_name: Setter name of the state
+        :type state_name: str
+
+        :param args: Setter arguments
+        :type args: list
+        """
+        if not self._disable_notifications:
+            payload = ('state', self, state_name) + args
+
+            for observer in self._observer_list:
+                observer.notify(payload)
+
     @property
     def effect_sync(self):
         """
@@ -139,6 +325,227 @@ class RazerDevice(DBusService):
         """
         return os.path.join(self._device_path, driver_filename)
 
+    def _use_hidraw(self):
+        """
+        Send reports to the device over hidraw for the attributes that can be, the rest still go to the driver
+        """
+        if self.HIDRAW_INTERFACE is None:
+            self.logger.warning("The hidraw backend does not support %s", self.__class__.__name__)
+            return
+
+        hidraw_node = find_hidraw_node(self._device_path, self.HIDRAW_INTERFACE)
+        if hidraw_node is None:
+            self.logger.warning("Could not find the hidraw node of interface %d, using the driver", self.HIDRAW_INTERFACE)
+            return
+
+        self.logger.info("Using hidraw backend %s", hidraw_node)
+        self._writer.flush()
+        self.driver_backend = HidrawDriverFiles(HidrawTransport(hidraw_node), self.driver_backend)
+
+    def _write_driver_file_now(self, driver_filename, payload):
+        """
+        Write to a driver file straight away, called by the writer thread
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param payload: Data
+        :type payload: bytes
+
+        :return: Number of bytes written
+        :rtype: int
+        """
+        return self.io_policy.call(self.driver_backend.write, driver_filename, payload)
+
+    def read_driver_file(self, driver_filename, retry=False, valid_func=None):
+        """
+        Read a driver file, the file is kept open for later reads
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param retry: Retry failed reads with backoff, only for methods which dont run on the main loop
+        :type retry: bool
+
+        :param valid_func: Checks the contents, invalid contents are retried like a failed read
+        :type valid_func: callable or None
+
+        :return: File contents
+        :rtype: str
+
+        :raises razer_daemon.misc.io_policy.DeviceDegradedError: If the device has been failing
+        """
+        return self._read(driver_filename, bytes.decode, retry, valid_func)
+
+    def read_attribute(self, driver_filename, retry=False, valid_func=None):
+        """
+        Read a driver attribute as its type, see razer_daemon.misc.driver_backend.ATTRIBUTE_TYPES
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param retry: Retry failed reads with backoff, only for methods which dont run on the main loop
+        :type retry: bool
+
+        :param valid_func: Checks the value, invalid values are retried like a failed read
+        :type valid_func: callable or None
+
+        :return: Value
+        :rtype: object
+
+        :raises razer_daemon.misc.io_policy.DeviceDegradedError: If the device has been failing
+        """
+        return self._read(driver_filename, lambda payload: decode_attribute(driver_filename, payload), retry, valid_func)
+
+    def _read(self, driver_filename, decode_func, retry, valid_func):
+        """
+        Read a driver file through the backend and I/O policy
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param decode_func: Converts the contents
+        :type decode_func: callable
+
+        :param retry: Retry failed reads
+        :type retry: bool
+
+        :param valid_func: Checks the converted contents
+        :type valid_func: callable or None
+
+        :return: Converted contents
+        :rtype: object
+        """
+        # Queued writes to the file are done first so what was last set is read back
+        self._writer.wait_for(driver_filename)
+
+        def read():
+            return decode_func(self.driver_backend.read(driver_filename))
+
+        return self.io_policy.call(read, retry=retry, valid_func=valid_func)
+
+    def write_driver_file(self, driver_filename, payload, coalesce_key=None, wait=False):
+        """
+        Queue a write to a driver file, the file is kept open for later writes
+
+        Failed writes are logged by the writer, unless waiting for the write.
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param payload: Data, strings are encoded
+        :type payload: str or bytes
+
+        :param coalesce_key: Queued writes with the same key are replaced, defaults to the filename
+        :type coalesce_key: object
+
+        :param wait: Return once written, raising any error
+        :type wait: bool
+        """
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        self._writer.write(driver_filename, payload, coalesce_key, wait)
+
+    def write_attribute(self, driver_filename, value, coalesce_key=None, wait=False):
+        """
+        Queue a write of a value to a driver attribute, converted by the attribute's type
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param value: Value
+        :type value: object
+
+        :param coalesce_key: Queued writes with the same key are replaced, defaults to the filename
+        :type coalesce_key: object
+
+        :param wait: Return once written, raising any error
+        :type wait: bool
+        """
+        self.write_driver_file(driver_filename, encode_attribute(driver_filename, value), coalesce_key, wait)
+
+    def driver_write_pending(self, driver_filename):
+        """
+        Check if a driver file has queued writes
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: True if there are writes which havent finished
+        :rtype: bool
+        """
+        return self._writer.has_pending(driver_filename)
+
+    def flush_writes(self):
+        """
+        Wait for the queued driver writes to finish
+
+        :return: True if they finished in time
+        :rtype: bool
+        """
+        self.logger.debug("DBus call flush_writes")
+        return self._writer.flush()
+
+    def get_write_queue_stats(self):
+        """
+        Get the write queue counters
+
+        :return: JSON of queue depth, max queue depth, queued, written, coalesced and failed counts
+        :rtype: str
+        """
+        self.logger.debug("DBus call get_write_queue_stats")
+        return json.dumps(self._writer.stats())
+
+    def get_io_stats(self):
+        """
+        Get the latency histograms of the driver attributes
+
+        :return: Dict of driver filename to dict of read or write to stats, empty if disabled
+        :rtype: dict
+        """
+        if self.io_stats is None:
+            return {}
+        return self.io_stats.stats()
+
+    def get_health(self):
+        """
+        Get the device's health, clients should back off while it is degraded
+
+        :return: JSON of the state (healthy, degraded or probing), failure counts, last error and seconds until retry
+        :rtype: str
+        """
+        self.logger.debug("DBus call get_health")
+        return json.dumps(self.io_policy.breaker.to_dict())
+
+    def apply_batch(self, operations):
+        """
+        Run several DBus methods of the device in one call
+
+        Writes are held back until every operation has run, so an attribute set more than once is written once with
+        its newest value. See razer_daemon.dbus_services.batch.
+
+        :param operations: DBus method name and arguments of each operation
+        :type operations: list of (str, list)
+
+        :return: Success and error message of each operation
+        :rtype: list of (bool, str)
+        """
+        self.logger.debug("DBus call apply_batch")
+
+        with self._writer.hold():
+            return apply_batch(self, self.METHOD_TABLE, operations, self.logger)
+
+    def get_frame_stats(self):
+        """
+        Get the custom frame counters
+
+        :return: JSON of the max fps and the submitted, sent and dropped frame counts
+        :rtype: str
+        """
+        self.logger.debug("DBus call get_frame_stats")
+        return json.dumps(self.frame_pacer.stats())
+
     def get_serial(self):
         """
         Get serial number for device
@@ -146,9 +553,30 @@ class RazerDevice(DBusService):
         :return: String of the serial number
         :rtype: str
         """
-        serial_path = os.path.join(self._device_path, 'get_serial')
-        with open(serial_path, 'r') as serial_file:
-            return serial_file.read().strip()
+        return self.attributes.serial
+
+    def refresh_attribute(self, attribute_name):
+        """
+        Read a cached device attribute from the driver again, for example the firmware_version after an update
+
+        :param attribute_name: firmware_version or device_name
+        :type attribute_name: str
+
+        :return: New value
+        :rtype: str
+        """
+        self.logger.info("Refreshing %s", attribute_name)
+        return self.attributes.refresh(attribute_name)
+
+    def force_refresh(self):
+        """
+        Read the shadowed settings from the driver again
+
+        :return: Names of the settings which had changed
+        :rtype: list of str
+        """
+        self.logger.debug("DBus call force_refresh")
+        return self.shadow_state.reconcile()
 
     def get_vid_pid(self):
         """
@@ -160,26 +588,36 @@ class RazerDevice(DBusService):
         result = [self.USB_VID, self.USB_PID]
         return result
 
-    def load_methods(self):
+    @classmethod
+    def get_service_class(cls):
         """
-        Load DBus methods
+        Get the DBus service class of this hardware class
+
+        Made the first time a device of the class is added, with the methods every device has and the endpoints in
+        METHODS. Later devices of the class reuse it so adding them does no method table work.
 
-        Goes through the list in self.METHODS and loads each effect and adds it to DBus
+        :return: Subclass with the DBus methods
+        :rtype: type
         """
-        available_functions = {}
-        methods = dir(razer_daemon.dbus_services.dbus_methods)
-        for method in methods:
-            potential_function = getattr(razer_daemon.dbus_services.dbus_methods, method)
-            if isinstance(potential_function, types.FunctionType) and hasattr(potential_function, 'endpoint') and potential_function.endpoint:
-                available_functions[potential_function.__name__] = potential_function
+        try:
+            return _SERVICE_CLASSES[cls]
+        except KeyError:
+            pass
+
+        methods = [(interface_name, function_name, getattr(cls, method_name), in_sig, out_sig, False, run_async)
+                   for interface_name, function_name, method_name, in_sig, out_sig, run_async in DEVICE_METHODS]
 
-        for method_name in self.METHODS:
+        for method_name in cls.METHODS:
             try:
-                new_function = available_functions[method_name]
-                self.logger.debug("Adding %s.%s method to DBus", new_function.interface, new_function.name)
-                self.add_dbus_method(new_function.interface, new_function.name, new_function, new_function.in_sig, new_function.out_sig, new_function.byte_arrays)
+                new_function = ENDPOINTS[method_name]
             except KeyError:
-                pass
+                continue
+            methods.append((new_function.interface, new_function.name, new_function, new_function.in_sig, new_function.out_sig, new_function.byte_arrays, new_function.run_async))
+
+        service_class = _SERVICE_CLASSES[cls] = make_service_class(cls, methods)
+        service_class.METHOD_TABLE = make_method_table(methods)
+        _SERVICE_CLASSES[service_class] = service_class
+        return service_class
 
     def suspend_device(self):
         """
@@ -214,12 +652,31 @@ class RazerDevice(DBusService):
         # Clear observer list
         self._observer_list.clear()
 
+    def stop(self):
+        """
+        Stop everything the device runs on the main loop, key watchers, coroutines, scheduled jobs and the frame pacer
+
+        Has to be called from the main loop's thread as the asyncio loop isnt thread safe, close can then be called
+        from any thread.
+        """
+        if not self._is_stopped:
+            self._is_stopped = True
+            self._close()
+            self.shadow_state.close()
+            self.frame_pacer.close()
+            self.close_method_executor()
+
     def close(self):
         """
         Close any resources opened by subclasses
+
+        Stops the device if that hasnt been done yet, then finishes the queued writes and closes the backend, which
+        can block on the device.
         """
         if not self._is_closed:
-            self._close()
+            self.stop()
+            self._writer.close()
+            self.driver_backend.close()
 
             self._is_closed = True
 
@@ -293,13 +750,39 @@ class RazerDevice(DBusService):
         :return: True if its the correct device ID
         :rtype: bool
         """
-        pattern = r'^[0-9A-F]{4}:' + '{0:04X}'.format(cls.USB_VID) +':' + '{0:04X}'.format(cls.USB_PID) + r'\.[0-9A-F]{4}$'
+        if parse_device_id(device_id) != (cls.USB_VID, cls.USB_PID):
+            return False
+
+        return cls.has_driver(device_id)
+
+    @staticmethod
+    def has_driver(device_id):
+        """
+        Check the razer driver is bound to the device
 
-        if re.match(pattern, device_id) is not None:
-            if 'device_type' in  os.listdir(os.path.join('/sys/bus/hid/devices', device_id)):
-                return True
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :return: True if the driver files exist
+        :rtype: bool
+        """
+        return os.path.exists(os.path.join(HID_DEVICES_PATH, device_id, 'device_type'))
+
+    @classmethod
+    def match_event_files(cls, event_files):
+        """
+        Check if any of the event files belong to this class
+
+        :param event_files: Filenames from /dev/input/by-id/
+        :type event_files: list of str
+
+        :return: True if an event file matches EVENT_FILE_REGEX
+        :rtype: bool
+        """
+        if cls.EVENT_FILE_REGEX is None:
+            return False
 
-        return False
+        return any(cls.EVENT_FILE_REGEX.match(event_file) is not None for event_file in event_files)
 
     def __del__(self):
         self.close()
@@ -320,11 +803,11 @@ class RazerDeviceBrightnessSuspend(RazerDevice):
         Get the current brightness level, store it for later and then set the brightness to 0
         """
         self.suspend_args.clear()
-        self.suspend_args['brightness'] = razer_daemon.dbus_services.dbus_methods.get_brightness(self)
+        self.suspend_args['brightness'] = ENDPOINTS['get_brightness'](self)
 
         # Todo make it context?
         self.disable_notify = True
-        razer_daemon.dbus_services.dbus_methods.set_brightness(self, 0)
+        ENDPOINTS['set_brightness'](self, 0)
         self.disable_notify = False
 
     def _resume_device(self):
@@ -336,5 +819,5 @@ class RazerDeviceBrightnessSuspend(RazerDevice):
         brightness = self.suspend_args.get('brightness', 100)
 
         self.disable_notify = True
-        razer_daemon.dbus_services.dbus_methods.set_brightness(self, brightness)
+        ENDPOINTS['set_brightness'](self, brightness)
         self.disable_notify = False
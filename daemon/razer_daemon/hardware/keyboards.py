@@ -4,8 +4,6 @@ Keyboards class
 import re
 
 from razer_daemon.hardware.device_base import RazerDeviceBrightnessSuspend
-from razer_daemon.misc.key_event_management import KeyManager
-from razer_daemon.misc.ripple_effect import RippleManager
 
 
 class MacroKeyboard(RazerDeviceBrightnessSuspend):
@@ -19,6 +17,10 @@ class MacroKeyboard(RazerDeviceBrightnessSuspend):
         super(MacroKeyboard, self).__init__(*args)
         # Methods are loaded into DBus by this point
 
+        # Imported here as it pulls in Gdk, so it only loads once a keyboard is present
+        # pylint: disable=import-outside-toplevel
+        from razer_daemon.misc.key_event_management import KeyManager
+
         self.key_manager = KeyManager(self._device_number, self.event_files, self)
 
     def _close(self):
@@ -55,9 +57,10 @@ class RazerBlackWidowChroma(MacroKeyboard):
     USB_PID = 0x0203
     HAS_MATRIX = True
     MATRIX_DIMS = [6, 22]  # 6 Rows, 22 Cols
+    HIDRAW_INTERFACE = 2
     METHODS = ['get_firmware', 'get_matrix_dims', 'has_matrix', 'get_device_name', 'get_device_type_keyboard', 'get_brightness', 'set_brightness', 'set_wave_effect', 'set_static_effect', 'set_spectrum_effect',
                'set_reactive_effect', 'set_none_effect', 'set_breath_random_effect', 'set_breath_single_effect', 'set_breath_dual_effect',
-               'set_custom_effect', 'set_key_row', 'enable_macro_keys', 'get_game_mode', 'set_game_mode', 'get_macro_mode', 'set_macro_mode',
+               'set_custom_effect', 'set_key_row', 'set_frame', 'enable_macro_keys', 'get_game_mode', 'set_game_mode', 'get_macro_mode', 'set_macro_mode',
                'get_macro_effect', 'set_macro_effect', 'get_macros', 'delete_macro', 'add_macro',
 
                'set_ripple_effect', 'set_ripple_effect_random_colour']
@@ -65,6 +68,9 @@ class RazerBlackWidowChroma(MacroKeyboard):
     def __init__(self, *args):
         super(RazerBlackWidowChroma, self).__init__(*args)
 
+        # pylint: disable=import-outside-toplevel
+        from razer_daemon.misc.ripple_effect import RippleManager
+
         self.ripple_manager = RippleManager(self, self._device_number)
 
     def _close(self):
@@ -86,15 +92,19 @@ class RazerBlackWidowChromaTournamentEdition(MacroKeyboard):
     USB_PID = 0x0209
     HAS_MATRIX = True
     MATRIX_DIMS = [6, 22]  # 6 Rows, 22 Cols
+    HIDRAW_INTERFACE = 2
     METHODS = ['get_firmware', 'get_matrix_dims', 'has_matrix',  'get_device_name', 'get_device_type_keyboard', 'get_brightness', 'set_brightness', 'set_wave_effect', 'set_static_effect', 'set_spectrum_effect',
                'set_reactive_effect', 'set_none_effect', 'set_breath_random_effect', 'set_breath_single_effect', 'set_breath_dual_effect',
-               'set_custom_effect', 'set_key_row', 'enable_macro_keys', 'get_game_mode', 'set_game_mode',
+               'set_custom_effect', 'set_key_row', 'set_frame', 'enable_macro_keys', 'get_game_mode', 'set_game_mode',
 
                'set_ripple_effect', 'set_ripple_effect_random_colour']
 
     def __init__(self, *args):
         super(RazerBlackWidowChromaTournamentEdition, self).__init__(*args)
 
+        # pylint: disable=import-outside-toplevel
+        from razer_daemon.misc.ripple_effect import RippleManager
+
         self.ripple_manager = RippleManager(self, self._device_number)
 
     def _close(self):
@@ -116,15 +126,19 @@ class RazerBlackWidowChromaX(MacroKeyboard):
     USB_PID = 0x0203
     HAS_MATRIX = True
     MATRIX_DIMS = [6, 22]  # 6 Rows, 22 Cols
+    HIDRAW_INTERFACE = 2
     METHODS = ['get_firmware', 'get_matrix_dims', 'has_matrix', 'get_device_name', 'get_device_type_keyboard', 'get_brightness', 'set_brightness', 'set_wave_effect', 'set_static_effect', 'set_spectrum_effect',
                'set_reactive_effect', 'set_none_effect', 'set_breath_random_effect', 'set_breath_single_effect', 'set_breath_dual_effect',
-               'set_custom_effect', 'set_key_row', 'enable_macro_keys', 'get_game_mode', 'set_game_mode', 'get_macro_mode', 'set_macro_mode',
+               'set_custom_effect', 'set_key_row', 'set_frame', 'enable_macro_keys', 'get_game_mode', 'set_game_mode', 'get_macro_mode', 'set_macro_mode',
                'get_macro_effect', 'set_macro_effect', 'get_macros', 'delete_macro', 'add_macro',
 
                'set_ripple_effect', 'set_ripple_effect_random_colour']
 
     def __init__(self, *args):
-        super(RazerBlackWidowChroma, self).__init__(*args)
+        super(RazerBlackWidowChromaX, self).__init__(*args)
+
+        # pylint: disable=import-outside-toplevel
+        from razer_daemon.misc.ripple_effect import RippleManager
 
         self.ripple_manager = RippleManager(self, self._device_number)
 
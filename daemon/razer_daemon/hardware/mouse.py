@@ -2,7 +2,6 @@
 Mouse class
 """
 from razer_daemon.hardware.device_base import RazerDeviceBrightnessSuspend
-from razer_daemon.misc.battery_notifier import BatteryManager
 
 
 class RazerMambaChromaWireless(RazerDeviceBrightnessSuspend):
@@ -15,12 +14,16 @@ class RazerMambaChromaWireless(RazerDeviceBrightnessSuspend):
     MATRIX_DIMS = [1, -1]  # 6 Rows, 22 Cols
     METHODS = ['get_firmware', 'get_matrix_dims', 'has_matrix', 'get_device_name', 'get_device_type_mouse', 'get_brightness', 'set_brightness', 'get_battery', 'is_charging', 'set_wave_effect',
                'set_static_effect', 'set_spectrum_effect', 'set_reactive_effect', 'set_none_effect', 'set_breath_random_effect',
-               'set_breath_single_effect', 'set_breath_dual_effect', 'set_custom_effect', 'set_key_row',
+               'set_breath_single_effect', 'set_breath_dual_effect', 'set_custom_effect', 'set_key_row', 'set_frame',
                'set_charge_effect', 'set_charge_colour', 'set_idle_time', 'set_low_battery_threshold', 'set_dpi_xy']
 
     def __init__(self, *args):
         super(RazerMambaChromaWireless, self).__init__(*args)
 
+        # Imported here as it pulls in notify2, so it only loads once a wireless mouse is present
+        # pylint: disable=import-outside-toplevel
+        from razer_daemon.misc.battery_notifier import BatteryManager
+
         self._battery_manager = BatteryManager(self, self._device_number, 'Razer Mamba')
 
     def _close(self):
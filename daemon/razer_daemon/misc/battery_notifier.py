@@ -1,120 +1,129 @@
 """
 This will do until I can be bothered to create indicator applet to do battery level
 """
+import asyncio
+import functools
 import logging
-import threading
-import datetime
-import time
 import notify2
 
+from razer_daemon.dbus_services.dbus_methods import get_battery
+from .scheduler import get_scheduler
+
 
 # TODO add python3-notify2 to dependencies
 # TODO https://askubuntu.com/questions/110969/notify-send-ignores-timeout
 INTERVAL_FREQ = 60 * 10
 NOTIFY_TIMEOUT = 4000
+# Notifications are not time critical, let the check line up with other jobs
+BATTERY_JITTER = 5 # Seconds
 
 
-class BatteryNotifier(threading.Thread):
+class BatteryNotifier(object):
     """
-    Thread to notify about battery
+    Scheduled job to notify about battery
     """
     def __init__(self, parent, device_id, device_name):
-        super(BatteryNotifier, self).__init__()
-
         notify2.init('razer_daemon')
 
         self._logger = logging.getLogger('razer.device{0}.batterynotifier'.format(device_id))
 
-        self._shutdown = False
         self._device_name = device_name
 
-        # Could save reference to parent but only need battery level function
-        self._get_battery_func = parent.getBattery
+        # A sleeping device can take a while to answer, so the level is read on the device's executor
+        self._executor = parent.get_method_executor()
+        self._get_battery_func = functools.partial(get_battery, parent)
 
         self._notification = notify2.Notification(summary="{0}")
         self._notification.set_timeout(NOTIFY_TIMEOUT)
 
-        self._last_notify_time = datetime.datetime(1970, 1, 1)
-
+        self._job = None
 
     @property
-    def shutdown(self):
+    def running(self):
         """
-        Get the shutdown flag
-        """
-        return self._shutdown
+        Notifier job scheduled
 
-    @shutdown.setter
-    def shutdown(self, value):
+        :return: Running
+        :rtype: bool
         """
-        Set the shutdown flag
+        return self._job is not None
 
-        :param value: Shutdown
-        :type value: bool
+    def start(self):
         """
-        self._shutdown = value
-
-    def notify_battery(self):
-        now = datetime.datetime.now()
-
-        if (now - self._last_notify_time).seconds > INTERVAL_FREQ:
-            # Update last notified
-            self._last_notify_time = now
-
-            battery_level = self._get_battery_func()
-
-            # Sometimes on wifi dont get batt
-            if battery_level == -1.0:
-                time.sleep(0.2)
-                battery_level = self._get_battery_func()
+        Notify straight away and then every INTERVAL_FREQ seconds
+        """
+        if self._job is None:
+            self._job = get_scheduler().call_every(INTERVAL_FREQ, self.notify_battery, name='battery {0}'.format(self._device_name), jitter=BATTERY_JITTER, delay=0)
 
-            if battery_level < 10.0:
-                self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level), message='Please charge your device', icon='notification-battery-low')
-            else:
-                self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level))
+    def close(self):
+        """
+        Stop notifying
+        """
+        if self._job is not None:
+            self._job.cancel()
+        self._job = None
 
-            self._notification.show()
+        self._logger.debug("Shutting down battery notifier")
 
+    def notify_battery(self):
+        """
+        Show a notification with the current battery level
+        """
+        # Missed requests are retried by the device's I/O policy
+        future = asyncio.get_event_loop().run_in_executor(self._executor, self._get_battery_func)
+        future.add_done_callback(self._battery_read)
 
-    def run(self):
+    def _battery_read(self, future):
         """
-        Main thread function
+        Show the notification once the battery level has been read
+
+        :param future: Battery level
+        :type future: asyncio.Future
         """
+        if self._job is None or future.cancelled():
+            return
 
-        while not self._shutdown:
-            self.notify_battery()
+        if future.exception() is not None:
+            self._logger.warning("Could not read battery level: %s", future.exception())
+            return
 
-            time.sleep(0.1)
+        battery_level = future.result()
 
+        # Sometimes on wifi dont get batt, even after retrying
+        if battery_level < 0:
+            self._logger.debug("Device did not answer with a battery level")
+            return
 
-        self._logger.debug("Shutting down battery notifier")
+        if battery_level < 10.0:
+            self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level), message='Please charge your device', icon='notification-battery-low')
+        else:
+            self._notification.update(summary="{0} Battery at {1:.1f}%".format(self._device_name, battery_level))
+
+        self._notification.show()
 
 class BatteryManager(object):
     """
     Class which manages the overall process of notifing battery levels
     """
     def __init__(self, parent, device_number, device_name):
-        self._logger = logging.getLogger('razer.device{0}.ripplemanager'.format(device_number))
+        self._logger = logging.getLogger('razer.device{0}.batterymanager'.format(device_number))
         self._parent = parent
 
-        self._battery_thread = BatteryNotifier(parent, device_number, device_name)
-        self._battery_thread.start()
+        self._battery_notifier = BatteryNotifier(parent, device_number, device_name)
+        self._battery_notifier.start()
 
         self._is_closed = False
 
 
     def close(self):
         """
-        Close the manager, stop ripple thread
+        Close the manager, stop battery notifier
         """
         if not self._is_closed:
             self._logger.debug("Closing Battery Manager")
             self._is_closed = True
 
-            self._battery_thread.shutdown = True
-            self._battery_thread.join(timeout=2)
-            if self._battery_thread.is_alive():
-                self._logger.error("Could not stop BatteryNotify thread")
+            self._battery_notifier.close()
 
     def __del__(self):
-        self.close()
\ No newline at end of file
+        self.close()
@@ -0,0 +1,125 @@
+"""
+Per device record of attributes which don't change while the device is plugged in
+
+Reading the firmware version or device name from the driver is a USB control transfer, so they are read once and
+served from memory. Attributes which fail to read are tried again the next time they are asked for.
+"""
+import logging
+
+# Attribute name to driver file
+DEVICE_ATTRIBUTE_FILES = {
+    'serial': 'get_serial',
+    'firmware_version': 'get_firmware_version',
+    'device_name': 'device_type',
+}
+# The serial is the device's identity, it names the DBus object and the checkpoint entry
+REFRESHABLE_ATTRIBUTES = ('firmware_version', 'device_name')
+
+
+class DeviceAttributes(object):
+    """
+    Immutable device attributes read once from the driver
+
+    read_func reads a driver file and returns its contents, the serial can be passed in if it was already probed
+    """
+    def __init__(self, read_func, serial=None):
+        self._logger = logging.getLogger('razer.attributes')
+
+        self._read_func = read_func
+        self._values = {}
+
+        if serial:
+            self._values['serial'] = serial
+
+        for name in sorted(DEVICE_ATTRIBUTE_FILES):
+            if name in self._values:
+                continue
+            try:
+                self._read(name)
+            except OSError as err:
+                self._logger.warning("Could not read %s: %s", name, err)
+
+    def _read(self, name):
+        """
+        Read an attribute from the driver and store it
+
+        :param name: Attribute name
+        :type name: str
+
+        :return: Value
+        :rtype: str
+
+        :raises OSError: If the driver file can't be read
+        """
+        value = self._read_func(DEVICE_ATTRIBUTE_FILES[name]).strip()
+        self._values[name] = value
+        return value
+
+    def get(self, name):
+        """
+        Get an attribute
+
+        :param name: Attribute name
+        :type name: str
+
+        :return: Value
+        :rtype: str
+
+        :raises KeyError: If the attribute is unknown
+        :raises OSError: If the attribute wasn't read before and can't be read now
+        """
+        if name not in DEVICE_ATTRIBUTE_FILES:
+            raise KeyError("Unknown device attribute {0}".format(name))
+
+        try:
+            return self._values[name]
+        except KeyError:
+            return self._read(name)
+
+    def refresh(self, name):
+        """
+        Read an attribute from the driver again, like the firmware version after an update
+
+        :param name: Attribute name
+        :type name: str
+
+        :return: New value
+        :rtype: str
+
+        :raises ValueError: If the attribute can't be refreshed
+        :raises OSError: If the driver file can't be read
+        """
+        if name not in REFRESHABLE_ATTRIBUTES:
+            raise ValueError("Device attribute {0} can't be refreshed".format(name))
+
+        return self._read(name)
+
+    @property
+    def serial(self):
+        """
+        Serial number
+
+        :return: Serial
+        :rtype: str
+        """
+        return self.get('serial')
+
+    @property
+    def firmware_version(self):
+        """
+        Firmware version
+
+        :return: Version like v1.0
+        :rtype: str
+        """
+        return self.get('firmware_version')
+
+    @property
+    def device_name(self):
+        """
+        Descriptive device name
+
+        :return: Name like 'BlackWidow Ultimate 2013'
+        :rtype: str
+        """
+        return self.get('device_name')
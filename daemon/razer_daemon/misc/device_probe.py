@@ -0,0 +1,136 @@
+"""
+Probes devices for their serial in a thread pool
+
+Wireless devices can take a few attempts before they answer, so probing is done off the main loop with a deadline
+per device. Each finished probe is handed to a callback so responsive devices can be published straight away.
+"""
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+PROBE_WORKERS = 4
+PROBE_DEADLINE = 5.0 # Seconds
+PROBE_INITIAL_BACKOFF = 0.05 # Seconds
+PROBE_MAX_BACKOFF = 1.0 # Seconds
+
+
+def read_serial(device_path):
+    """
+    Read the serial from the driver
+
+    :param device_path: Path to the HID device in sysfs
+    :type device_path: str
+
+    :return: Serial, can be empty if the device didnt respond
+    :rtype: str
+    """
+    with open(os.path.join(device_path, 'get_serial'), 'r') as serial_file:
+        return serial_file.read().strip()
+
+
+class DeviceProber(object):
+    """
+    Bounded thread pool which reads device serials with retries and exponential backoff
+    """
+    def __init__(self, max_workers=PROBE_WORKERS, deadline=PROBE_DEADLINE, initial_backoff=PROBE_INITIAL_BACKOFF, max_backoff=PROBE_MAX_BACKOFF, read_func=read_serial):
+        self._logger = logging.getLogger('razer.prober')
+
+        self._deadline = deadline
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._read_func = read_func
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._shutdown = threading.Event()
+
+    def probe(self, device_id, device_path, callback):
+        """
+        Queue a device to be probed
+
+        The callback is called from a worker thread as callback(device_id, serial), serial is None if the device
+        didnt answer before its deadline.
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param device_path: Path to the HID device in sysfs
+        :type device_path: str
+
+        :param callback: Completion callback
+        :type callback: callable
+
+        :return: Future of the probe
+        :rtype: concurrent.futures.Future
+        """
+        return self._executor.submit(self._run_probe, device_id, device_path, callback)
+
+    def _run_probe(self, device_id, device_path, callback):
+        """
+        Worker function
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param device_path: Path to the HID device in sysfs
+        :type device_path: str
+
+        :param callback: Completion callback
+        :type callback: callable
+        """
+        start_time = time.monotonic()
+        serial = self.probe_serial(device_id, device_path)
+        self._logger.debug("Probed %s in %.3fs", device_id, time.monotonic() - start_time)
+
+        if not self._shutdown.is_set():
+            callback(device_id, serial)
+
+    def probe_serial(self, device_id, device_path):
+        """
+        Read the serial, retrying with exponential backoff until the deadline
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param device_path: Path to the HID device in sysfs
+        :type device_path: str
+
+        :return: Serial or None
+        :rtype: str or None
+        """
+        deadline = time.monotonic() + self._deadline
+        backoff = self._initial_backoff
+        attempt = 0
+
+        while not self._shutdown.is_set():
+            attempt += 1
+            try:
+                serial = self._read_func(device_path)
+                if len(serial) > 0:
+                    return serial
+            except FileNotFoundError:
+                # Unplugged whilst probing
+                return None
+            except OSError as err:
+                self._logger.debug("Attempt %d to read serial of %s failed: %s", attempt, device_id, err)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # Sleeps on the event so close() interrupts it
+            self._shutdown.wait(min(backoff, remaining))
+            backoff = min(backoff * 2, self._max_backoff)
+        else:
+            return None
+
+        self._logger.warning("Could not get serial for device %s after %d attempts", device_id, attempt)
+        return None
+
+    def close(self):
+        """
+        Stop probing, outstanding probes will not call their callbacks
+        """
+        self._shutdown.set()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,255 @@
+"""
+Per device writer thread
+
+Driver writes are USB transfers, doing them on the main loop blocks every other device and DBus call while they run.
+Writes are queued and done by a thread per device instead. A write to an attribute which still has a write pending
+replaces it, so dragging a slider only sends the newest value, and moves it behind the other pending writes so the
+device ends up in the order the calls were made.
+
+Writes can also be held back for a batch of calls, so each attribute the batch sets is written once.
+"""
+import collections
+import contextlib
+import logging
+import threading
+
+WRITE_TIMEOUT = 5.0 # Seconds
+
+
+class PendingWrite(object):
+    """
+    Queued write, shared by every call it was coalesced from
+    """
+    def __init__(self, driver_filename, payload):
+        self.driver_filename = driver_filename
+        self.payload = payload
+        self.error = None
+        self.done = threading.Event()
+
+
+class DeviceWriter(threading.Thread):
+    """
+    Thread writing a device's driver files in order, coalescing pending writes to the same attribute
+
+    write_func writes a payload to a driver file
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, write_func, device_number):
+        super(DeviceWriter, self).__init__(name='device{0} writer'.format(device_number))
+        self._logger = logging.getLogger('razer.device{0}.writer'.format(device_number))
+        self.daemon = True
+
+        self._write_func = write_func
+        self._condition = threading.Condition()
+        self._pending = collections.OrderedDict()
+        self._in_flight = None
+        self._shutdown = False
+        # Thread holding back writes, see hold
+        self._holder = None
+
+        self._queued = 0
+        self._written = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+
+    def write(self, driver_filename, payload, coalesce_key=None, wait=False):
+        """
+        Queue a write
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param payload: Data
+        :type payload: bytes
+
+        :param coalesce_key: Writes with the same key replace each other, defaults to the filename
+        :type coalesce_key: object
+
+        :param wait: Return once the write is done, raising its error if it failed
+        :type wait: bool
+
+        :raises OSError: If the writer is closed, or when waiting, the write failed
+        """
+        if coalesce_key is None:
+            coalesce_key = driver_filename
+
+        with self._condition:
+            if self._shutdown:
+                raise OSError("Writer is closed")
+            if wait:
+                self._end_own_hold()
+
+            self._queued += 1
+            pending = self._pending.get(coalesce_key)
+            if pending is not None:
+                pending.payload = payload
+                self._pending.move_to_end(coalesce_key)
+                self._coalesced += 1
+            else:
+                pending = PendingWrite(driver_filename, payload)
+                self._pending[coalesce_key] = pending
+                self._max_queue_depth = max(self._max_queue_depth, len(self._pending))
+
+            self._condition.notify_all()
+
+        if wait:
+            if not pending.done.wait(WRITE_TIMEOUT):
+                raise TimeoutError("Write to {0} timed out".format(driver_filename))
+            if pending.error is not None:
+                raise pending.error
+
+    @contextlib.contextmanager
+    def hold(self):
+        """
+        Hold back writes until the end of the block
+
+        Writes queued in the block are coalesced like any other, so each attribute gets one write of its newest value
+        once the block ends. If the thread holding the writes waits for one, by writing with wait or reading an
+        attribute with a pending write, the hold ends early as it would be waiting on itself.
+        """
+        with self._condition:
+            # When already held the outer block releases them
+            is_holder = self._holder is None
+            if is_holder:
+                self._holder = threading.get_ident()
+
+        try:
+            yield
+        finally:
+            if is_holder:
+                with self._condition:
+                    self._end_own_hold()
+
+    def _end_own_hold(self):
+        """
+        Release held writes if the calling thread holds them, call with the condition held
+        """
+        if self._holder == threading.get_ident():
+            self._holder = None
+            self._condition.notify_all()
+
+    def _is_pending(self, driver_filename):
+        """
+        Check for unfinished writes to a file, call with the condition held
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: True if there are any
+        :rtype: bool
+        """
+        if self._in_flight is not None and self._in_flight.driver_filename == driver_filename:
+            return True
+        return any(pending.driver_filename == driver_filename for pending in self._pending.values())
+
+    def has_pending(self, driver_filename):
+        """
+        Check for unfinished writes to a file
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: True if there are any
+        :rtype: bool
+        """
+        with self._condition:
+            return self._is_pending(driver_filename)
+
+    def wait_for(self, driver_filename, timeout=WRITE_TIMEOUT):
+        """
+        Wait for the writes to a file to finish, so reading it returns what was written
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param timeout: Seconds
+        :type timeout: float
+
+        :return: True if the writes finished in time
+        :rtype: bool
+        """
+        with self._condition:
+            self._end_own_hold()
+            return self._condition.wait_for(lambda: not self._is_pending(driver_filename), timeout)
+
+    def flush(self, timeout=WRITE_TIMEOUT):
+        """
+        Wait for every queued write to finish
+
+        :param timeout: Seconds
+        :type timeout: float
+
+        :return: True if the queue emptied in time
+        :rtype: bool
+        """
+        with self._condition:
+            self._end_own_hold()
+            return self._condition.wait_for(lambda: not self._pending and self._in_flight is None, timeout)
+
+    def stats(self):
+        """
+        Get the queue counters
+
+        :return: Stats
+        :rtype: dict
+        """
+        with self._condition:
+            return {
+                'queue_depth': len(self._pending),
+                'max_queue_depth': self._max_queue_depth,
+                'queued': self._queued,
+                'written': self._written,
+                'coalesced': self._coalesced,
+                'failed': self._failed,
+            }
+
+    def run(self):
+        """
+        Write until closed and drained
+        """
+        while True:
+            with self._condition:
+                while (not self._pending or self._holder is not None) and not self._shutdown:
+                    self._condition.wait()
+
+                if not self._pending:
+                    break
+
+                _, pending = self._pending.popitem(last=False)
+                self._in_flight = pending
+
+            try:
+                self._write_func(pending.driver_filename, pending.payload)
+            except OSError as err:
+                self._logger.warning("Failed to write %s: %s", pending.driver_filename, err)
+                pending.error = err
+            # A bug in a backend mustnt stop the thread, waiters and the frame pacer would be stuck on the write
+            except Exception as err: # pylint: disable=broad-except
+                self._logger.error("Failed to write %s", pending.driver_filename, exc_info=err)
+                pending.error = err
+            finally:
+                with self._condition:
+                    self._in_flight = None
+                    if pending.error is None:
+                        self._written += 1
+                    else:
+                        self._failed += 1
+                    pending.done.set()
+                    self._condition.notify_all()
+
+    def close(self, timeout=WRITE_TIMEOUT):
+        """
+        Stop accepting writes, finish the queued ones and stop the thread
+
+        :param timeout: Seconds to wait for the queue to drain
+        :type timeout: float
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+
+        if self.is_alive():
+            self.join(timeout)
+            if self.is_alive():
+                self._logger.warning("Writer did not finish within %.1fs", timeout)
@@ -0,0 +1,344 @@
+"""
+Driver backends
+
+A device's driver attributes are read and written through a backend it owns. The sysfs backend is the driver file
+cache and the hidraw backend sends reports itself, the fake backend keeps attributes in memory with a set latency so
+the daemon can be run and benchmarked without hardware, and the recording backend wraps another to log every call.
+
+Attributes have a type which converts between Python values and what the driver takes and shows.
+"""
+import collections
+import errno
+import threading
+import time
+
+
+AttributeType = collections.namedtuple('AttributeType', ['encode', 'decode'])
+
+
+def _encode_str(value):
+    if isinstance(value, str):
+        return value.encode()
+    return bytes(value)
+
+
+def _decode_str(payload):
+    return payload.decode().strip()
+
+
+def _encode_int(value):
+    return str(int(value)).encode()
+
+
+def _decode_int(payload):
+    return int(payload.strip())
+
+
+def _encode_bool(value):
+    return b'1' if value else b'0'
+
+
+def _decode_bool(payload):
+    return payload.strip() == b'1'
+
+
+def _encode_trigger(value=True):
+    # pylint: disable=unused-argument
+    return b'1'
+
+
+# Text
+STR = AttributeType(_encode_str, _decode_str)
+# ASCII number
+INT = AttributeType(_encode_int, _decode_int)
+# 1 or 0
+BOOL = AttributeType(_encode_bool, _decode_bool)
+# Bytes as is, like RGB values
+RAW = AttributeType(bytes, bytes)
+# Anything written activates it, reads as a number
+TRIGGER = AttributeType(_encode_trigger, _decode_int)
+
+ATTRIBUTE_TYPES = {
+    # All devices
+    'device_type': STR,
+    'get_serial': STR,
+    'get_firmware_version': STR,
+    # Keyboards
+    'set_brightness': INT,
+    'mode_game': BOOL,
+    'mode_macro': BOOL,
+    'mode_macro_effect': INT,
+    'macro_keys': TRIGGER,
+    'mode_wave': INT,
+    'mode_static': RAW,
+    'mode_spectrum': TRIGGER,
+    'mode_none': TRIGGER,
+    'mode_reactive': RAW,
+    'mode_breath': RAW,
+    'mode_custom': TRIGGER,
+    'mode_pulsate': TRIGGER,
+    'temp_clear_row': INT,
+    'set_key_row': RAW,
+    # Mice
+    'get_battery': INT,
+    'is_charging': BOOL,
+    'set_idle_time': INT,
+    'set_charging_effect': RAW,
+    'set_charging_colour': RAW,
+    'set_mouse_dpi': RAW,
+}
+
+
+def attribute_type(driver_filename):
+    """
+    Get the type of a driver attribute, unknown attributes are text
+
+    :param driver_filename: Name of driver file
+    :type driver_filename: str
+
+    :return: Type
+    :rtype: AttributeType
+    """
+    return ATTRIBUTE_TYPES.get(driver_filename, STR)
+
+
+def encode_attribute(driver_filename, value):
+    """
+    Convert a value to what the driver attribute takes
+
+    :param driver_filename: Name of driver file
+    :type driver_filename: str
+
+    :param value: Value
+    :type value: object
+
+    :return: Payload
+    :rtype: bytes
+    """
+    return attribute_type(driver_filename).encode(value)
+
+
+def decode_attribute(driver_filename, payload):
+    """
+    Convert what a driver attribute shows to a value
+
+    :param driver_filename: Name of driver file
+    :type driver_filename: str
+
+    :param payload: File contents
+    :type payload: bytes
+
+    :return: Value
+    :rtype: object
+
+    :raises ValueError: If the contents are not of the attribute's type
+    """
+    return attribute_type(driver_filename).decode(payload)
+
+
+class DriverBackend(object):
+    """
+    Reads and writes a device's driver attributes
+    """
+    @property
+    def open_files(self):
+        """
+        Number of open file descriptors
+
+        :return: Count
+        :rtype: int
+        """
+        return 0
+
+    def read(self, driver_filename):
+        """
+        Read a driver attribute
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: File contents
+        :rtype: bytes
+
+        :raises OSError: If the read fails
+        """
+        raise NotImplementedError()
+
+    def write(self, driver_filename, payload):
+        """
+        Write a driver attribute
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param payload: Data
+        :type payload: bytes
+
+        :return: Number of bytes written
+        :rtype: int
+
+        :raises OSError: If the write fails
+        """
+        raise NotImplementedError()
+
+    def read_attribute(self, driver_filename):
+        """
+        Read a driver attribute as its type
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: Value
+        :rtype: object
+        """
+        return decode_attribute(driver_filename, self.read(driver_filename))
+
+    def write_attribute(self, driver_filename, value):
+        """
+        Write a value to a driver attribute
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param value: Value
+        :type value: object
+
+        :return: Number of bytes written
+        :rtype: int
+        """
+        return self.write(driver_filename, encode_attribute(driver_filename, value))
+
+    def close(self):
+        """
+        Release any resources, further reads and writes may fail
+        """
+        pass
+
+
+class FakeBackend(DriverBackend):
+    """
+    Driver attributes kept in memory
+
+    Reads show what was last written, or what the attribute was seeded with. Reading an attribute which was never
+    written fails like a missing driver file.
+    """
+    def __init__(self, files=None, read_latency=0.0, write_latency=0.0):
+        self.files = {driver_filename: encode_attribute(driver_filename, value) if not isinstance(value, bytes) else value
+                      for driver_filename, value in (files or {}).items()}
+        self.read_latency = read_latency
+        self.write_latency = write_latency
+        # Driver filename to the OSError its reads and writes raise
+        self.errors = {}
+
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def _check_error(self, driver_filename):
+        """
+        Raise the error set for an attribute
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :raises OSError: If one is set
+        """
+        error = self.errors.get(driver_filename)
+        if error is not None:
+            raise error
+
+    def read(self, driver_filename):
+        if self.read_latency > 0:
+            time.sleep(self.read_latency)
+        self._check_error(driver_filename)
+
+        with self._lock:
+            self.reads += 1
+            try:
+                return self.files[driver_filename]
+            except KeyError:
+                raise FileNotFoundError(errno.ENOENT, "No such driver file", driver_filename)
+
+    def write(self, driver_filename, payload):
+        if self.write_latency > 0:
+            time.sleep(self.write_latency)
+        self._check_error(driver_filename)
+
+        with self._lock:
+            self.writes += 1
+            self.files[driver_filename] = bytes(payload)
+        return len(payload)
+
+
+DriverCall = collections.namedtuple('DriverCall', ['operation', 'driver_filename', 'payload', 'timestamp', 'latency', 'error'])
+
+
+class RecordingBackend(DriverBackend):
+    """
+    Wraps a backend and records every read and write
+
+    Calls are kept as DriverCall tuples of read or write, the driver filename, the payload written or read, the
+    monotonic time the call started, how long it took and the error if it failed. The listener is also called with
+    each, from whichever thread made the call.
+    """
+    def __init__(self, backend, max_calls=None, clock=time.monotonic, listener=None):
+        self.backend = backend
+        self.calls = collections.deque(maxlen=max_calls)
+        self._clock = clock
+        self._listener = listener
+
+    @property
+    def open_files(self):
+        return self.backend.open_files
+
+    def _record(self, operation, driver_filename, func, payload=None):
+        """
+        Call the wrapped backend and record it
+
+        :param operation: read or write
+        :type operation: str
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param func: Wrapped backend's read or write
+        :type func: callable
+
+        :param payload: Data written
+        :type payload: bytes or None
+
+        :return: Result of the call
+        :rtype: object
+        """
+        start_time = self._clock()
+        try:
+            if operation == 'write':
+                result = func(driver_filename, payload)
+            else:
+                result = payload = func(driver_filename)
+        except OSError as err:
+            self._add_call(DriverCall(operation, driver_filename, payload, start_time, self._clock() - start_time, str(err)))
+            raise
+
+        self._add_call(DriverCall(operation, driver_filename, bytes(payload), start_time, self._clock() - start_time, None))
+        return result
+
+    def _add_call(self, call):
+        """
+        Keep a call and pass it to the listener
+
+        :param call: Call
+        :type call: DriverCall
+        """
+        self.calls.append(call)
+        if self._listener is not None:
+            self._listener(call)
+
+    def read(self, driver_filename):
+        return self._record('read', driver_filename, self.backend.read)
+
+    def write(self, driver_filename, payload):
+        return self._record('write', driver_filename, self.backend.write, payload)
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,143 @@
+"""
+Driver file descriptor cache
+
+Opening a sysfs attribute costs a path lookup and several syscalls, which adds up when custom frames are written many
+times a second. The files are opened once and kept open, writes are done with pwrite and reads with pread at offset 0
+so the driver's store and show functions are called as if the file had just been opened.
+"""
+import logging
+import os
+import threading
+
+from .driver_backend import DriverBackend
+
+# Sysfs attributes never return more than a page
+DRIVER_READ_SIZE = 4096
+
+
+class DriverFileCache(DriverBackend):
+    """
+    Open file descriptors of a device's driver files, the sysfs backend
+
+    Readable and writable attributes get separate descriptors, as write only attributes can't be opened for reading.
+    """
+    def __init__(self, device_path):
+        self._logger = logging.getLogger('razer.driverfiles')
+
+        self._device_path = device_path
+        self._fds = {}
+        self._lock = threading.Lock()
+        self._is_closed = False
+
+    @property
+    def open_files(self):
+        """
+        Number of open file descriptors
+
+        :return: Count
+        :rtype: int
+        """
+        return len(self._fds)
+
+    def _get_fd(self, driver_filename, flags):
+        """
+        Get a file descriptor, opening the file if needed
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param flags: os.O_RDONLY or os.O_WRONLY
+        :type flags: int
+
+        :return: File descriptor
+        :rtype: int
+
+        :raises OSError: If the file can't be opened or the cache is closed
+        """
+        key = (driver_filename, flags)
+        try:
+            return self._fds[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if self._is_closed:
+                raise OSError("Driver files of {0} are closed".format(self._device_path))
+
+            if key not in self._fds:
+                self._fds[key] = os.open(os.path.join(self._device_path, driver_filename), flags | os.O_CLOEXEC)
+            return self._fds[key]
+
+    def _invalidate(self, driver_filename, flags):
+        """
+        Close a file descriptor which failed, it is reopened on next use
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param flags: os.O_RDONLY or os.O_WRONLY
+        :type flags: int
+        """
+        with self._lock:
+            fd = self._fds.pop((driver_filename, flags), None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def read(self, driver_filename):
+        """
+        Read a driver file
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: File contents
+        :rtype: bytes
+
+        :raises OSError: If the read fails
+        """
+        fd = self._get_fd(driver_filename, os.O_RDONLY)
+        try:
+            return os.pread(fd, DRIVER_READ_SIZE, 0)
+        except OSError:
+            self._invalidate(driver_filename, os.O_RDONLY)
+            raise
+
+    def write(self, driver_filename, payload):
+        """
+        Write to a driver file
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param payload: Data
+        :type payload: bytes
+
+        :return: Number of bytes written
+        :rtype: int
+
+        :raises OSError: If the write fails
+        """
+        fd = self._get_fd(driver_filename, os.O_WRONLY)
+        try:
+            return os.pwrite(fd, payload, 0)
+        except OSError:
+            self._invalidate(driver_filename, os.O_WRONLY)
+            raise
+
+    def close(self):
+        """
+        Close all file descriptors, any further reads or writes fail
+        """
+        with self._lock:
+            self._is_closed = True
+            fds = list(self._fds.values())
+            self._fds.clear()
+
+        for fd in fds:
+            try:
+                os.close(fd)
+            except OSError as err:
+                self._logger.debug("Could not close driver file of %s: %s", self._device_path, err)
@@ -0,0 +1,275 @@
+"""
+Driver I/O traces
+
+Every driver read and write of the devices can be recorded to a binary trace, then replayed against fake backends to
+reproduce lag and flicker reports or benchmark the write path with real workloads.
+
+A trace starts with the magic and version, followed by records which each start with their type byte. Serials and
+attribute names are written once as string records and referred to by ID after that.
+
+    string  type, ID, length, UTF-8 bytes
+    call    type, flags (write, failed), serial ID, attribute ID, monotonic timestamp, latency, payload length, payload
+"""
+import collections
+import logging
+import struct
+import threading
+import time
+
+from .driver_backend import FakeBackend
+
+MAGIC = b'RZTRACE\x00'
+VERSION = 1
+
+RECORD_STRING = 0
+RECORD_CALL = 1
+
+FLAG_WRITE = 0x01
+FLAG_FAILED = 0x02
+
+_HEADER = struct.Struct('<8sH')
+_STRING = struct.Struct('<HH')
+_CALL = struct.Struct('<BHHdfI')
+
+TraceRecord = collections.namedtuple('TraceRecord', ['serial', 'operation', 'driver_filename', 'payload', 'timestamp', 'latency', 'failed'])
+
+
+class TruncatedTraceError(ValueError):
+    """
+    Raised when a trace ends part way through a record
+    """
+    pass
+
+
+_trace_writers = {}
+_trace_writers_lock = threading.Lock()
+
+
+class TraceWriter(object):
+    """
+    Writes driver calls of any number of devices to a trace file
+    """
+    def __init__(self, path):
+        self._logger = logging.getLogger('razer.trace')
+
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION))
+        self._strings = {}
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def _string_id(self, value):
+        """
+        Get the ID of a string, writing it the first time
+
+        :param value: String
+        :type value: str
+
+        :return: ID
+        :rtype: int
+        """
+        try:
+            return self._strings[value]
+        except KeyError:
+            string_id = self._strings[value] = len(self._strings)
+            encoded = value.encode()
+            self._file.write(bytes([RECORD_STRING]) + _STRING.pack(string_id, len(encoded)) + encoded)
+            return string_id
+
+    def record(self, serial, call):
+        """
+        Write a call, can be called from any thread
+
+        :param serial: Device serial
+        :type serial: str
+
+        :param call: Call
+        :type call: razer_daemon.misc.driver_backend.DriverCall
+        """
+        flags = (FLAG_WRITE if call.operation == 'write' else 0) | (FLAG_FAILED if call.error is not None else 0)
+        payload = call.payload or b''
+
+        with self._lock:
+            if self._file.closed:
+                return
+            try:
+                header = _CALL.pack(flags, self._string_id(serial), self._string_id(call.driver_filename), call.timestamp, call.latency, len(payload))
+                self._file.write(bytes([RECORD_CALL]) + header + payload)
+            except OSError as err:
+                # Runs within the driver call, a full disk must not look like a failing device
+                self._logger.error("Failed to write the trace %s, stopped tracing after %d driver calls: %s", self._file.name, self.records, err)
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                return
+            self.records += 1
+
+    def close(self):
+        """
+        Flush and close the trace
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                self._logger.info("Wrote %d driver calls to %s", self.records, self._file.name)
+
+
+def get_trace_writer(path):
+    """
+    Get the trace writer of a file, the devices tracing to the same file share one
+
+    :param path: Trace file
+    :type path: str
+
+    :return: Writer
+    :rtype: TraceWriter
+    """
+    with _trace_writers_lock:
+        if path not in _trace_writers:
+            _trace_writers[path] = TraceWriter(path)
+        return _trace_writers[path]
+
+
+def close_trace_writers():
+    """
+    Close every trace writer
+    """
+    with _trace_writers_lock:
+        for writer in _trace_writers.values():
+            writer.close()
+        _trace_writers.clear()
+
+
+def _read_exact(trace_file, length):
+    """
+    Read exactly length bytes
+
+    :param trace_file: Trace
+    :type trace_file: io.BufferedReader
+
+    :param length: Number of bytes
+    :type length: int
+
+    :return: Data
+    :rtype: bytes
+
+    :raises TruncatedTraceError: If the trace ends early
+    """
+    data = trace_file.read(length)
+    if len(data) != length:
+        raise TruncatedTraceError("Trace is truncated")
+    return data
+
+
+def read_trace(path):
+    """
+    Read the calls of a trace
+
+    :param path: Trace file
+    :type path: str
+
+    :return: Calls in the order they were recorded
+    :rtype: generator of TraceRecord
+
+    :raises ValueError: If the file is not a trace
+    """
+    with open(path, 'rb') as trace_file:
+        magic, version = _HEADER.unpack(_read_exact(trace_file, _HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{0} is not a version {1} driver trace".format(path, VERSION))
+
+        strings = {}
+        while True:
+            record_type = trace_file.read(1)
+            if len(record_type) == 0:
+                return
+
+            try:
+                if record_type[0] == RECORD_STRING:
+                    string_id, length = _STRING.unpack(_read_exact(trace_file, _STRING.size))
+                    strings[string_id] = _read_exact(trace_file, length).decode()
+                    continue
+
+                if record_type[0] != RECORD_CALL:
+                    raise ValueError("Unknown trace record type {0}".format(record_type[0]))
+
+                flags, serial_id, attribute_id, timestamp, latency, length = _CALL.unpack(_read_exact(trace_file, _CALL.size))
+                record = TraceRecord(strings[serial_id], 'write' if flags & FLAG_WRITE else 'read', strings[attribute_id],
+                                     _read_exact(trace_file, length), timestamp, latency, bool(flags & FLAG_FAILED))
+            except TruncatedTraceError:
+                # The daemon didnt get to flush the trace, the calls before the cut are still good
+                return
+
+            yield record
+
+
+def replay_trace(records, speed=1.0, backend_factory=FakeBackend, clock=time.monotonic, sleep=time.sleep):
+    """
+    Replay calls against a backend per serial
+
+    Reads are seeded with the payload that was read so they see the same contents, failed calls are skipped.
+
+    :param records: Calls
+    :type records: iterable of TraceRecord
+
+    :param speed: 1 for the recorded pace, 2 twice as fast and so on, 0 as fast as possible
+    :type speed: float
+
+    :param backend_factory: Makes the backend of a serial, called with no arguments
+    :type backend_factory: callable
+
+    :param clock: Monotonic clock
+    :type clock: callable
+
+    :param sleep: Sleep function
+    :type sleep: callable
+
+    :return: Stats per attribute with the count, total time and max time of the replayed calls, and how far behind
+             the recorded pace the replay fell at most
+    :rtype: dict
+    """
+    backends = {}
+    stats = collections.defaultdict(lambda: {'calls': 0, 'total_time': 0.0, 'max_time': 0.0})
+    max_lag = 0.0
+    start_time = clock()
+    first_timestamp = None
+
+    for record in records:
+        if record.failed:
+            continue
+
+        if first_timestamp is None:
+            first_timestamp = record.timestamp
+        if speed > 0:
+            due = start_time + (record.timestamp - first_timestamp) / speed
+            now = clock()
+            if due > now:
+                sleep(due - now)
+            else:
+                max_lag = max(max_lag, now - due)
+
+        if record.serial not in backends:
+            backends[record.serial] = backend_factory()
+        backend = backends[record.serial]
+
+        call_start = clock()
+        if record.operation == 'write':
+            backend.write(record.driver_filename, record.payload)
+        else:
+            if isinstance(backend, FakeBackend):
+                backend.files[record.driver_filename] = record.payload
+            backend.read(record.driver_filename)
+        call_time = clock() - call_start
+
+        attribute_stats = stats[record.driver_filename]
+        attribute_stats['calls'] += 1
+        attribute_stats['total_time'] += call_time
+        attribute_stats['max_time'] = max(attribute_stats['max_time'], call_time)
+
+    return {
+        'attributes': dict(stats),
+        'serials': sorted(backends),
+        'duration': clock() - start_time,
+        'max_lag': max_lag,
+    }
@@ -0,0 +1,138 @@
+"""
+Fake device speaking the Razer report protocol
+
+Stands in for a HidrawTransport so the hidraw backend can be tested, and benchmarked, without hardware. Every report is
+length and CRC checked and recorded, and the lighting state it sets is kept like the keyboard would.
+"""
+import threading
+
+from . import razer_report
+
+
+class FakeReportDevice(object):
+    """
+    Fake chroma keyboard at the report level
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, serial='XX0000000000', firmware_version=(1, 0), brightness=255):
+        self.lock = threading.RLock()
+
+        self.serial = serial
+        self.firmware_version = firmware_version
+        self.brightness = brightness
+        self.effect = None
+        self.rows = {}
+
+        # (send or request, RazerReport) for every valid report
+        self.transactions = []
+        self.bad_reports = 0
+        self.is_closed = False
+
+    def _receive(self, kind, report):
+        """
+        Check and record a report
+
+        :param kind: send or request
+        :type kind: str
+
+        :param report: Report
+        :type report: bytes
+
+        :return: Report fields
+        :rtype: razer_report.RazerReport
+
+        :raises razer_report.ReportError: If the report is the wrong length or its CRC is wrong
+        """
+        try:
+            fields = razer_report.parse_report(report)
+            if fields.crc != razer_report.calculate_crc(report):
+                raise razer_report.ReportError("Bad CRC {0:02x}, expected {1:02x}".format(fields.crc, razer_report.calculate_crc(report)))
+        except razer_report.ReportError:
+            self.bad_reports += 1
+            raise
+
+        self.transactions.append((kind, fields))
+        return fields
+
+    def _apply(self, fields):
+        """
+        Change the lighting state like the keyboard would
+
+        :param fields: Report fields
+        :type fields: razer_report.RazerReport
+        """
+        command = (fields.command_class, fields.command_id)
+        arguments = fields.arguments
+
+        if command == (0x03, 0x03):
+            self.brightness = arguments[2]
+        elif command == (0x03, 0x0B):
+            row_length = arguments[3] + 1
+            self.rows[arguments[1]] = arguments[4:4 + row_length * 3]
+        elif command == (0x03, 0x0A):
+            effect_id = arguments[0]
+            if effect_id == 0x08:
+                self.rows.pop(arguments[1], None)
+            else:
+                self.effect = (effect_id, arguments[1:fields.data_size])
+
+    def _answer(self, fields):
+        """
+        Build the response to a request
+
+        :param fields: Request fields
+        :type fields: razer_report.RazerReport
+
+        :return: Response report
+        :rtype: bytes
+        """
+        command = (fields.command_class, fields.command_id)
+
+        if command == (0x00, 0x82):
+            arguments = self.serial.encode()
+        elif command == (0x00, 0x81):
+            arguments = bytes(self.firmware_version)
+        elif command == (0x03, 0x83):
+            arguments = bytes([fields.arguments[0], fields.arguments[1], self.brightness])
+        else:
+            arguments = b''
+
+        response = bytearray(razer_report.build_report(fields.command_class, fields.command_id, fields.data_size, arguments, fields.transaction_id))
+        response[0] = razer_report.STATUS_SUCCESSFUL if arguments else razer_report.STATUS_NOT_SUPPORTED
+        return bytes(response)
+
+    def send(self, report):
+        """
+        Receive a report
+
+        :param report: Report
+        :type report: bytes
+
+        :raises razer_report.ReportError: If the report is invalid
+        """
+        with self.lock:
+            self._apply(self._receive('send', report))
+
+    def request(self, report):
+        """
+        Receive a report and answer it
+
+        :param report: Request report
+        :type report: bytes
+
+        :return: Response report
+        :rtype: bytes
+
+        :raises razer_report.ReportError: If the report is invalid or not a request the keyboard answers
+        """
+        with self.lock:
+            response = self._answer(self._receive('request', report))
+
+        razer_report.check_response(report, response)
+        return response
+
+    def close(self):
+        """
+        Close the fake device
+        """
+        self.is_closed = True
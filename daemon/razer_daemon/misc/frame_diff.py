@@ -0,0 +1,103 @@
+"""
+Custom frame diffing
+
+The driver sends one USB report per row written to set_key_row, and clients send every row of every frame even when
+a single key changed. The last frame sent to the device is kept so only the rows which changed are written, and
+frames which change nothing are not written at all.
+"""
+
+
+class FrameDiff(object):
+    """
+    Last custom frame sent to a device
+
+    Anything else shown on the matrix, like a hardware effect, makes the device's frame unknown so the next frame is
+    sent whole. row_length is the bytes per row including the row ID, None if the device's row length is unknown.
+    """
+    def __init__(self, row_length=None):
+        self._row_length = row_length
+        self._rows = {}
+        self._last_payload = None
+        # Rows were written since mode_custom was last written
+        self._custom_pending = True
+
+    @staticmethod
+    def row_length_for(matrix_dims):
+        """
+        Get the set_key_row row length of a matrix
+
+        :param matrix_dims: Rows and columns, columns are -1 if unknown
+        :type matrix_dims: list of int
+
+        :return: Row ID byte plus 3 bytes per column, or None
+        :rtype: int or None
+        """
+        if matrix_dims[1] > 0:
+            return 1 + matrix_dims[1] * 3
+        return None
+
+    def reset(self):
+        """
+        Forget the device's frame
+        """
+        self._rows.clear()
+        self._last_payload = None
+        self._custom_pending = True
+
+    def coalesce_key(self, payload):
+        """
+        Get the write queue key of a set_key_row payload, writes of the same rows replace each other
+
+        :param payload: Row ID then RGB bytes, repeated for each row
+        :type payload: bytes
+
+        :return: Key
+        :rtype: tuple
+        """
+        if self._row_length is None:
+            return 'set_key_row', bytes(payload[:1])
+        return 'set_key_row', bytes(payload[::self._row_length])
+
+    def diff(self, payload):
+        """
+        Get the rows of a set_key_row payload which differ from the last frame
+
+        :param payload: Row ID then RGB bytes, repeated for each row
+        :type payload: bytes
+
+        :return: Changed rows in the same format, empty if nothing changed
+        :rtype: bytes
+        """
+        payload = bytes(payload)
+
+        if self._row_length is None or len(payload) % self._row_length != 0:
+            # Rows can't be told apart, only whole repeats can be skipped
+            self._rows.clear()
+            if payload == self._last_payload:
+                return b''
+            self._last_payload = payload
+            self._custom_pending = True
+            return payload
+
+        self._last_payload = None
+        changed = []
+        for offset in range(0, len(payload), self._row_length):
+            row = payload[offset:offset + self._row_length]
+            if self._rows.get(row[0]) != row:
+                self._rows[row[0]] = row
+                changed.append(row)
+
+        if changed:
+            self._custom_pending = True
+        return b''.join(changed)
+
+    def custom_needed(self):
+        """
+        Check if mode_custom has to be written to show the frame, and assume it will be
+
+        :return: True if rows changed since it was last written
+        :rtype: bool
+        """
+        needed = self._custom_pending
+        self._custom_pending = False
+        return needed
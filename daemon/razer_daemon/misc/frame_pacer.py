@@ -0,0 +1,236 @@
+"""
+Custom frame pacing
+
+Clients can send setKeyRow and setCustom faster than the device takes them. Frames are held in a one slot mailbox and
+released at most at the configured frame rate, and only once the device has finished writing the last one. A newer
+frame replaces one still waiting in the mailbox, which counts as a dropped frame so clients can slow down.
+
+setFrame sends the rows and ends the frame in one call. Its frames only write mode_custom when the device is showing
+something else, the rows alone update a matrix which is already in custom mode.
+"""
+import asyncio
+import logging
+
+from .frame_diff import FrameDiff
+
+DEFAULT_MAX_FPS = 30
+# How often to check if the device has caught up when unpaced
+BUSY_RETRY_INTERVAL = 0.005 # Seconds
+
+
+class FramePacer(object):
+    """
+    Paces the custom frames of a device
+
+    Frames are rows from setKeyRow ended by a setCustom, or the rows of a setFrame. Rows not followed by a setCustom
+    are sent a frame later.
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, parent, device_number, max_fps=DEFAULT_MAX_FPS, row_length=None):
+        self._logger = logging.getLogger('razer.device{0}.framepacer'.format(device_number))
+        self._parent = parent
+        self._loop = asyncio.get_event_loop()
+
+        self._max_fps = max_fps
+        self._interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self._row_length = row_length
+        self._frame_diff = FrameDiff(row_length)
+
+        # Mailbox, newest rows by row ID and if the frame has been ended with setCustom
+        self._rows = {}
+        self._custom = False
+        # The waiting frame only needs mode_custom if the device isnt in custom mode
+        self._custom_if_needed = False
+        # mode_custom was written since something else was shown
+        self._in_custom_mode = False
+
+        self._last_release = None
+        self._timer = None
+        self._timer_due = None
+
+        self._submitted = 0
+        self._sent = 0
+        self._dropped = 0
+        self._dropped_reported = 0
+
+    def _split(self, payload):
+        """
+        Split a set_key_row payload into rows
+
+        :param payload: Row ID then RGB bytes, repeated for each row
+        :type payload: bytes
+
+        :return: List of (row ID, row)
+        :rtype: list of tuple
+        """
+        payload = bytes(payload)
+        if len(payload) == 0:
+            return []
+
+        if self._row_length is None or len(payload) % self._row_length != 0:
+            return [(payload[0], payload)]
+
+        return [(payload[offset], payload[offset:offset + self._row_length]) for offset in range(0, len(payload), self._row_length)]
+
+    def _next_slot(self):
+        """
+        Earliest loop time the next frame can be released
+
+        :return: Loop time
+        :rtype: float
+        """
+        now = self._loop.time()
+        if self._last_release is None:
+            return now
+        return max(now, self._last_release + self._interval)
+
+    def add_rows(self, payload):
+        """
+        Put rows in the mailbox, replacing any waiting rows with the same ID
+
+        :param payload: Row ID then RGB bytes, repeated for each row
+        :type payload: bytes
+        """
+        for row_id, row in self._split(payload):
+            self._rows[row_id] = row
+
+        # setCustom normally follows straight away, wait a frame for it
+        self._arm(self._loop.time() + self._interval)
+
+    def submit(self, custom_if_needed=False):
+        """
+        End a frame, it is released as soon as the frame rate and the device allow
+
+        :param custom_if_needed: Only write mode_custom if the device isnt in custom mode already
+        :type custom_if_needed: bool
+
+        :return: Number of frames dropped since the last call
+        :rtype: int
+        """
+        if self._custom:
+            # The last frame never made it to the device
+            self._dropped += 1
+        self._custom = True
+        self._custom_if_needed = custom_if_needed
+        self._submitted += 1
+
+        self._arm(self._next_slot())
+
+        dropped = self._dropped - self._dropped_reported
+        self._dropped_reported = self._dropped
+        return dropped
+
+    def submit_frame(self, payload):
+        """
+        Put rows in the mailbox and end the frame, for setFrame
+
+        :param payload: Row ID then RGB bytes, repeated for each row
+        :type payload: bytes
+
+        :return: Number of frames dropped since the last call
+        :rtype: int
+        """
+        for row_id, row in self._split(payload):
+            self._rows[row_id] = row
+
+        return self.submit(custom_if_needed=True)
+
+    def _arm(self, when):
+        """
+        Release the mailbox at a loop time, or now if that has passed
+
+        :param when: Loop time
+        :type when: float
+        """
+        when = max(when, self._next_slot())
+
+        if when <= self._loop.time():
+            self._cancel_timer()
+            self._release()
+            return
+
+        if self._timer is not None:
+            if self._timer_due <= when:
+                return
+            self._timer.cancel()
+
+        self._timer_due = when
+        self._timer = self._loop.call_at(when, self._on_timer)
+
+    def _cancel_timer(self):
+        """
+        Cancel the release timer
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_due = None
+
+    def _on_timer(self):
+        """
+        Release timer callback
+        """
+        self._timer = None
+        self._timer_due = None
+        self._release()
+
+    def _release(self):
+        """
+        Send the mailbox to the device, unless it is still writing the last frame
+        """
+        if not self._rows and not self._custom:
+            return
+
+        if self._parent.driver_write_pending('set_key_row') or self._parent.driver_write_pending('mode_custom'):
+            self._arm(self._loop.time() + max(self._interval, BUSY_RETRY_INTERVAL))
+            return
+
+        rows = b''.join(row for _, row in sorted(self._rows.items()))
+        self._rows.clear()
+
+        # Only rows which differ from the last frame are sent, each is a USB report
+        rows = self._frame_diff.diff(rows)
+        if len(rows) > 0:
+            self._parent.write_driver_file('set_key_row', rows, coalesce_key=self._frame_diff.coalesce_key(rows))
+
+        if self._custom:
+            self._custom = False
+            self._sent += 1
+            # Nothing to show if no rows changed since the last time
+            if self._frame_diff.custom_needed() and not (self._custom_if_needed and self._in_custom_mode):
+                self._parent.write_driver_file('mode_custom', b'1')
+                self._in_custom_mode = True
+            self._custom_if_needed = False
+
+        self._last_release = self._loop.time()
+
+    def reset(self):
+        """
+        Drop the mailbox and forget the last frame, called when something else is shown on the matrix
+        """
+        self._cancel_timer()
+        self._rows.clear()
+        self._custom = False
+        self._custom_if_needed = False
+        self._in_custom_mode = False
+        self._frame_diff.reset()
+
+    def stats(self):
+        """
+        Get the frame counters
+
+        :return: Stats
+        :rtype: dict
+        """
+        return {
+            'max_fps': self._max_fps,
+            'submitted': self._submitted,
+            'sent': self._sent,
+            'dropped': self._dropped,
+        }
+
+    def close(self):
+        """
+        Stop releasing frames
+        """
+        self.reset()
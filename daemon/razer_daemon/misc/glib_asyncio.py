@@ -0,0 +1,158 @@
+"""
+asyncio event loop running on the GLib main context
+
+The daemon is driven by the GLib main loop (DBus dispatch needs it), this lets the per device features use coroutines,
+fd readers and timers in the same thread instead of each running a polling thread of their own.
+"""
+import asyncio
+import math
+import selectors
+
+from gi.repository import GLib
+
+
+class GLibEventLoop(asyncio.SelectorEventLoop):
+    """
+    asyncio event loop which is dispatched by the GLib main loop
+
+    The selector's epoll fd is watched by GLib and a GLib timeout is kept armed for the earliest asyncio timer. Each
+    time one of those fires, or a callback is queued, a single non blocking iteration of the asyncio loop is run.
+    When there is no work the process sleeps in GLib's poll.
+    """
+    def __init__(self):
+        self._epoll_selector = selectors.EpollSelector()
+        super(GLibEventLoop, self).__init__(self._epoll_selector)
+
+        self._io_source = None
+        self._timeout_source = None
+        self._idle_source = None
+        self._dispatching = False
+
+    def attach(self):
+        """
+        Start dispatching from the default GLib main context
+        """
+        if self._io_source is None:
+            self._io_source = GLib.io_add_watch(self._epoll_selector.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, self._on_io)
+            self._update_sources()
+
+    def detach(self):
+        """
+        Stop dispatching from GLib
+        """
+        for source in (self._io_source, self._timeout_source, self._idle_source):
+            if source is not None:
+                GLib.source_remove(source)
+
+        self._io_source = None
+        self._timeout_source = None
+        self._idle_source = None
+
+    def close(self):
+        """
+        Detach from GLib and close the loop
+        """
+        self.detach()
+        super(GLibEventLoop, self).close()
+
+    def call_soon(self, callback, *args, **kwargs):
+        """
+        Queue a callback and make sure GLib dispatches the loop
+        """
+        handle = super(GLibEventLoop, self).call_soon(callback, *args, **kwargs)
+
+        # Whilst dispatching _update_sources runs afterwards anyway
+        if not self._dispatching:
+            self._schedule_idle()
+
+        return handle
+
+    def call_at(self, when, callback, *args, **kwargs):
+        """
+        Schedule a timer and rearm the GLib timeout if its now the earliest one
+        """
+        handle = super(GLibEventLoop, self).call_at(when, callback, *args, **kwargs)
+
+        if not self._dispatching:
+            self._update_sources()
+
+        return handle
+
+    def _schedule_idle(self):
+        """
+        Dispatch as soon as GLib is idle
+        """
+        if self._idle_source is None and self._io_source is not None:
+            self._idle_source = GLib.idle_add(self._on_idle, priority=GLib.PRIORITY_DEFAULT)
+
+    def _update_sources(self):
+        """
+        Arm the GLib sources for the next piece of work
+        """
+        if self._io_source is None or self.is_closed():
+            return
+
+        # pylint: disable=protected-access
+        # BaseEventLoop has no public way to get the ready queue or the next deadline
+        if self._ready:
+            self._schedule_idle()
+            return
+
+        if self._timeout_source is not None:
+            GLib.source_remove(self._timeout_source)
+            self._timeout_source = None
+
+        if self._scheduled:
+            delay = self._scheduled[0].when() - self.time()
+            # Round up, waking early would just mean an empty dispatch and another timeout
+            self._timeout_source = GLib.timeout_add(max(0, int(math.ceil(delay * 1000))), self._on_timeout)
+
+    def _dispatch(self):
+        """
+        Run a single iteration of the asyncio loop
+        """
+        if self._dispatching or self.is_closed():
+            return
+
+        self._dispatching = True
+        try:
+            # stop is queued behind everything that is ready so run_forever returns after one pass
+            super(GLibEventLoop, self).call_soon(self.stop)
+            self.run_forever()
+        finally:
+            self._dispatching = False
+
+        self._update_sources()
+
+    def _on_io(self, fd, condition):
+        """
+        GLib callback, a registered fd is ready
+
+        :return: True to keep the watch
+        :rtype: bool
+        """
+        # pylint: disable=unused-argument
+        self._dispatch()
+        return True
+
+    def _on_timeout(self):
+        """
+        GLib callback, the earliest timer is due
+
+        :return: False as the timeout is rearmed by _update_sources
+        :rtype: bool
+        """
+        self._timeout_source = None
+        self._dispatch()
+        return False
+
+    def _on_idle(self):
+        """
+        GLib callback, callbacks are waiting
+
+        :return: False as the idle source is re-added when needed
+        :rtype: bool
+        """
+        self._idle_source = None
+        self._dispatch()
+        return False
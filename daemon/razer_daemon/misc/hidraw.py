@@ -0,0 +1,320 @@
+"""
+Userspace hidraw backend
+
+Talks to a device with Razer reports sent as hidraw feature reports rather than going through the driver's sysfs
+attributes, one report per attribute write. With the reports built here a whole custom frame, or an effect needing
+several reports, is sent in one go under one lock. Attributes without a report mapping are passed on to the driver.
+"""
+import errno
+import fcntl
+import glob
+import logging
+import os
+import threading
+import time
+
+from . import razer_report
+from .driver_backend import DriverBackend
+
+# Razer reports use report ID 0, which hidraw wants as the first byte
+REPORT_ID = 0x00
+# razerkbd_driver.c waits 600-800us after each report
+REPORT_WAIT = 0.0008 # Seconds
+
+_IOC_WRITE = 1
+_IOC_READ = 2
+
+
+def _hid_ioctl(number, length):
+    """
+    Build a read/write hidraw ioctl request number, _IOC(_IOC_WRITE|_IOC_READ, 'H', number, length)
+
+    :param number: Request number
+    :type number: int
+
+    :param length: Buffer length
+    :type length: int
+
+    :return: ioctl request
+    :rtype: int
+    """
+    return ((_IOC_WRITE | _IOC_READ) << 30) | (length << 16) | (ord('H') << 8) | number
+
+
+def HIDIOCSFEATURE(length): # pylint: disable=invalid-name
+    """
+    :return: ioctl request to send a feature report
+    :rtype: int
+    """
+    return _hid_ioctl(0x06, length)
+
+
+def HIDIOCGFEATURE(length): # pylint: disable=invalid-name
+    """
+    :return: ioctl request to get a feature report
+    :rtype: int
+    """
+    return _hid_ioctl(0x07, length)
+
+
+def find_hidraw_node(device_path, interface):
+    """
+    Find the hidraw node of a device's USB interface
+
+    :param device_path: Sysfs path of the HID device the driver is bound to
+    :type device_path: str
+
+    :param interface: USB interface number the driver sends its reports to
+    :type interface: int
+
+    :return: Path to the hidraw node or None
+    :rtype: str or None
+    """
+    # .../usb1/1-1/1-1:1.0/0003:1532:0203.0001
+    usb_device_path = os.path.dirname(os.path.dirname(os.path.realpath(device_path)))
+    nodes = sorted(glob.glob(os.path.join(usb_device_path, '*:*.{0}'.format(interface), '*', 'hidraw', 'hidraw*')))
+    if len(nodes) == 0:
+        return None
+    return os.path.join('/dev', os.path.basename(nodes[0]))
+
+
+class HidrawTransport(object):
+    """
+    Sends reports to a hidraw node, one transaction at a time
+    """
+    def __init__(self, path, wait=REPORT_WAIT):
+        self._path = path
+        self._wait = wait
+        self._fd = None
+        self._lock = threading.RLock()
+
+    @property
+    def lock(self):
+        """
+        Lock held for a transaction, held over several to keep them together
+
+        :return: Lock
+        :rtype: threading.RLock
+        """
+        return self._lock
+
+    def _get_fd(self):
+        """
+        Open the node if needed
+
+        :return: File descriptor
+        :rtype: int
+        """
+        if self._fd is None:
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CLOEXEC)
+        return self._fd
+
+    def _ioctl(self, request, buf):
+        """
+        Do a feature report ioctl, closing the node on failure so it is reopened next time
+
+        :param request: ioctl request
+        :type request: int
+
+        :param buf: Buffer, filled in by get feature
+        :type buf: bytearray
+        """
+        try:
+            fcntl.ioctl(self._get_fd(), request, buf, True)
+        except OSError:
+            self.close()
+            raise
+
+    def send(self, report):
+        """
+        Send a report
+
+        :param report: Report
+        :type report: bytes
+
+        :raises OSError: If sending failed
+        """
+        with self._lock:
+            buf = bytearray([REPORT_ID]) + bytearray(report)
+            self._ioctl(HIDIOCSFEATURE(len(buf)), buf)
+            time.sleep(self._wait)
+
+    def request(self, report):
+        """
+        Send a report and get the device's response
+
+        :param report: Request report
+        :type report: bytes
+
+        :return: Response report
+        :rtype: bytes
+
+        :raises OSError: If the transfer failed or the device answered with an error
+        """
+        with self._lock:
+            self.send(report)
+
+            buf = bytearray([REPORT_ID]) + bytearray(razer_report.REPORT_LEN)
+            self._ioctl(HIDIOCGFEATURE(len(buf)), buf)
+            time.sleep(self._wait)
+
+        response = bytes(buf[1:])
+        razer_report.check_response(report, response)
+        return response
+
+    def close(self):
+        """
+        Close the node
+        """
+        with self._lock:
+            if self._fd is not None:
+                try:
+                    os.close(self._fd)
+                except OSError:
+                    pass
+                self._fd = None
+
+
+class HidrawDriverFiles(DriverBackend):
+    """
+    Driver files of a chroma keyboard done with reports, in place of a DriverFileCache
+
+    Takes the same payloads as the driver's attributes.
+    """
+    def __init__(self, transport, fallback, row_length=razer_report.CHROMA_ROW_LEN, transaction_id=razer_report.DEFAULT_TRANSACTION_ID, custom_frame_id=0x01):
+        self._logger = logging.getLogger('razer.hidraw')
+
+        self._transport = transport
+        self._fallback = fallback
+        self._row_length = row_length
+        self._transaction_id = transaction_id
+        self._custom_frame_id = custom_frame_id
+
+        self._report_funcs = {
+            'set_brightness': lambda payload: [razer_report.brightness_report(int(payload.strip()))],
+            'mode_none': lambda payload: [razer_report.none_report()],
+            'mode_spectrum': lambda payload: [razer_report.spectrum_report()],
+            'mode_wave': lambda payload: [razer_report.wave_report(int(payload.strip()))],
+            'mode_static': self._static_reports,
+            'mode_reactive': self._reactive_reports,
+            'mode_breath': self._breath_reports,
+            'mode_custom': lambda payload: [razer_report.reset_report(), razer_report.custom_report(self._custom_frame_id)],
+            'temp_clear_row': lambda payload: [razer_report.clear_row_report(int(payload.strip()))],
+            'set_key_row': self._key_row_reports,
+        }
+
+    @property
+    def open_files(self):
+        """
+        Number of open driver files, not counting the hidraw node
+
+        :return: Count
+        :rtype: int
+        """
+        return self._fallback.open_files
+
+    def handles(self, driver_filename):
+        """
+        Check if a driver file is done with reports
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: True if done with reports
+        :rtype: bool
+        """
+        return driver_filename in self._report_funcs
+
+    @staticmethod
+    def _static_reports(payload):
+        """
+        Static effect, ignored unless 3 RGB bytes like the driver
+        """
+        if len(payload) != 3:
+            return []
+        return [razer_report.static_report(payload)]
+
+    @staticmethod
+    def _reactive_reports(payload):
+        """
+        Reactive effect, ignored unless a speed of 1-4 and 3 RGB bytes like the driver
+        """
+        if len(payload) != 4 or not 0 < payload[0] < 5:
+            return []
+        return [razer_report.reactive_report(payload[0], payload[1:])]
+
+    @staticmethod
+    def _breath_reports(payload):
+        """
+        Breath effect, 3 RGB bytes for one colour, 6 for two and anything else for random colours
+        """
+        if len(payload) == 3:
+            return [razer_report.breath_report(payload)]
+        if len(payload) == 6:
+            return [razer_report.breath_report(payload[:3], payload[3:])]
+        return [razer_report.breath_report()]
+
+    def _key_row_reports(self, payload):
+        """
+        One report per row, each row is a row ID then RGB bytes for each key
+        """
+        row_size = 1 + self._row_length * 3
+        if len(payload) % row_size != 0:
+            raise OSError(errno.EINVAL, "Wrong amount of RGB data provided: {0} bytes, rows are {1}".format(len(payload), row_size))
+
+        return [razer_report.key_row_report(payload[offset], payload[offset + 1:offset + row_size], self._transaction_id)
+                for offset in range(0, len(payload), row_size)]
+
+    def read(self, driver_filename):
+        """
+        Read a driver file
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :return: File contents, as the driver would show them
+        :rtype: bytes
+
+        :raises OSError: If the read fails
+        """
+        if driver_filename == 'set_brightness':
+            response = razer_report.parse_report(self._transport.request(razer_report.brightness_request()))
+            return '{0}\n'.format(response.arguments[2]).encode()
+
+        return self._fallback.read(driver_filename)
+
+    def write(self, driver_filename, payload):
+        """
+        Write to a driver file, sending all of its reports together
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param payload: Data
+        :type payload: bytes
+
+        :return: Number of bytes written
+        :rtype: int
+
+        :raises OSError: If sending failed
+        """
+        if driver_filename not in self._report_funcs:
+            return self._fallback.write(driver_filename, payload)
+
+        try:
+            reports = self._report_funcs[driver_filename](bytes(payload))
+        except ValueError as err:
+            raise OSError(errno.EINVAL, "Invalid payload for {0}: {1}".format(driver_filename, err))
+
+        with self._transport.lock:
+            for report in reports:
+                self._transport.send(report)
+
+        return len(payload)
+
+    def close(self):
+        """
+        Close the hidraw node and the driver files
+        """
+        self._transport.close()
+        self._fallback.close()
@@ -0,0 +1,180 @@
+"""
+Hotplug monitor which listens to kernel uevents
+
+The kernel broadcasts a uevent on a NETLINK_KOBJECT_UEVENT socket whenever a device is added, bound to a driver
+or removed. Each message is a NUL separated list like
+
+    add@/devices/pci0000:00/.../0003:1532:0203.0001
+    ACTION=add
+    DEVPATH=/devices/pci0000:00/.../0003:1532:0203.0001
+    SUBSYSTEM=hid
+    HID_ID=0003:00001532:00000203
+    ...
+
+Only HID subsystem events are passed on, the last component of DEVPATH is the same ID as found in /sys/bus/hid/devices
+"""
+import logging
+import os
+import socket
+
+NETLINK_KOBJECT_UEVENT = 15
+# Multicast group the kernel sends uevents to, group 2 is used by udevd for its own processed events
+UEVENT_KERNEL_GROUP = 1
+UEVENT_BUFFER_SIZE = 16384
+
+HID_DEVICES_PATH = '/sys/bus/hid/devices'
+
+ADD_ACTIONS = ('add', 'bind')
+REMOVE_ACTIONS = ('remove', 'unbind')
+
+
+def parse_uevent(data):
+    """
+    Parse a raw uevent message
+
+    :param data: Message from the netlink socket
+    :type data: bytes
+
+    :return: Dictionary of uevent keys or None if the message is not a kernel uevent
+    :rtype: dict or None
+    """
+    parts = data.split(b'\0')
+
+    # Kernel messages start with action@devpath, udevd's start with libudev
+    if len(parts) == 0 or b'@' not in parts[0]:
+        return None
+
+    result = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition(b'=')
+        if sep:
+            result[key.decode('utf-8', 'replace')] = value.decode('utf-8', 'replace')
+
+    if 'ACTION' not in result or 'DEVPATH' not in result:
+        return None
+
+    return result
+
+
+class UeventSocket(object):
+    """
+    Non blocking netlink socket subscribed to kernel uevents
+    """
+    def __init__(self):
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC | socket.SOCK_NONBLOCK, NETLINK_KOBJECT_UEVENT)
+        try:
+            # Port id 0 lets the kernel assign one
+            self._socket.bind((0, UEVENT_KERNEL_GROUP))
+        except OSError:
+            self._socket.close()
+            raise
+
+    def fileno(self):
+        """
+        Get the file descriptor to wait on
+
+        :return: File descriptor
+        :rtype: int
+        """
+        return self._socket.fileno()
+
+    def receive(self):
+        """
+        Receive a uevent
+
+        :return: Raw message or None if there is nothing to read
+        :rtype: bytes or None
+        """
+        try:
+            return self._socket.recv(UEVENT_BUFFER_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return None
+
+    def close(self):
+        """
+        Close the socket
+        """
+        self._socket.close()
+
+
+class HotplugMonitor(object):
+    """
+    Turns HID uevents into add and remove callbacks
+
+    The uevent source only needs fileno(), receive() and close() so tests can feed in canned messages.
+    """
+    def __init__(self, on_add, on_remove, uevent_source=None, hid_path=HID_DEVICES_PATH):
+        self._logger = logging.getLogger('razer.hotplug')
+
+        self._on_add = on_add
+        self._on_remove = on_remove
+        self._hid_path = hid_path
+
+        if uevent_source is None:
+            uevent_source = UeventSocket()
+        self._source = uevent_source
+
+        self._is_closed = False
+
+    def fileno(self):
+        """
+        Get the file descriptor to wait on
+
+        :return: File descriptor
+        :rtype: int
+        """
+        return self._source.fileno()
+
+    def process_events(self):
+        """
+        Drain all pending uevents from the source
+
+        :return: Number of uevents read
+        :rtype: int
+        """
+        count = 0
+
+        while not self._is_closed:
+            data = self._source.receive()
+            if data is None:
+                break
+
+            count += 1
+            self.handle_uevent(data)
+
+        return count
+
+    def handle_uevent(self, data):
+        """
+        Dispatch a single uevent
+
+        :param data: Raw uevent message
+        :type data: bytes
+        """
+        event = parse_uevent(data)
+        if event is None or event.get('SUBSYSTEM') != 'hid':
+            return
+
+        device_id = os.path.basename(event['DEVPATH'])
+        action = event['ACTION']
+
+        if action in ADD_ACTIONS:
+            # The device could have gone by the time we read the event
+            if os.path.isdir(os.path.join(self._hid_path, device_id)):
+                self._logger.debug("Hotplug %s %s", action, device_id)
+                self._on_add(device_id)
+
+        elif action in REMOVE_ACTIONS:
+            self._logger.debug("Hotplug %s %s", action, device_id)
+            self._on_remove(device_id)
+
+    def close(self):
+        """
+        Close the uevent source
+        """
+        if not self._is_closed:
+            self._is_closed = True
+            self._source.close()
+
+    def __del__(self):
+        self.close()
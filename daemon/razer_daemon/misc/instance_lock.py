@@ -0,0 +1,124 @@
+"""
+Single instance lock
+
+Holds an exclusive flock on a file in the run directory for the lifetime of the daemon. The lock is released by the
+kernel when the process exits so a crashed daemon never leaves a stale lock behind. The holder's PID is written into
+the file so it pairs with the PID file.
+"""
+import fcntl
+import os
+import tempfile
+import time
+
+LOCK_FILENAME = 'razer-service.lock'
+LOCK_POLL_INTERVAL = 0.05 # Seconds
+
+
+def get_lock_path(run_dir=None):
+    """
+    Get the path of the lock file
+
+    :param run_dir: Run directory, if None then a per user file in the temp dir is used
+    :type run_dir: str or None
+
+    :return: Lock file path
+    :rtype: str
+    """
+    if run_dir is None:
+        return os.path.join(tempfile.gettempdir(), 'razer-service-{0}.lock'.format(os.getuid()))
+
+    return os.path.join(os.path.expanduser(run_dir), LOCK_FILENAME)
+
+
+class InstanceLock(object):
+    """
+    Exclusive lock file
+    """
+    def __init__(self, lock_path):
+        self._lock_path = lock_path
+        self._lock_fd = None
+
+    @property
+    def path(self):
+        """
+        Lock file path
+
+        :return: Path
+        :rtype: str
+        """
+        return self._lock_path
+
+    @property
+    def locked(self):
+        """
+        Lock held by this process
+
+        :return: True if held
+        :rtype: bool
+        """
+        return self._lock_fd is not None
+
+    def acquire(self, timeout=0):
+        """
+        Acquire the lock
+
+        :param timeout: Seconds to keep trying for, 0 only tries once
+        :type timeout: float
+
+        :return: True if the lock was acquired
+        :rtype: bool
+        """
+        if self._lock_fd is not None:
+            return True
+
+        os.makedirs(os.path.dirname(self._lock_path), mode=0o750, exist_ok=True)
+        # Not truncated on open as the file holds the current owner's PID
+        lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o640)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(lock_fd)
+                    return False
+                time.sleep(LOCK_POLL_INTERVAL)
+
+        self._lock_fd = lock_fd
+        self.write_pid()
+
+        return True
+
+    def write_pid(self):
+        """
+        Write the current PID into the lock file, called again after forking
+        """
+        if self._lock_fd is not None:
+            os.ftruncate(self._lock_fd, 0)
+            os.pwrite(self._lock_fd, str(os.getpid()).encode(), 0)
+
+    def owner_pid(self):
+        """
+        Get the PID of the process holding the lock
+
+        :return: PID or None if unknown
+        :rtype: int or None
+        """
+        try:
+            with open(self._lock_path, 'r') as lock_file:
+                return int(lock_file.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def release(self):
+        """
+        Release the lock
+        """
+        if self._lock_fd is not None:
+            # Clear the PID first, once unlocked the file belongs to the next instance
+            os.ftruncate(self._lock_fd, 0)
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,233 @@
+"""
+Shared retry and circuit breaker policy for driver I/O
+
+Wireless devices miss requests now and then, answering with -1 or failing the transfer, and go quiet altogether when
+asleep. Failed calls are retried a few times with jittered exponential backoff. After enough calls in a row fail the
+device is marked degraded and calls fail straight away, rather than every client waiting on USB timeouts, until a
+single probe call is let through to check if it is back.
+"""
+import errno
+import logging
+import random
+import threading
+import time
+
+RETRY_ATTEMPTS = 3
+RETRY_INITIAL_BACKOFF = 0.05 # Seconds
+RETRY_MAX_BACKOFF = 0.5 # Seconds
+# Up to this fraction of each backoff is taken off at random so retries dont line up
+BACKOFF_JITTER = 0.5
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 10.0 # Seconds
+
+# Errors caused by the request rather than the device, retrying wont help
+NON_RETRYABLE_ERRNOS = (errno.ENOENT, errno.EINVAL, errno.EACCES, errno.EPERM)
+
+HEALTH_HEALTHY = 'healthy'
+HEALTH_DEGRADED = 'degraded'
+HEALTH_PROBING = 'probing'
+
+
+class DeviceDegradedError(OSError):
+    """
+    Raised instead of calling a device which is degraded
+    """
+    pass
+
+
+class Backoff(object):
+    """
+    Jittered exponential backoff
+    """
+    def __init__(self, initial, maximum, jitter=BACKOFF_JITTER):
+        self._initial = initial
+        self._maximum = maximum
+        self._jitter = jitter
+        self._current = initial
+
+    def reset(self):
+        """
+        Start again from the initial backoff
+        """
+        self._current = self._initial
+
+    def next(self):
+        """
+        Get the next delay
+
+        :return: Seconds
+        :rtype: float
+        """
+        delay = self._current * (1 - random.uniform(0, self._jitter))
+        self._current = min(self._current * 2, self._maximum)
+        return delay
+
+
+class CircuitBreaker(object):
+    """
+    Tracks consecutive failures of a device
+
+    Healthy until failure_threshold calls in a row fail, then degraded for reset_timeout seconds. After that one
+    probe call is let through, success makes the device healthy again and failure degraded for another timeout.
+    """
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT, clock=time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._state = HEALTH_HEALTHY
+        self._consecutive_failures = 0
+        self._failures = 0
+        self._opened_at = None
+        self._last_error = None
+
+    @property
+    def state(self):
+        """
+        Health state
+
+        :return: healthy, degraded or probing
+        :rtype: str
+        """
+        return self._state
+
+    def allow(self):
+        """
+        Check if a call can go to the device, a degraded device past its timeout lets one probe through
+
+        :return: True if the call can be made
+        :rtype: bool
+        """
+        with self._lock:
+            if self._state == HEALTH_HEALTHY:
+                return True
+
+            if self._state == HEALTH_DEGRADED and self._clock() >= self._opened_at + self._reset_timeout:
+                self._state = HEALTH_PROBING
+                return True
+
+            return False
+
+    def record_success(self):
+        """
+        Record a call which worked
+        """
+        with self._lock:
+            self._state = HEALTH_HEALTHY
+            self._consecutive_failures = 0
+            self._opened_at = None
+
+    def record_failure(self, error):
+        """
+        Record a call which failed after its retries
+
+        :param error: Error or description
+        :type error: Exception or str
+        """
+        with self._lock:
+            self._consecutive_failures += 1
+            self._failures += 1
+            self._last_error = str(error)
+
+            if self._state == HEALTH_PROBING or self._consecutive_failures >= self._failure_threshold:
+                self._state = HEALTH_DEGRADED
+                self._opened_at = self._clock()
+
+    def retry_in(self):
+        """
+        Seconds until a degraded device is probed
+
+        :return: Seconds, 0 unless degraded
+        :rtype: float
+        """
+        with self._lock:
+            if self._state != HEALTH_DEGRADED:
+                return 0.0
+            return max(0.0, self._opened_at + self._reset_timeout - self._clock())
+
+    def to_dict(self):
+        """
+        Get the health as a dict
+
+        :return: Health
+        :rtype: dict
+        """
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'failures': self._failures,
+                'last_error': self._last_error,
+                'retry_in': retry_in,
+            }
+
+
+class IOPolicy(object):
+    """
+    Retries and circuit breaker for one device's driver I/O
+    """
+    def __init__(self, device_number, attempts=RETRY_ATTEMPTS, initial_backoff=RETRY_INITIAL_BACKOFF, max_backoff=RETRY_MAX_BACKOFF,
+                 breaker=None):
+        self._logger = logging.getLogger('razer.device{0}.iopolicy'.format(device_number))
+
+        self._attempts = attempts
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    def call(self, func, *args, retry=True, valid_func=None):
+        """
+        Call a function which talks to the device
+
+        :param func: Function, raises OSError on failure
+        :type func: callable
+
+        :param retry: Retry failures with backoff, this sleeps so only retry off the main loop
+        :type retry: bool
+
+        :param valid_func: Checks the result, an invalid result is retried like an error
+        :type valid_func: callable or None
+
+        :return: Result of the function, the last invalid result if none were valid
+        :rtype: object
+
+        :raises DeviceDegradedError: If the device is degraded
+        :raises OSError: If every attempt failed
+        """
+        if not self.breaker.allow():
+            raise DeviceDegradedError("Device is degraded, next try in {0:.1f}s".format(self.breaker.retry_in()))
+
+        attempts = self._attempts if retry else 1
+        backoff = Backoff(self._initial_backoff, self._max_backoff)
+        error = None
+        result = None
+
+        for attempt in range(1, attempts + 1):
+            try:
+                result = func(*args)
+            except OSError as err:
+                if err.errno in NON_RETRYABLE_ERRNOS:
+                    # The device answered, the request was wrong
+                    self.breaker.record_success()
+                    raise
+                error = err
+            else:
+                if valid_func is None or valid_func(result):
+                    self.breaker.record_success()
+                    return result
+                error = None
+
+            if attempt < attempts:
+                self._logger.debug("Attempt %d of %d failed: %s", attempt, attempts, error or 'invalid result')
+                time.sleep(backoff.next())
+
+        previous_state = self.breaker.state
+        self.breaker.record_failure(error or 'invalid result {0!r}'.format(result))
+        if self.breaker.state == HEALTH_DEGRADED and previous_state != HEALTH_DEGRADED:
+            self._logger.warning("Device degraded after repeated failures, last: %s", error or 'invalid result')
+
+        if error is not None:
+            raise error
+        return result
@@ -0,0 +1,203 @@
+"""
+Driver I/O latency stats
+
+Times every driver read and write of a device, per attribute, into log bucket histograms like HdrHistogram. Each power
+of two is split into 8 buckets, so a latency is known to within an eighth without keeping every sample. The stats
+backend only wraps a device's backend when enabled, so there is no cost at all otherwise.
+"""
+import threading
+import time
+
+from .driver_backend import DriverBackend
+
+# 2^3 buckets per power of two, values below 2^4 microseconds get a bucket each
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+PERCENTILES = (50, 90, 99)
+
+
+def bucket_index(value):
+    """
+    Get the bucket of a value
+
+    :param value: Microseconds
+    :type value: int
+
+    :return: Bucket index
+    :rtype: int
+    """
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKETS * shift + (value >> shift)
+
+
+def bucket_range(index):
+    """
+    Get the values a bucket holds
+
+    :param index: Bucket index
+    :type index: int
+
+    :return: Lowest and highest value in microseconds
+    :rtype: tuple of int
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - SUB_BUCKETS * shift
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram(object):
+    """
+    Log bucket histogram of latencies
+    """
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.errors = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds):
+        """
+        Add a latency
+
+        :param seconds: Latency
+        :type seconds: float
+        """
+        value = int(round(seconds * 1e6))
+        index = bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        Get a percentile, the top of the bucket it falls in
+
+        :param percent: 0-100
+        :type percent: float
+
+        :return: Microseconds, 0 if empty
+        :rtype: int
+        """
+        if self.count == 0:
+            return 0
+
+        wanted = self.count * percent / 100.0
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= wanted:
+                return min(bucket_range(index)[1], self.max)
+        return self.max
+
+    def to_dict(self):
+        """
+        Get the histogram as a dict
+
+        :return: count, errors, min/mean/max/percentiles in microseconds and buckets of lowest value to count
+        :rtype: dict
+        """
+        stats = {
+            'count': self.count,
+            'errors': self.errors,
+            'min_us': self.min or 0,
+            'mean_us': self.total / self.count if self.count else 0,
+            'max_us': self.max,
+            'buckets': {bucket_range(index)[0]: count for index, count in sorted(self.buckets.items())},
+        }
+        for percent in PERCENTILES:
+            stats['p{0}_us'.format(percent)] = self.percentile(percent)
+        return stats
+
+
+class IoStatsBackend(DriverBackend):
+    """
+    Wraps a backend and times its reads and writes
+    """
+    def __init__(self, backend, clock=time.perf_counter):
+        self.backend = backend
+        self._clock = clock
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @property
+    def open_files(self):
+        return self.backend.open_files
+
+    def _histogram(self, operation, driver_filename):
+        """
+        Get the histogram of an attribute, must hold the lock
+
+        :return: Histogram
+        :rtype: LatencyHistogram
+        """
+        key = (driver_filename, operation)
+        try:
+            return self._histograms[key]
+        except KeyError:
+            histogram = self._histograms[key] = LatencyHistogram()
+            return histogram
+
+    def _timed(self, operation, driver_filename, func, *args):
+        """
+        Call the wrapped backend and time it
+
+        :param operation: read or write
+        :type operation: str
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param func: Wrapped backend's read or write
+        :type func: callable
+
+        :return: Result of the call
+        :rtype: object
+        """
+        start_time = self._clock()
+        try:
+            result = func(driver_filename, *args)
+        except OSError:
+            latency = self._clock() - start_time
+            with self._lock:
+                histogram = self._histogram(operation, driver_filename)
+                histogram.errors += 1
+                histogram.record(latency)
+            raise
+
+        latency = self._clock() - start_time
+        with self._lock:
+            self._histogram(operation, driver_filename).record(latency)
+        return result
+
+    def read(self, driver_filename):
+        return self._timed('read', driver_filename, self.backend.read)
+
+    def write(self, driver_filename, payload):
+        return self._timed('write', driver_filename, self.backend.write, payload)
+
+    def stats(self):
+        """
+        Get the stats of every attribute
+
+        :return: Dict of driver filename to dict of read or write to LatencyHistogram.to_dict
+        :rtype: dict
+        """
+        with self._lock:
+            stats = {}
+            for (driver_filename, operation), histogram in self._histograms.items():
+                stats.setdefault(driver_filename, {})[operation] = histogram.to_dict()
+            return stats
+
+    def close(self):
+        self.backend.close()
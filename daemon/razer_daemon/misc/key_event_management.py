@@ -12,26 +12,29 @@ Each event is in the format of
 * unsigned short code
 * signed int value
 """
+import asyncio
 import datetime
 import fcntl
 import json
 import logging
 import os
-import time
 import threading
 import random
-import select
 import struct
 import subprocess
 
 # pylint: disable=import-error
 from razer.keyboard import KEY_MAPPING, EVENT_MAPPING
 from .macro import MacroKey, MacroRunner, macro_dict_to_obj
+from .scheduler import get_scheduler
 
 EVENT_FORMAT = '@llHHI'
 EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
 
-EPOLL_TIMEOUT = 0.01
+# Max records read per wakeup, anything left over wakes the reader again
+EVENT_READ_RECORDS = 64
+# How often finished macro and media key threads are reaped whilst any exist
+THREAD_CLEANUP_INTERVAL = 5 # Seconds
 
 EVIOCGRAB = 0x40044590
 
@@ -73,9 +76,11 @@ def random_colour_picker(last_choice, iterable):
     return result
 
 
-class KeyWatcher(threading.Thread):
+class KeyWatcher(object):
     """
-    Thread to watch keyboard event files and return keypresses
+    Watch keyboard event files and return keypresses
+
+    The event files are registered as readers on the event loop so this only runs when the kernel has events.
     """
     @staticmethod
     def parse_event_record(data):
@@ -114,101 +119,79 @@ class KeyWatcher(threading.Thread):
         return result
 
     def __init__(self, device_id, event_files, parent):
-        super(KeyWatcher, self).__init__()
-
         self._logger = logging.getLogger('razer.device{0}.keywatcher'.format(device_id))
         self._event_files = event_files
-        self._shutdown = False
         self._parent = parent
+        self._loop = None
 
-        self.open_event_files = [open(event_file, 'rb') for event_file in self._event_files]
+        # Unbuffered, a buffered read can pull in more than one record which leaves the fd idle with events pending
+        self.open_event_files = [open(event_file, 'rb', buffering=0) for event_file in self._event_files]
         # Set open files to non blocking mode
         for event_file in self.open_event_files:
             flags = fcntl.fcntl(event_file.fileno(), fcntl.F_GETFL)
             fcntl.fcntl(event_file.fileno(), fcntl.F_SETFL, flags | os.O_NONBLOCK)
 
-    def run(self):
+    @property
+    def active(self):
         """
-        Main event loop
-        """
-        # Create dict of Event File Descriptor: Event File Object
-        event_file_map = {event_file.fileno(): event_file for event_file in self.open_event_files}
-
-        # Create epoll object
-        poll_object = select.epoll()
-
-        # Register files with select
-        for event_fd in event_file_map.keys():
-            poll_object.register(event_fd, select.EPOLLIN | select.EPOLLPRI)
-
-        # Loop
-        while not self._shutdown:
-            # epoll is nice but it wasn't getting events properly :(
-            # events = poll_object.poll(EPOLL_TIMEOUT)
-            #
-            # if len(events) != 0:
-            #     # pylint: disable=unused-variable
-            #     for event_fd, mask in events:
-            #         key_data = event_file_map[event_fd].read(EVENT_SIZE)
-            #
-            #         date, key_action, key_code = self.parse_event_record(key_data)
-            #
-            #         # Skip if date, key_action and key_code is none as thats a spacer record
-            #         if date is None:
-            #             continue
-            #
-            #         # Now if key is pressed then we record
-            #         if key_action == 'press':
-            #             self._parent.key_action(date, key_code, True)
-            #         elif key_action == 'release':
-            #             self._parent.key_action(date, key_code, False)
-
-            for event_file in self.open_event_files:
-                key_data = event_file.read(EVENT_SIZE)
-
-                if key_data is None:
-                    continue
-
-                date, key_action, key_code = self.parse_event_record(key_data)
-
-                # Skip if date, key_action and key_code is none as thats a spacer record
-                if date is None:
-                    continue
-
-                # Now if key is pressed then we record
-                if key_action == 'press':
-                    self._parent.key_action(date, key_code, True)
-                elif key_action == 'release':
-                    self._parent.key_action(date, key_code, False)
-
-            time.sleep(EPOLL_TIMEOUT)
+        Event files being watched
 
+        :return: Active
+        :rtype: bool
+        """
+        return self._loop is not None
 
-        # Unbind files and close them
-        for event_fd, event_file in event_file_map.items():
-            poll_object.unregister(event_fd)
-            event_file.close()
+    def start(self):
+        """
+        Register the event files with the current event loop
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+            for event_file in self.open_event_files:
+                self._loop.add_reader(event_file.fileno(), self._read_events, event_file)
 
-        poll_object.close()
+    def _read_events(self, event_file):
+        """
+        Event loop reader callback
 
-    @property
-    def shutdown(self):
+        :param event_file: Readable event file
+        :type event_file: io.FileIO
         """
-        Thread shutdown condition
+        try:
+            key_data = event_file.read(EVENT_SIZE * EVENT_READ_RECORDS)
+        except OSError as err:
+            # Device has gone away, the device will be removed by the daemon
+            self._logger.warning("Failed to read %s: %s", event_file.name, err)
+            self._loop.remove_reader(event_file.fileno())
+            return
+
+        # None when nothing is left to read
+        if not key_data:
+            return
+
+        for offset in range(0, len(key_data) - EVENT_SIZE + 1, EVENT_SIZE):
+            date, key_action, key_code = self.parse_event_record(key_data[offset:offset + EVENT_SIZE])
+
+            # Skip if date, key_action and key_code is none as thats a spacer record
+            if date is None:
+                continue
+
+            # Now if key is pressed then we record
+            if key_action == 'press':
+                self._parent.key_action(date, key_code, True)
+            elif key_action == 'release':
+                self._parent.key_action(date, key_code, False)
 
-        :return: Shutdown condition
-        :rtype: bool
+    def close(self):
         """
-        return self._shutdown
-    @shutdown.setter
-    def shutdown(self, value):
+        Unregister the event files and close them
         """
-        Set thread shutdown condition
+        for event_file in self.open_event_files:
+            if self._loop is not None:
+                self._loop.remove_reader(event_file.fileno())
+            event_file.close()
 
-        :param value: Boolean, normally only True would be used
-        :type value: str
-        """
-        self._shutdown = value
+        self._loop = None
 
 class KeyManager(object):
     """
@@ -232,6 +215,7 @@ class KeyManager(object):
         self._parent.register_observer(self)
 
         self._event_files = event_files
+        self._is_closed = False
         self._access_lock = threading.Lock()
         self._keywatcher = KeyWatcher(device_id, event_files, self)
         self._open_event_files = self._keywatcher.open_event_files
@@ -253,7 +237,7 @@ class KeyManager(object):
         self._current_macro_combo = []
 
         self._threads = set()
-        self._clean_counter = 0
+        self._clean_job = None
 
         self._temp_key_store_active = False
         self._temp_key_store = []
@@ -357,11 +341,6 @@ class KeyManager(object):
         except IndexError:
             pass
 
-        # Clean up any threads
-        if self._clean_counter > 20 and len(self._threads) > 0:
-            self._clean_counter = 0
-            self.clean_macro_threads()
-
         try:
             # Convert event ID to key name
             key_name = EVENT_MAPPING[key_id]
@@ -500,24 +479,43 @@ class KeyManager(object):
             new_macro.append(MacroKey(key, delay, state))
 
         self._macros[self._current_macro_bind_key] = new_macro
+        self._macros_changed()
 
     def clean_macro_threads(self):
         """
         Threadless-threadpool
 
         Goes though the threads (macro play jobs) and removed the threads if they have finished.
+        Runs as a scheduled job which is only kept whilst there are threads left.
         #SetMagic
         """
         self._logger.debug("Cleaning up macro threads")
         to_remove = set()
 
         for macro_thread in self._threads:
-            macro_thread.join(timeout=0.05)
             if not macro_thread.is_alive():
+                macro_thread.join()
                 to_remove.add(macro_thread)
 
         self._threads -= to_remove
 
+        if len(self._threads) == 0 and self._clean_job is not None:
+            self._clean_job.cancel()
+            self._clean_job = None
+
+    def _add_thread(self, thread):
+        """
+        Start a thread and make sure the cleanup job is scheduled
+
+        :param thread: Thread
+        :type thread: threading.Thread
+        """
+        thread.start()
+        self._threads.add(thread)
+
+        if self._clean_job is None:
+            self._clean_job = get_scheduler().call_every(THREAD_CLEANUP_INTERVAL, self.clean_macro_threads, name='macro cleanup {0}'.format(self._device_id))
+
     def play_macro(self, macro_key):
         """
         Play macro for a given key
@@ -527,8 +525,7 @@ class KeyManager(object):
         :type macro_key: str
         """
         macro_thread = MacroRunner(self._device_id, macro_key, self._macros[macro_key])
-        macro_thread.start()
-        self._threads.add(macro_thread)
+        self._add_thread(macro_thread)
 
     def play_media_key(self, media_key):
         """
@@ -538,8 +535,7 @@ class KeyManager(object):
         :type media_key: str
         """
         media_key_thread = MediaKeyPress(media_key)
-        media_key_thread.start()
-        self._threads.add(media_key_thread)
+        self._add_thread(media_key_thread)
 
     # Methods to be used with DBus
     def dbus_delete_macro(self, key_name):
@@ -551,6 +547,7 @@ class KeyManager(object):
         """
         try:
             del self._macros[key_name]
+            self._macros_changed()
         except KeyError:
             pass
 
@@ -580,19 +577,38 @@ class KeyManager(object):
         """
         macro_list = [macro_dict_to_obj(json_dict) for json_dict in json.loads(macro_json)]
         self._macros[macro_key] = macro_list
+        self._macros_changed()
+
+    def dbus_set_macros(self, macros_json):
+        """
+        Replace all macros from JSON in the format of dbus_get_macros
+
+        :param macros_json: JSON of macros
+        :type macros_json: str
+        """
+        self._macros = {macro_key: [macro_dict_to_obj(json_dict) for json_dict in macro_combo]
+                        for macro_key, macro_combo in json.loads(macros_json).items()}
+
+    def _macros_changed(self):
+        """
+        Let the device's observers know the macros changed
+        """
+        self._parent.send_state_event('macros', self.dbus_get_macros())
 
     def close(self):
         """
         Cleanup function
         """
-        if self._keywatcher.is_alive():
+        if not self._is_closed:
+            self._is_closed = True
             self._parent.remove_observer(self)
 
             self._logger.debug("Stopping key manager")
-            self._keywatcher.shutdown = True
-            self._keywatcher.join(timeout=2)
-            if self._keywatcher.is_alive():
-                self._logger.error("Could not stop KeyWatcher thread")
+            self._keywatcher.close()
+
+            if self._clean_job is not None:
+                self._clean_job.cancel()
+                self._clean_job = None
 
     def __del__(self):
         self.close()
@@ -622,7 +638,7 @@ class MediaKeyPress(threading.Thread):
     Class to run xdotool to execute media/volume keypresses
     """
     def __init__(self, media_key):
-        super(MediaKeyPress, self).__init__()
+        super(MediaKeyPress, self).__init__(daemon=True)
         if media_key == 'sleep':
             self._media_key = media_key
         else:
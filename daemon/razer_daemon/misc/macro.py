@@ -105,7 +105,8 @@ class MacroRunner(threading.Thread):
     Thread to run macros
     """
     def __init__(self, device_id, macro_bind, macro_data):
-        super(MacroRunner, self).__init__()
+        # Daemon thread so a long macro never holds up shutdown
+        super(MacroRunner, self).__init__(daemon=True)
 
         self._logger = logging.getLogger('razer.device{0}.macro{1}'.format(device_id, macro_bind))
         self._macro_data = macro_data
@@ -0,0 +1,306 @@
+"""
+Razer report protocol
+
+Razer devices are driven with 90 byte USB feature reports, the same ones razercommon.c builds with get_razer_report
+and razer_calculate_crc. The layout is
+
+    status, transaction ID, remaining packets (2 bytes big endian), protocol type, data size, command class,
+    command ID, 80 bytes of arguments, CRC, reserved
+
+The CRC is the XOR of bytes 2 to 87.
+"""
+import collections
+import errno
+import struct
+
+REPORT_LEN = 90
+ARGUMENTS_LEN = 80
+CRC_INDEX = 88
+
+STATUS_NEW = 0x00
+STATUS_BUSY = 0x01
+STATUS_SUCCESSFUL = 0x02
+STATUS_FAILURE = 0x03
+STATUS_TIMEOUT = 0x04
+STATUS_NOT_SUPPORTED = 0x05
+
+DEFAULT_TRANSACTION_ID = 0xFF
+
+# Chroma keyboards
+LED_CLASS = 0x01
+BACKLIGHT_LED = 0x05
+GAME_MODE_LED = 0x08
+CHROMA_ROW_LEN = 0x16
+
+_HEADER = struct.Struct('>BBHBBBB')
+
+RazerReport = collections.namedtuple('RazerReport', ['status', 'transaction_id', 'remaining_packets', 'protocol_type', 'data_size',
+                                                     'command_class', 'command_id', 'arguments', 'crc'])
+
+
+class ReportError(OSError):
+    """
+    Raised when a device answers a report with an error or garbage
+    """
+    def __init__(self, message):
+        super(ReportError, self).__init__(errno.EIO, message)
+
+
+def calculate_crc(report):
+    """
+    Calculate the checksum of a report
+
+    :param report: Report
+    :type report: bytes
+
+    :return: XOR of bytes 2 to 87
+    :rtype: int
+    """
+    crc = 0
+    for byte in report[2:CRC_INDEX]:
+        crc ^= byte
+    return crc
+
+
+def build_report(command_class, command_id, data_size, arguments=b'', transaction_id=DEFAULT_TRANSACTION_ID):
+    """
+    Build a report with its checksum
+
+    :param command_class: Command class
+    :type command_class: int
+
+    :param command_id: Command ID, the top bit is set for requests which get a value
+    :type command_id: int
+
+    :param data_size: Number of argument bytes the device should use
+    :type data_size: int
+
+    :param arguments: Arguments, zero padded to 80 bytes
+    :type arguments: bytes or list of int
+
+    :param transaction_id: Transaction ID
+    :type transaction_id: int
+
+    :return: Report
+    :rtype: bytes
+
+    :raises ValueError: If there are too many arguments
+    """
+    arguments = bytes(arguments)
+    if len(arguments) > ARGUMENTS_LEN:
+        raise ValueError("Report arguments are {0} bytes, at most {1}".format(len(arguments), ARGUMENTS_LEN))
+
+    report = bytearray(REPORT_LEN)
+    _HEADER.pack_into(report, 0, STATUS_NEW, transaction_id, 0, 0, data_size, command_class, command_id)
+    report[_HEADER.size:_HEADER.size + len(arguments)] = arguments
+    report[CRC_INDEX] = calculate_crc(report)
+
+    return bytes(report)
+
+
+def parse_report(report):
+    """
+    Split a report into its fields
+
+    :param report: Report
+    :type report: bytes
+
+    :return: Report fields
+    :rtype: RazerReport
+
+    :raises ReportError: If the report is the wrong length
+    """
+    if len(report) != REPORT_LEN:
+        raise ReportError("Invalid report length {0}".format(len(report)))
+
+    header = _HEADER.unpack_from(report, 0)
+    return RazerReport(*header, arguments=bytes(report[_HEADER.size:CRC_INDEX]), crc=report[CRC_INDEX])
+
+
+def check_response(request, response):
+    """
+    Check a response is a successful answer to the request
+
+    :param request: Request report
+    :type request: bytes
+
+    :param response: Response report
+    :type response: bytes
+
+    :return: Response fields
+    :rtype: RazerReport
+
+    :raises ReportError: If the device failed the request or answered something else
+    """
+    request = parse_report(request)
+    response = parse_report(response)
+
+    if response.status != STATUS_SUCCESSFUL:
+        raise ReportError("Device answered command {0:02x}:{1:02x} with status {2:02x}".format(request.command_class, request.command_id, response.status))
+    if (response.command_class, response.command_id) != (request.command_class, request.command_id):
+        raise ReportError("Device answered command {0:02x}:{1:02x} with {2:02x}:{3:02x}".format(request.command_class, request.command_id,
+                                                                                          response.command_class, response.command_id))
+    return response
+
+
+# Chroma keyboard reports, these match the razer_set_* functions in razerkbd_driver.c
+
+def serial_request():
+    """
+    :return: Report requesting the serial
+    :rtype: bytes
+    """
+    return build_report(0x00, 0x82, 0x16)
+
+
+def firmware_request():
+    """
+    :return: Report requesting the firmware version
+    :rtype: bytes
+    """
+    return build_report(0x00, 0x81, 0x02)
+
+
+def brightness_request(led_id=BACKLIGHT_LED):
+    """
+    :param led_id: LED ID
+    :type led_id: int
+
+    :return: Report requesting the brightness
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x83, 0x03, [LED_CLASS, led_id])
+
+
+def brightness_report(brightness, led_id=BACKLIGHT_LED):
+    """
+    :param brightness: Brightness 0-255
+    :type brightness: int
+
+    :param led_id: LED ID
+    :type led_id: int
+
+    :return: Report setting the brightness
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x03, 0x03, [LED_CLASS, led_id, brightness])
+
+
+def reset_report():
+    """
+    :return: Report turning game mode off, sent before custom mode
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x00, 0x05, [LED_CLASS, GAME_MODE_LED, 0x00])
+
+
+def none_report():
+    """
+    :return: Report turning effects off
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x01, [0x00])
+
+
+def wave_report(direction):
+    """
+    :param direction: 1 or 2
+    :type direction: int
+
+    :return: Report setting the wave effect
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x02, [0x01, direction])
+
+
+def reactive_report(speed, rgb):
+    """
+    :param speed: 1-4
+    :type speed: int
+
+    :param rgb: Red, green and blue
+    :type rgb: bytes
+
+    :return: Report setting the reactive effect
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x05, bytes([0x02, speed]) + bytes(rgb))
+
+
+def breath_report(rgb1=None, rgb2=None):
+    """
+    :param rgb1: First colour, random colours if not given
+    :type rgb1: bytes or None
+
+    :param rgb2: Second colour
+    :type rgb2: bytes or None
+
+    :return: Report setting the breath effect
+    :rtype: bytes
+    """
+    if rgb1 is None:
+        arguments = bytes([0x03, 0x03])
+    elif rgb2 is None:
+        arguments = bytes([0x03, 0x01]) + bytes(rgb1)
+    else:
+        arguments = bytes([0x03, 0x02]) + bytes(rgb1) + bytes(rgb2)
+    return build_report(0x03, 0x0A, 0x08, arguments)
+
+
+def spectrum_report():
+    """
+    :return: Report setting the spectrum effect
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x01, [0x04])
+
+
+def custom_report(frame_id=0x01):
+    """
+    :param frame_id: Data frame ID
+    :type frame_id: int
+
+    :return: Report showing the custom frame
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x02, [0x05, frame_id])
+
+
+def static_report(rgb):
+    """
+    :param rgb: Red, green and blue
+    :type rgb: bytes
+
+    :return: Report setting the static effect
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x04, bytes([0x06]) + bytes(rgb))
+
+
+def clear_row_report(row_index):
+    """
+    :param row_index: Row
+    :type row_index: int
+
+    :return: Report clearing a row
+    :rtype: bytes
+    """
+    return build_report(0x03, 0x0A, 0x02, [0x08, row_index])
+
+
+def key_row_report(row_index, rgb, transaction_id=DEFAULT_TRANSACTION_ID):
+    """
+    :param row_index: Row
+    :type row_index: int
+
+    :param rgb: RGB bytes of each key in the row
+    :type rgb: bytes
+
+    :param transaction_id: Transaction ID
+    :type transaction_id: int
+
+    :return: Report setting a row of the custom frame
+    :rtype: bytes
+    """
+    row_length = len(rgb) // 3
+    return build_report(0x03, 0x0B, row_length * 3 + 4, bytes([0xFF, row_index, 0x00, row_length - 1]) + bytes(rgb), transaction_id)
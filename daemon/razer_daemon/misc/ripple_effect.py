@@ -1,59 +1,41 @@
 """
 Contains the functions and classes to perform ripple effects
 """
+import asyncio
 import datetime
 import logging
-import threading
-import time
 import math
 
 # pylint: disable=import-error
 from razer.keyboard import KeyboardColour
 
-class RippleEffectThread(threading.Thread):
+class RippleEffect(object):
     """
-    Ripple thread.
+    Ripple effect.
 
-    This thread contains the run loop which performs all the circle calculations and generating of the binary payload
+    This coroutine performs all the circle calculations and generating of the binary payload, it only runs whilst the
+    effect is enabled
     """
     def __init__(self, parent, device_number):
-        super(RippleEffectThread, self).__init__()
-
-        self._logger = logging.getLogger('razer.device{0}.ripplethread'.format(device_number))
+        self._logger = logging.getLogger('razer.device{0}.rippleeffect'.format(device_number))
         self._parent = parent
 
         self._colour = (255, 0, 255)
         self._refresh_rate = 0.100
 
-        self._shutdown = False
-        self._active = False
+        self._task = None
 
         self._kerboard_grid = KeyboardColour()
 
     @property
-    def shutdown(self):
-        """
-        Get the shutdown flag
-        """
-        return self._shutdown
-    @shutdown.setter
-    def shutdown(self, value):
-        """
-        Set the shutdown flag
-
-        :param value: Shutdown
-        :type value: bool
-        """
-        self._shutdown = value
-    @property
     def active(self):
         """
-        Get if the thread is active
+        Get if the effect is active
 
         :return: Active
         :rtype: bool
         """
-        return self._active
+        return self._task is not None
     @property
     def key_list(self):
         """
@@ -80,68 +62,83 @@ class RippleEffectThread(threading.Thread):
         else:
             self._colour = colour
         self._refresh_rate = refresh_rate
-        self._active = True
+
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.run())
 
     def disable(self):
         """
         Disable the ripple effect
         """
-        self._active = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
 
-    def run(self):
+    def draw(self):
         """
-        Event loop
+        Draw a frame and send it to the keyboard
         """
         # pylint: disable=too-many-nested-blocks,too-many-branches
         expire_diff = datetime.timedelta(seconds=2)
 
-        # TODO time execution and then sleep for _refresh_rate - time_taken
-        while not self._shutdown:
-            if self._active:
-                # Clear keyboard
-                self._kerboard_grid.reset_rows()
-
-                now = datetime.datetime.now()
-
-                radiuses = []
-
-                for expire_time, (key_row, key_col), colour in self.key_list:
-                    event_time = expire_time - expire_diff
-
-                    now_diff = now - event_time
-
-                    # Current radius is based off a time metric
-                    if self._colour is not None:
-                        colour = self._colour
-                    radiuses.append((key_row, key_col, now_diff.total_seconds() * 12, colour))
-
-                for row in range(0, 7):
-                    for col in range(0, 22):
-                        if row == 0 and col == 20:
-                            continue
-                        if row == 6:
-                            if col != 11:
-                                continue
-                            else:
-                                # To account for logo placement
-                                for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
-                                    radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
-                                    if rad >= radius >= rad-1:
-                                        self._kerboard_grid.set_key_colour(0, 20, colour)
-                                        break
-                        else:
-                            for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
-                                radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
-                                if rad >= radius >= rad-1:
-                                    self._kerboard_grid.set_key_colour(row, col, colour)
-                                    break
-
-                payload = self._kerboard_grid.get_total_binary()
-
-                self._parent.set_rgb_matrix(payload)
-                self._parent.refresh_keyboard()
-
-            time.sleep(self._refresh_rate)
+        # Clear keyboard
+        self._kerboard_grid.reset_rows()
+
+        now = datetime.datetime.now()
+
+        radiuses = []
+
+        for expire_time, (key_row, key_col), colour in self.key_list:
+            event_time = expire_time - expire_diff
+
+            now_diff = now - event_time
+
+            # Current radius is based off a time metric
+            if self._colour is not None:
+                colour = self._colour
+            radiuses.append((key_row, key_col, now_diff.total_seconds() * 12, colour))
+
+        for row in range(0, 7):
+            for col in range(0, 22):
+                if row == 0 and col == 20:
+                    continue
+                if row == 6:
+                    if col != 11:
+                        continue
+                    else:
+                        # To account for logo placement
+                        for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
+                            radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
+                            if rad >= radius >= rad-1:
+                                self._kerboard_grid.set_key_colour(0, 20, colour)
+                                break
+                else:
+                    for cirlce_centre_row, circle_centre_col, rad, colour in radiuses:
+                        radius = math.sqrt(math.pow(cirlce_centre_row-row, 2) + math.pow(circle_centre_col-col, 2))
+                        if rad >= radius >= rad-1:
+                            self._kerboard_grid.set_key_colour(row, col, colour)
+                            break
+
+        payload = self._kerboard_grid.get_total_binary()
+
+        self._parent.draw_frame(payload)
+
+    async def run(self):
+        """
+        Draw frames at the refresh rate until disabled
+        """
+        loop = asyncio.get_event_loop()
+
+        while True:
+            start_time = loop.time()
+            try:
+                self.draw()
+            # pylint: disable=broad-except
+            except Exception as err:
+                self._logger.exception("Failed to draw ripple frame", exc_info=err)
+
+            # Take the time spent drawing off the wait so the frame rate holds
+            await asyncio.sleep(max(0, self._refresh_rate - (loop.time() - start_time)))
 
 class RippleManager(object):
     """
@@ -154,8 +151,7 @@ class RippleManager(object):
 
         self._is_closed = False
 
-        self._ripple_thread = RippleEffectThread(self, device_number)
-        self._ripple_thread.start()
+        self._ripple_effect = RippleEffect(self, device_number)
 
     @property
     def key_list(self):
@@ -186,6 +182,19 @@ class RippleManager(object):
         """
         self._parent.setCustom()
 
+    def draw_frame(self, payload):
+        """
+        Set the LED matrix and show it, in one call if the device has setFrame
+
+        :param payload: Binary payload
+        :type payload: bytes
+        """
+        if hasattr(self._parent, 'setFrame'):
+            self._parent.setFrame(payload)
+        else:
+            self.set_rgb_matrix(payload)
+            self.refresh_keyboard()
+
     def notify(self, msg):
         """
         Receive notificatons from the device (we only care about effects)
@@ -204,25 +213,22 @@ class RippleManager(object):
             if msg[2] == 'setRipple':
                 # Get (red, green, blue) tuple (args 3:6), and refreshrate arg 6
                 self._parent.key_manager.temp_key_store_state = True
-                self._ripple_thread.enable(msg[3:6], msg[6])
+                self._ripple_effect.enable(msg[3:6], msg[6])
             else:
                 # Effect other than ripple so stop
-                self._ripple_thread.disable()
+                self._ripple_effect.disable()
 
                 self._parent.key_manager.temp_key_store_state = False
 
     def close(self):
         """
-        Close the manager, stop ripple thread
+        Close the manager, stop ripple effect
         """
         if not self._is_closed:
             self._logger.debug("Closing Ripple Manager")
             self._is_closed = True
 
-            self._ripple_thread.shutdown = True
-            self._ripple_thread.join(timeout=2)
-            if self._ripple_thread.is_alive():
-                self._logger.error("Could not stop RippleEffect thread")
+            self._ripple_effect.disable()
 
     def __del__(self):
         self.close()
@@ -0,0 +1,353 @@
+"""
+Central scheduler for periodic and delayed daemon work
+
+Jobs are kept in a heap ordered by due time and a single event loop timer is armed for the earliest one, so the
+process only wakes when something is due. Jobs due within the coalescing window of each other are run in the same
+wakeup.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+COALESCE_WINDOW = 0.02 # Seconds
+
+
+class JobStats(object):
+    """
+    Run time statistics of a job
+    """
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+        # How late the last run started, includes jitter
+        self.last_lateness = 0.0
+
+    def record(self, run_time, lateness, failed=False):
+        """
+        Record a run
+
+        :param run_time: Seconds the callback took
+        :type run_time: float
+
+        :param lateness: Seconds between the due time and the start of the run
+        :type lateness: float
+
+        :param failed: Callback raised
+        :type failed: bool
+        """
+        self.runs += 1
+        if failed:
+            self.failures += 1
+        self.total_time += run_time
+        self.max_time = max(self.max_time, run_time)
+        self.last_time = run_time
+        self.last_lateness = lateness
+
+    def to_dict(self):
+        """
+        Get the stats as a dict
+
+        :return: Stats
+        :rtype: dict
+        """
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'total_time': self.total_time,
+            'mean_time': self.total_time / self.runs if self.runs else 0.0,
+            'max_time': self.max_time,
+            'last_time': self.last_time,
+            'last_lateness': self.last_lateness,
+        }
+
+
+class Job(object):
+    """
+    Scheduled job, returned by the scheduler so it can be cancelled
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, scheduler, job_id, name, callback, args, interval, jitter):
+        self._scheduler = scheduler
+
+        # Names repeat, like the battery job of two mice of the same model
+        self.job_id = job_id
+        self.name = name
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.jitter = jitter
+
+        self.due = None
+        # Due time before jitter, periodic jobs keep their cadence from this
+        self.nominal_due = None
+        self.cancelled = False
+        self.stats = JobStats()
+
+    @property
+    def periodic(self):
+        """
+        Job repeats
+
+        :return: True if periodic
+        :rtype: bool
+        """
+        return self.interval is not None
+
+    def cancel(self):
+        """
+        Cancel the job
+        """
+        self._scheduler.cancel(self)
+
+
+class Scheduler(object):
+    """
+    Heap based scheduler running on an asyncio event loop
+    """
+    def __init__(self, loop=None, coalesce_window=COALESCE_WINDOW):
+        self._logger = logging.getLogger('razer.scheduler')
+
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self._coalesce_window = coalesce_window
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._job_ids = itertools.count(1)
+        self._jobs = []
+
+        self._timer = None
+        self._timer_due = None
+
+    @property
+    def jobs(self):
+        """
+        Active jobs
+
+        :return: Jobs
+        :rtype: list of Job
+        """
+        return list(self._jobs)
+
+    def call_later(self, delay, callback, *args, name=None):
+        """
+        Run a callback once after a delay
+
+        :param delay: Seconds
+        :type delay: float
+
+        :param callback: Function to run
+        :type callback: callable
+
+        :param name: Name used in stats and logs, defaults to the callback's name
+        :type name: str or None
+
+        :return: Job
+        :rtype: Job
+        """
+        job = Job(self, next(self._job_ids), name or getattr(callback, '__name__', repr(callback)), callback, args, None, 0)
+        self._push(job, self._loop.time() + delay)
+        return job
+
+    def call_every(self, interval, callback, *args, name=None, jitter=0, delay=None):
+        """
+        Run a callback periodically
+
+        :param interval: Seconds between runs
+        :type interval: float
+
+        :param callback: Function to run
+        :type callback: callable
+
+        :param name: Name used in stats and logs, defaults to the callback's name
+        :type name: str or None
+
+        :param jitter: Up to this many seconds are randomly added to each run so jobs spread out
+        :type jitter: float
+
+        :param delay: Seconds until the first run, defaults to the interval
+        :type delay: float or None
+
+        :return: Job
+        :rtype: Job
+        """
+        if delay is None:
+            delay = interval
+
+        job = Job(self, next(self._job_ids), name or getattr(callback, '__name__', repr(callback)), callback, args, interval, jitter)
+        job.nominal_due = self._loop.time() + delay
+        self._push(job, job.nominal_due + self._jitter(job))
+        return job
+
+    def cancel(self, job):
+        """
+        Cancel a job
+
+        :param job: Job
+        :type job: Job
+        """
+        if job.cancelled:
+            return
+
+        job.cancelled = True
+        if job in self._jobs:
+            self._jobs.remove(job)
+
+        self._heap = [entry for entry in self._heap if entry[2] is not job]
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def stats(self):
+        """
+        Get the run time stats of all active jobs
+
+        :return: Dict of job ID to stats, which include the job name
+        :rtype: dict
+        """
+        return {job.job_id: dict(job.stats.to_dict(), name=job.name) for job in self._jobs}
+
+    def close(self):
+        """
+        Cancel all jobs
+        """
+        for job in self._jobs:
+            job.cancelled = True
+        self._jobs.clear()
+        self._heap.clear()
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_due = None
+
+    @staticmethod
+    def _jitter(job):
+        """
+        Random offset for a run
+
+        :param job: Job
+        :type job: Job
+
+        :return: Seconds
+        :rtype: float
+        """
+        if job.jitter > 0:
+            return random.uniform(0, job.jitter)
+        return 0
+
+    def _push(self, job, due):
+        """
+        Add a job to the heap
+
+        :param job: Job
+        :type job: Job
+
+        :param due: Loop time the job is due
+        :type due: float
+        """
+        job.due = due
+        if job not in self._jobs:
+            self._jobs.append(job)
+        heapq.heappush(self._heap, (due, next(self._counter), job))
+        self._arm()
+
+    def _arm(self):
+        """
+        Make sure the loop timer fires for the earliest job
+        """
+        if not self._heap:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                self._timer_due = None
+            return
+
+        due = self._heap[0][0]
+        if self._timer is not None:
+            if self._timer_due <= due:
+                return
+            self._timer.cancel()
+
+        self._timer_due = due
+        self._timer = self._loop.call_at(due, self._run_due)
+
+    def _run_due(self):
+        """
+        Run every job that is due, or will be within the coalescing window
+        """
+        self._timer = None
+        self._timer_due = None
+
+        now = self._loop.time()
+        # Collected first so a periodic job runs at most once per wakeup
+        due_jobs = []
+        while self._heap and self._heap[0][0] <= now + self._coalesce_window:
+            due, _, job = heapq.heappop(self._heap)
+            due_jobs.append((due, job))
+
+        for due, job in due_jobs:
+            if job.cancelled:
+                continue
+            self._run_job(job, due, now)
+
+            if job.periodic and not job.cancelled:
+                # Stay on the original cadence unless so far behind a run would be missed
+                job.nominal_due = max(job.nominal_due + job.interval, now)
+                job.due = job.nominal_due + self._jitter(job)
+                heapq.heappush(self._heap, (job.due, next(self._counter), job))
+            elif not job.periodic and job in self._jobs:
+                self._jobs.remove(job)
+
+        self._arm()
+
+    def _run_job(self, job, due, now):
+        """
+        Run a job and record its stats
+
+        :param job: Job
+        :type job: Job
+
+        :param due: Loop time the job was due
+        :type due: float
+
+        :param now: Loop time of this wakeup
+        :type now: float
+        """
+        failed = False
+        start_time = time.perf_counter()
+        try:
+            job.callback(*job.args)
+        # pylint: disable=broad-except
+        except Exception as err:
+            failed = True
+            self._logger.exception("Job %s failed", job.name, exc_info=err)
+        run_time = time.perf_counter() - start_time
+
+        job.stats.record(run_time, max(0.0, now - due), failed)
+
+
+_SCHEDULER = None
+
+
+def get_scheduler():
+    """
+    Get the scheduler of the current event loop
+
+    :return: Scheduler
+    :rtype: Scheduler
+    """
+    # pylint: disable=global-statement,protected-access
+    global _SCHEDULER
+
+    loop = asyncio.get_event_loop()
+    if _SCHEDULER is None or _SCHEDULER._loop is not loop:
+        _SCHEDULER = Scheduler(loop)
+
+    return _SCHEDULER
@@ -1,9 +1,7 @@
 """
-Screensaver thread which watches dbus to see if screensaver is active
+Screensaver monitor which watches dbus to see if screensaver is active
 """
 import logging
-import threading
-import time
 import dbus
 import dbus.exceptions
 
@@ -12,54 +10,31 @@ DBUS_OPTIONS = (
     ('org.mate.ScreenSaver', '/org/mate/ScreenSaver', 'org.mate.ScreenSaver'),
 )
 
+SIGNAL_NAME = 'ActiveChanged'
 
-class ScreensaverThread(threading.Thread):
+
+class ScreensaverMonitor(object):
     """
-    ScreensaverThread
+    ScreensaverMonitor
 
-    This thread polls (com.canonical.Unity, /org/gnome/ScreenSaver, org.gnome.ScreenSaver) to see
-    if the screensaver is active, if its inactive it will call the parent function to suspend all
-    the devices
+    Listens for the ActiveChanged signal of (com.canonical.Unity, /org/gnome/ScreenSaver, org.gnome.ScreenSaver) and
+    the other screensavers, when the screensaver becomes active it will call the parent function to suspend all the
+    devices. Signals arrive with the rest of the DBus traffic so nothing runs until the screensaver changes, and a
+    screensaver which starts after the daemon is picked up as the bus delivers its signals by name.
     """
     def __init__(self, parent, active=True):
-        super(ScreensaverThread, self).__init__()
-
         self.logger = logging.getLogger('razer.screensaver')
-        self.logger.info("Initialising DBus Screensaver Thread")
+        self.logger.info("Initialising DBus Screensaver Monitor")
 
         self._active = active
-        self._shutdown = False
-        self._dbus_interface = None
         self._parent = parent
-
-    def load_dbus(self):
-        """
-        Setup the connection to DBUS
-        """
-        self.logger.info("Initialising DBus screensaver object")
-
-        try:
-            session_bus = dbus.SessionBus()
-
-            for bus_name, object_path, interface_name in DBUS_OPTIONS:
-                try:
-                    screensaver_object = session_bus.get_object(bus_name, object_path)
-                    self._dbus_interface = dbus.Interface(screensaver_object, interface_name)
-                    break
-                except dbus.exceptions.DBusException:
-                    pass
-            else:
-                self.logger.warning("Could not find screensaver DBus")
-                self._dbus_interface = None
-
-        except dbus.exceptions.DBusException as err:
-            self.logger.exception("Caught exception whilst trying to get screensaver DBus", exc_info=err)
-            self._dbus_interface = None
+        self._suspended = False
+        self._signal_matches = []
 
     @property
     def active(self):
         """
-        Screensaver thread active
+        Screensaver monitor active
 
         This property defines wether or not the screensaver function is active
         :return: Active
@@ -69,68 +44,72 @@ class ScreensaverThread(threading.Thread):
     @active.setter
     def active(self, active_state):
         """
-        Screensaver thread active
+        Screensaver monitor active
 
         :param active_state: Active
         :type active_state: bool
         """
         self._active = active_state
     @property
-    def shutdown(self):
+    def running(self):
         """
-        Threads loop condition
+        Listening for the screensaver's signals
 
-        Set to true to stop the thread
-        :return: Shutdown state
+        :return: Running
         :rtype: bool
         """
-        return self._shutdown
-    @shutdown.setter
-    def shutdown(self, state):
+        return len(self._signal_matches) > 0
+
+    def start(self):
         """
-        Thread loop condition
+        Listen for the screensaver's signals
+        """
+        if self._signal_matches:
+            return
+
+        try:
+            session_bus = dbus.SessionBus()
+
+            for bus_name, object_path, interface_name in DBUS_OPTIONS:
+                self._signal_matches.append(session_bus.add_signal_receiver(self.screensaver_active_changed, signal_name=SIGNAL_NAME, dbus_interface=interface_name,
+                                                                            bus_name=bus_name, path=object_path))
+        except dbus.exceptions.DBusException as err:
+            self.logger.exception("Caught exception whilst listening for the screensaver", exc_info=err)
+            self.close()
 
-        :param state: Shutdown state
-        :type state: bool
+    def close(self):
         """
-        self._shutdown = state
+        Stop the monitor
+        """
+        if self._signal_matches:
+            for signal_match in self._signal_matches:
+                signal_match.remove()
+            self._signal_matches = []
+            self.logger.info("Screensaver Monitor finished")
 
-    def run(self):
+    def screensaver_active_changed(self, screensaver_active):
         """
-        Thread run loop
+        Suspend or resume the devices when the screensaver state changes, the signal handler
+
+        :param screensaver_active: Screensaver is active
+        :type screensaver_active: bool
         """
-        suspended = False
-
-        if self._dbus_interface is None:
-            # Sleep for a while as it takes time for screensaver to start
-            time.sleep(2)
-            self.load_dbus()
-
-        while not self._shutdown:
-            if self._active:
-                try:
-                    if self._dbus_interface is None:
-                        self.load_dbus()
-                    else:
-                        screensaver_active = self._dbus_interface.GetActive()
-                        if screensaver_active:
-                            # Screensaver is active
-
-                            if not suspended:
-                                suspended = True
-                                self.logger.info("Suspend screensaver")
-                                self._parent.suspend_devices()
-                        else:
-                            if suspended:
-                                suspended = False
-                                self.logger.info("Resume screensaver")
-                                self._parent.resume_devices()
-                    # pylint: disable=broad-except
-                except Exception as err:
-                    self.logger.exception("Caught exception in run loop", exc_info=err)
-                    self._dbus_interface = None
-
-            # Sleep
-            time.sleep(0.1)
-
-        self.logger.info("Screensaver Thread finished")
+        if not self._active:
+            return
+
+        try:
+            if screensaver_active:
+                # Screensaver is active
+
+                if not self._suspended:
+                    self._suspended = True
+                    self.logger.info("Suspend screensaver")
+                    self._parent.suspend_devices()
+            else:
+                if self._suspended:
+                    self._suspended = False
+                    self.logger.info("Resume screensaver")
+                    self._parent.resume_devices()
+            # pylint: disable=broad-except
+        except Exception as err:
+            self.logger.exception("Caught exception whilst handling the screensaver", exc_info=err)
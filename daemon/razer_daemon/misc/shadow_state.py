@@ -0,0 +1,197 @@
+"""
+Shadow copy of readable device settings
+
+Reading brightness or a mode LED from the driver is a USB round trip, so the last value is kept in memory. Setters
+update it after writing the driver and getters are answered from it. A periodic reconciliation pass reads the driver
+again to catch anything changed behind the daemon's back, like the device resetting.
+"""
+import asyncio
+import collections
+import logging
+import threading
+
+from .scheduler import get_scheduler
+
+SHADOW_RECONCILE_INTERVAL = 60 # Seconds
+SHADOW_RECONCILE_JITTER = 5 # Seconds
+
+
+class ShadowState(object):
+    """
+    Last known driver values of a device
+
+    read_func reads a driver file and returns its contents. Reads can wait on the device's queued writes, so the
+    periodic reconciliation runs on the executor when one is given instead of holding up the main loop.
+    """
+    def __init__(self, read_func, device_number, executor=None):
+        self._logger = logging.getLogger('razer.device{0}.shadow'.format(device_number))
+
+        self._read_func = read_func
+        self._device_number = device_number
+        self._executor = executor
+        # Name to (driver file, parse function)
+        self._attributes = {}
+        self._values = {}
+        # Bumped by set, so a read which started before a setter doesnt overwrite its value
+        self._generations = collections.Counter()
+        self._lock = threading.Lock()
+        self._reconcile_job = None
+        self._reconcile_future = None
+
+    @property
+    def attributes(self):
+        """
+        Names of the shadowed attributes
+
+        :return: Attribute names
+        :rtype: list of str
+        """
+        return sorted(self._attributes)
+
+    def add(self, name, driver_filename, parse_func):
+        """
+        Shadow a driver file, its current value is read straight away
+
+        :param name: Attribute name
+        :type name: str
+
+        :param driver_filename: Name of driver file
+        :type driver_filename: str
+
+        :param parse_func: Converts the file's contents to the stored value
+        :type parse_func: callable
+        """
+        self._attributes[name] = (driver_filename, parse_func)
+
+        try:
+            self._read(name)
+        except (OSError, ValueError) as err:
+            # Read again the first time its asked for
+            self._logger.warning("Could not read %s: %s", name, err)
+
+    def _read(self, name):
+        """
+        Read an attribute from the driver and store it
+
+        :param name: Attribute name
+        :type name: str
+
+        :return: Value
+        :rtype: object
+        """
+        driver_filename, parse_func = self._attributes[name]
+        generation = self._generations[name]
+        value = parse_func(self._read_func(driver_filename).strip())
+
+        with self._lock:
+            if self._generations[name] == generation:
+                self._values[name] = value
+        return value
+
+    def get(self, name, force_refresh=False):
+        """
+        Get an attribute
+
+        :param name: Attribute name
+        :type name: str
+
+        :param force_refresh: Read the driver instead of using the shadow copy
+        :type force_refresh: bool
+
+        :return: Value
+        :rtype: object
+
+        :raises KeyError: If the attribute isn't shadowed
+        """
+        if name not in self._attributes:
+            raise KeyError("{0} is not shadowed".format(name))
+
+        if force_refresh or name not in self._values:
+            return self._read(name)
+        return self._values[name]
+
+    def set(self, name, value):
+        """
+        Update an attribute, called after the driver has been written
+
+        :param name: Attribute name
+        :type name: str
+
+        :param value: Value as it would be parsed from the driver
+        :type value: object
+        """
+        if name in self._attributes:
+            with self._lock:
+                self._values[name] = value
+                self._generations[name] += 1
+
+    def reconcile(self):
+        """
+        Read every attribute from the driver and fix up any that drifted
+
+        :return: Names of attributes which had changed
+        :rtype: list of str
+        """
+        drifted = []
+
+        for name in self.attributes:
+            old_value = self._values.get(name)
+            try:
+                new_value = self._read(name)
+            except (OSError, ValueError) as err:
+                self._logger.debug("Could not reconcile %s: %s", name, err)
+                continue
+
+            if old_value is not None and old_value != new_value:
+                self._logger.info("%s drifted from %s to %s", name, old_value, new_value)
+                drifted.append(name)
+
+        return drifted
+
+    def _start_reconcile(self):
+        """
+        Reconcile on the executor, or straight away without one
+        """
+        if self._executor is None:
+            self.reconcile()
+            return
+
+        # A slow device can still be busy with the last pass
+        if self._reconcile_future is not None and not self._reconcile_future.done():
+            return
+
+        self._reconcile_future = asyncio.get_event_loop().run_in_executor(self._executor, self.reconcile)
+        self._reconcile_future.add_done_callback(self._reconciled)
+
+    def _reconciled(self, future):
+        """
+        Log a reconciliation pass which failed
+
+        :param future: Names of attributes which had changed
+        :type future: asyncio.Future
+        """
+        if future.cancelled():
+            return
+
+        if future.exception() is not None:
+            self._logger.warning("Could not reconcile: %s", future.exception())
+
+    def start(self):
+        """
+        Start reconciling periodically
+        """
+        if self._reconcile_job is None and self._attributes:
+            self._reconcile_job = get_scheduler().call_every(SHADOW_RECONCILE_INTERVAL, self._start_reconcile,
+                                                             name='reconcile device{0}'.format(self._device_number),
+                                                             jitter=SHADOW_RECONCILE_JITTER)
+
+    def close(self):
+        """
+        Stop reconciling
+        """
+        if self._reconcile_job is not None:
+            self._reconcile_job.cancel()
+            self._reconcile_job = None
+
+        # A pass which is still queued is cancelled with the executor
+        self._reconcile_future = None
@@ -0,0 +1,79 @@
+"""
+Bounded time shutdown
+
+Components are closed in parallel on daemon threads and waited on under one global deadline, so shutdown time does
+not grow with the number of devices and a stuck component cannot hold up the exit.
+"""
+import logging
+import threading
+import time
+
+SHUTDOWN_DEADLINE = 5.0 # Seconds
+
+
+class ShutdownCoordinator(object):
+    """
+    Runs close functions in parallel and reports the ones which miss the deadline
+    """
+    def __init__(self, deadline=SHUTDOWN_DEADLINE):
+        self._logger = logging.getLogger('razer.shutdown')
+        self._deadline = deadline
+        self._components = []
+
+    def add(self, name, close_func):
+        """
+        Add a component to be closed
+
+        :param name: Name used in the log
+        :type name: str
+
+        :param close_func: Function which closes the component
+        :type close_func: callable
+        """
+        self._components.append((name, close_func))
+
+    def _close_component(self, name, close_func):
+        """
+        Thread target, closes a component and logs how long it took
+
+        :param name: Component name
+        :type name: str
+
+        :param close_func: Function which closes the component
+        :type close_func: callable
+        """
+        start_time = time.monotonic()
+        try:
+            close_func()
+        # pylint: disable=broad-except
+        except Exception as err:
+            self._logger.exception("Failed to close %s", name, exc_info=err)
+
+        self._logger.debug("Closed %s in %.3fs", name, time.monotonic() - start_time)
+
+    def run(self):
+        """
+        Close all the components and wait until they finish or the deadline passes
+
+        :return: Names of the components which missed the deadline
+        :rtype: list of str
+        """
+        deadline = time.monotonic() + self._deadline
+
+        threads = []
+        for name, close_func in self._components:
+            # Daemon threads so anything that misses the deadline does not stop the process exiting
+            thread = threading.Thread(target=self._close_component, args=(name, close_func), name='close {0}'.format(name), daemon=True)
+            thread.start()
+            threads.append((name, thread))
+
+        missed = []
+        for name, thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+            if thread.is_alive():
+                missed.append(name)
+
+        if len(missed) > 0:
+            self._logger.warning("Shutdown deadline of %.1fs missed by: %s", self._deadline, ', '.join(missed))
+
+        return missed
@@ -0,0 +1,176 @@
+"""
+Startup profiling
+
+Records how long each startup phase takes and what the imports cost so it can be written to the log. This module
+must stay free of heavy imports as it is loaded before the rest of the daemon.
+"""
+import builtins
+import contextlib
+import sys
+import threading
+import time
+
+IMPORT_REPORT_LIMIT = 15
+
+
+class StartupProfiler(object):
+    """
+    Collects startup phase timings and import costs
+
+    When disabled every method is a cheap no-op so the daemon can call it unconditionally.
+    """
+    def __init__(self, enabled=False, start_time=None):
+        self._enabled = enabled
+        if start_time is None:
+            start_time = time.monotonic()
+        self._start_time = start_time
+
+        self._phases = []
+        self._marks = []
+        self._imports = []
+
+        self._original_import = None
+        self._import_depth = 0
+        self._main_thread = threading.current_thread()
+
+        self._logger = None
+
+    @property
+    def enabled(self):
+        """
+        Profiling enabled
+
+        :return: Enabled
+        :rtype: bool
+        """
+        return self._enabled
+
+    @property
+    def elapsed(self):
+        """
+        Seconds since startup
+
+        :return: Seconds
+        :rtype: float
+        """
+        return time.monotonic() - self._start_time
+
+    def track_imports(self):
+        """
+        Start timing imports of modules which are not loaded yet
+        """
+        if self._enabled and self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def stop_tracking_imports(self):
+        """
+        Restore the original import function
+        """
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """
+        Replacement for builtins.__import__ that records the inclusive time of new absolute imports
+        """
+        # pylint: disable=redefined-builtin
+        if level != 0 or name in sys.modules or threading.current_thread() is not self._main_thread:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        depth = self._import_depth
+        self._import_depth += 1
+        start_time = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._import_depth -= 1
+            self._imports.append((name, time.perf_counter() - start_time, depth))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Time a startup phase
+
+        Phases which finish after report() are logged straight away
+
+        :param name: Phase name
+        :type name: str
+        """
+        if not self._enabled:
+            yield
+            return
+
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            phase = (name, start_time - self._start_time, time.monotonic() - start_time)
+            if self._logger is not None:
+                self._log_phase(*phase)
+            else:
+                self._phases.append(phase)
+
+    def _log_phase(self, name, start, duration):
+        """
+        Log a phase timing
+
+        :param name: Phase name
+        :type name: str
+
+        :param start: Seconds after startup the phase started
+        :type start: float
+
+        :param duration: Seconds the phase took
+        :type duration: float
+        """
+        self._logger.info("Startup profile: phase %-24s started %.3fs took %.3fs", name, start, duration)
+
+    def mark(self, name):
+        """
+        Record a point in time, like a device being published
+
+        Marks made after report() are logged straight away
+
+        :param name: Event name
+        :type name: str
+        """
+        if not self._enabled:
+            return
+
+        if self._logger is not None:
+            self._logger.info("Startup profile: %s at %.3fs", name, self.elapsed)
+        else:
+            self._marks.append((name, self.elapsed))
+
+    def report(self, logger):
+        """
+        Write the collected timings to the log
+
+        :param logger: Logger
+        :type logger: logging.Logger
+        """
+        if not self._enabled:
+            return
+
+        self.stop_tracking_imports()
+        self._logger = logger
+
+        for phase in self._phases:
+            self._log_phase(*phase)
+        self._phases.clear()
+
+        for name, when in self._marks:
+            logger.info("Startup profile: %s at %.3fs", name, when)
+        self._marks.clear()
+
+        # Only top level imports count towards the total, nested ones are already included in their parents time
+        total = sum(entry[1] for entry in self._imports if entry[2] == 0)
+        logger.info("Startup profile: %d new imports took %.3fs", len(self._imports), total)
+
+        # Times include nested imports so the parents of expensive modules show up too
+        for name, duration, depth in sorted(self._imports, key=lambda entry: entry[1], reverse=True)[:IMPORT_REPORT_LIMIT]:
+            logger.info("Startup profile: import %-30s %.3fs (depth %d)", name, duration, depth)
+
+        logger.info("Startup profile: serving DBus %.3fs after start", self.elapsed)
@@ -0,0 +1,314 @@
+"""
+Daemon state checkpoint
+
+Keeps the last effect, brightness, mode LED states and macros of every device keyed by serial and writes them to the
+run directory, so a restarted daemon can put the devices back how they were. The device ID to serial mapping is only
+trusted within the same boot, as IDs are reused, so known devices can be published without probing them again.
+"""
+import json
+import logging
+import os
+import tempfile
+
+from .scheduler import get_scheduler
+
+CHECKPOINT_FILENAME = 'state.json'
+CHECKPOINT_VERSION = 1
+# Changes are batched up, effects can be set many times a second
+CHECKPOINT_WRITE_DELAY = 2 # Seconds
+BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+
+# Recorded state setters, applied in this order before the effect
+STATE_METHODS = ('setBrightness', 'setGameMode', 'setMacroMode', 'setMacroEffect')
+
+
+def get_boot_id():
+    """
+    Get the kernel's boot ID
+
+    :return: Boot ID or None if unavailable
+    :rtype: str or None
+    """
+    try:
+        with open(BOOT_ID_PATH, 'r') as boot_id_file:
+            return boot_id_file.read().strip()
+    except OSError:
+        return None
+
+
+class StateTracker(object):
+    """
+    Device observer which feeds effect and state messages to the checkpoint
+    """
+    def __init__(self, checkpoint, parent):
+        self._checkpoint = checkpoint
+        self._parent = parent
+        self._parent.register_observer(self)
+
+    def close(self):
+        """
+        Stop recording
+        """
+        self._parent.remove_observer(self)
+
+    def notify(self, msg):
+        """
+        Receive notificatons from the device
+
+        :param msg: Notification
+        :type msg: tuple
+        """
+        if not isinstance(msg, tuple) or len(msg) < 3:
+            return
+
+        if msg[0] == 'effect':
+            # Effects from other devices only arrive when syncing and get applied to this device too
+            if msg[1] is self._parent or hasattr(self._parent, msg[2]):
+                self._checkpoint.record_effect(self._parent.serial, msg[2], msg[3:])
+        elif msg[0] == 'state' and msg[1] is self._parent:
+            self._checkpoint.record_state(self._parent.serial, msg[2], msg[3:])
+
+
+class StateCheckpoint(object):
+    """
+    Per serial device state, persisted to a JSON file
+    """
+    def __init__(self, run_dir, write_delay=CHECKPOINT_WRITE_DELAY):
+        self._logger = logging.getLogger('razer.checkpoint')
+
+        self._path = os.path.join(run_dir, CHECKPOINT_FILENAME)
+        self._write_delay = write_delay
+        self._write_job = None
+
+        self._boot_id = get_boot_id()
+        self._checkpoint_boot_id = None
+        self._devices = {}
+
+        self.load()
+
+    @property
+    def path(self):
+        """
+        Checkpoint file path
+
+        :return: Path
+        :rtype: str
+        """
+        return self._path
+
+    def load(self):
+        """
+        Read the checkpoint file, a missing or unreadable file just means starting afresh
+        """
+        try:
+            with open(self._path, 'r') as checkpoint_file:
+                data = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as err:
+            self._logger.warning("Could not read state checkpoint %s: %s", self._path, err)
+            return
+
+        if not isinstance(data, dict) or data.get('version') != CHECKPOINT_VERSION:
+            self._logger.warning("Ignoring state checkpoint %s with an unknown format", self._path)
+            return
+
+        self._checkpoint_boot_id = data.get('boot_id')
+        self._devices = data.get('devices', {})
+        self._logger.info("Loaded state of %d devices from checkpoint", len(self._devices))
+
+    def known_serial(self, device_id, class_name):
+        """
+        Get the serial a device ID had when the checkpoint was written in this boot
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param class_name: Name of the hardware class the ID matched
+        :type class_name: str
+
+        :return: Serial or None if the device is not known
+        :rtype: str or None
+        """
+        if self._boot_id is None or self._checkpoint_boot_id != self._boot_id:
+            return None
+
+        for serial, state in self._devices.items():
+            if state.get('device_id') == device_id and state.get('class') == class_name:
+                return serial
+
+        return None
+
+    def attach(self, device_id, razer_device):
+        """
+        Start recording the state of a device
+
+        :param device_id: Device ID like 0000:0000:0000.0000
+        :type device_id: str
+
+        :param razer_device: Device
+        :type razer_device: razer_daemon.hardware.device_base.RazerDevice
+
+        :return: Tracker, closed with the device
+        :rtype: StateTracker
+        """
+        state = self._devices.setdefault(razer_device.serial, {})
+        state['device_id'] = device_id
+        state['class'] = razer_device.__class__.__name__
+        self.mark_dirty()
+
+        return StateTracker(self, razer_device)
+
+    def restore(self, razer_device):
+        """
+        Apply the checkpointed state of a device in one pass
+
+        :param razer_device: Device
+        :type razer_device: razer_daemon.hardware.device_base.RazerDevice
+
+        :return: True if there was state to restore
+        :rtype: bool
+        """
+        state = self._devices.get(razer_device.serial)
+        if not state:
+            return False
+
+        # Notifications stay on so the device's own observers, like the ripple manager, pick the effect up. Call
+        # this before adding the device to the collection so nothing is synced to the other devices.
+        for method_name in STATE_METHODS:
+            if method_name in state.get('state', {}):
+                self._apply(razer_device, method_name, state['state'][method_name])
+
+        effect = state.get('effect')
+        if effect is not None:
+            effect_name, args = effect[0], effect[1:]
+            # Random colour ripples are sent as setRipple with no colour
+            if effect_name == 'setRipple' and args[0] is None:
+                effect_name, args = 'setRippleRandomColour', args[3:]
+            self._apply(razer_device, effect_name, args)
+
+        if 'macros' in state and hasattr(razer_device, 'key_manager'):
+            try:
+                razer_device.key_manager.dbus_set_macros(state['macros'])
+            except (KeyError, ValueError) as err:
+                self._logger.warning("Could not restore macros on %s: %s", razer_device.serial, err)
+
+        self._logger.info("Restored state of %s", razer_device.serial)
+        return True
+
+    def _apply(self, razer_device, method_name, args):
+        """
+        Call a DBus method on the device, failures are logged
+
+        :param razer_device: Device
+        :type razer_device: razer_daemon.hardware.device_base.RazerDevice
+
+        :param method_name: DBus method name
+        :type method_name: str
+
+        :param args: Arguments
+        :type args: list
+        """
+        method = getattr(razer_device, method_name, None)
+        if method is None:
+            return
+
+        try:
+            method(*args)
+        except (OSError, TypeError, ValueError) as err:
+            self._logger.warning("Could not restore %s on %s: %s", method_name, razer_device.serial, err)
+
+    def record_effect(self, serial, effect_name, args):
+        """
+        Record an effect
+
+        :param serial: Device serial
+        :type serial: str
+
+        :param effect_name: Effect method name
+        :type effect_name: str
+
+        :param args: Effect arguments
+        :type args: tuple
+        """
+        state = self._devices.setdefault(serial, {})
+
+        # Brightness is sent as an effect but is kept alongside the effect, not instead of it
+        if effect_name in STATE_METHODS:
+            state.setdefault('state', {})[effect_name] = list(args)
+        else:
+            state['effect'] = [effect_name] + list(args)
+
+        self.mark_dirty()
+
+    def record_state(self, serial, state_name, args):
+        """
+        Record a state change
+
+        :param serial: Device serial
+        :type serial: str
+
+        :param state_name: Setter name or 'macros'
+        :type state_name: str
+
+        :param args: Setter arguments, or the macro JSON
+        :type args: tuple
+        """
+        state = self._devices.setdefault(serial, {})
+
+        if state_name == 'macros':
+            state['macros'] = args[0]
+        else:
+            state.setdefault('state', {})[state_name] = list(args)
+
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """
+        Schedule a write, changes made before it runs are written together
+        """
+        if self._write_job is None:
+            self._write_job = get_scheduler().call_later(self._write_delay, self.write, name='state checkpoint')
+
+    def flush(self):
+        """
+        Write any pending changes now
+        """
+        if self._write_job is not None:
+            self._write_job.cancel()
+            self.write()
+
+    def write(self):
+        """
+        Write the checkpoint atomically
+
+        Written to a temporary file in the same directory and renamed over the old one, so a crash never leaves a
+        half written checkpoint.
+        """
+        self._write_job = None
+
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'boot_id': self._boot_id,
+            'devices': self._devices,
+        }
+
+        try:
+            temp_fd, temp_path = tempfile.mkstemp(prefix='.state.', dir=os.path.dirname(self._path))
+        except OSError as err:
+            self._logger.warning("Could not write state checkpoint: %s", err)
+            return
+
+        try:
+            with os.fdopen(temp_fd, 'w') as temp_file:
+                json.dump(data, temp_file, indent=2, sort_keys=True)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, self._path)
+            self._checkpoint_boot_id = self._boot_id
+        except (OSError, TypeError, ValueError) as err:
+            self._logger.warning("Could not write state checkpoint: %s", err)
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
+import time
+# Taken first so the startup profile covers as much of startup as possible
+START_TIME = time.monotonic()
+
 import argparse
 import os
 import shutil
-from razer_daemon.daemon import daemonize
+from razer_daemon.misc.startup_profile import StartupProfiler
 
 SHARE_DIR = '/usr/share/razer-service'
 EXAMPLE_CONF = os.path.join(SHARE_DIR, 'razer.conf.example')
@@ -24,12 +28,22 @@ def parse_args():
     parser.add_argument('--run-dir', type=str, help='Location of the data directory', default=BASE_PATH)
     parser.add_argument('--log-dir', type=str, help='Location of the log directory', default=LOG_PATH)
     parser.add_argument('--pid-file', type=str, help='Location of the pid file')
+    parser.add_argument('--profile-startup', action='store_true', help='Log startup phase timings and import costs')
+    parser.add_argument('--replace', action='store_true', help='Stop the running daemon and take its place')
 
     return parser.parse_args()
 
 def run():
     args = parse_args()
 
+    startup_profiler = StartupProfiler(enabled=args.profile_startup, start_time=START_TIME)
+    startup_profiler.track_imports()
+
+    # Imported after parsing arguments so the profiler can time it
+    with startup_profiler.phase('import daemon'):
+        # pylint: disable=wrong-import-position
+        from razer_daemon.daemon import daemonize
+
     if not os.path.exists(BASE_PATH):
         os.mkdir(BASE_PATH)
         os.mkdir(LOG_PATH)
@@ -40,7 +54,8 @@ def run():
     daemon_args = {
         'verbose': args.verbose,
         'foreground': args.foreground,
-        'log_dir': args.log_dir
+        'log_dir': args.log_dir,
+        'replace': args.replace
     }
 
     if args.foreground:
@@ -55,6 +70,8 @@ def run():
     if args.pid_file:
         daemon_args['pid_file'] = args.pid_file
 
+    daemon_args['startup_profiler'] = startup_profiler
+
     daemonize(**daemon_args)
 
 
@@ -0,0 +1,144 @@
+"""
+Asynchronous DBus method tests, the services are plain objects with their own executors
+"""
+import concurrent.futures
+import inspect
+import queue
+import threading
+import time
+import unittest
+
+from razer_daemon.dbus_services.async_method import make_async
+
+
+class SlowAttribute(object):
+    """
+    Driver attribute of a device which takes a while to answer, like a sleeping wireless mouse
+    """
+    def __init__(self, value, delay):
+        self.value = value
+        self.delay = delay
+        self.release = threading.Event()
+        self.history = []
+
+    def read(self):
+        self.release.wait(self.delay)
+        return self.value
+
+
+class DummyService(object):
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def get_method_executor(self):
+        return self.executor
+
+
+def get_battery(self):
+    return self.attribute.read()
+
+
+def set_idle_time(self, idle_time):
+    if idle_time < 0:
+        raise ValueError('Negative idle time')
+    self.attribute.value = idle_time
+    self.attribute.history.append(idle_time)
+
+
+class AsyncMethodTest(unittest.TestCase):
+
+    def setUp(self):
+        self.main_loop_calls = queue.Queue()
+        self.services = []
+
+    def tearDown(self):
+        for service in self.services:
+            service.attribute.release.set()
+            service.executor.shutdown()
+
+    def call_in_main_loop(self, callback, *args):
+        self.main_loop_calls.put((callback, args))
+
+    def run_main_loop(self, timeout=1):
+        callback, args = self.main_loop_calls.get(timeout=timeout)
+        callback(*args)
+
+    def new_service(self, value, delay=0):
+        service = DummyService(SlowAttribute(value, delay))
+        self.services.append(service)
+        return service
+
+    def test_signature(self):
+        method = make_async(set_idle_time, DummyService.get_method_executor, self.call_in_main_loop)
+
+        # dbus-python looks for the argument names and the callbacks with getfullargspec
+        self.assertEqual(inspect.getfullargspec(method)[0], ['self', 'idle_time', 'reply_handler', 'error_handler'])
+        self.assertEqual(method.__name__, 'set_idle_time')
+
+    def test_slow_device_does_not_block_others(self):
+        method = make_async(get_battery, DummyService.get_method_executor, self.call_in_main_loop)
+        slow_service = self.new_service(50.0, delay=5)
+        fast_service = self.new_service(100.0)
+        replies = []
+
+        start_time = time.monotonic()
+        method(slow_service, reply_handler=lambda level: replies.append(('slow', level)), error_handler=self.fail)
+        method(fast_service, reply_handler=lambda level: replies.append(('fast', level)), error_handler=self.fail)
+        # Both calls return straight away
+        self.assertLess(time.monotonic() - start_time, 0.5)
+
+        self.run_main_loop()
+        self.assertEqual(replies, [('fast', 100.0)])
+        self.assertLess(time.monotonic() - start_time, 1)
+
+        slow_service.attribute.release.set()
+        self.run_main_loop()
+        self.assertEqual(replies, [('fast', 100.0), ('slow', 50.0)])
+
+    def test_calls_to_one_device_in_order(self):
+        method = make_async(set_idle_time, DummyService.get_method_executor, self.call_in_main_loop)
+        service = self.new_service(0)
+        replies = []
+
+        for idle_time in (10, 20, 30):
+            method(service, idle_time, reply_handler=lambda: replies.append(True), error_handler=self.fail)
+        for _ in range(3):
+            self.run_main_loop()
+
+        self.assertEqual(len(replies), 3)
+        self.assertEqual(service.attribute.history, [10, 20, 30])
+
+    def test_error(self):
+        method = make_async(set_idle_time, DummyService.get_method_executor, self.call_in_main_loop)
+        service = self.new_service(0)
+        errors = []
+
+        method(service, -1, reply_handler=self.fail, error_handler=errors.append)
+        self.run_main_loop()
+        self.assertIsInstance(errors[0], ValueError)
+
+        service.executor.shutdown()
+        method(service, 1, reply_handler=self.fail, error_handler=errors.append)
+        self.assertIsInstance(errors[1], RuntimeError)
+
+    def test_cancelled_on_close(self):
+        method = make_async(get_battery, DummyService.get_method_executor, self.call_in_main_loop)
+        service = self.new_service(50.0, delay=5)
+        replies = []
+        errors = []
+
+        method(service, reply_handler=lambda level: replies.append(level), error_handler=self.fail)
+        # Queued behind the slow read
+        method(service, reply_handler=self.fail, error_handler=errors.append)
+
+        # Like close_method_executor
+        service.executor.shutdown(wait=False, cancel_futures=True)
+        self.run_main_loop()
+        self.assertIsInstance(errors[0], RuntimeError)
+        self.assertIn('cancelled', str(errors[0]))
+
+        # The running call still answers
+        service.attribute.release.set()
+        self.run_main_loop()
+        self.assertEqual(replies, [50.0])
@@ -0,0 +1,98 @@
+"""
+Batched DBus call tests, run against a plain object with a method table
+"""
+import unittest
+import unittest.mock
+
+from razer_daemon.dbus_services.batch import apply_batch, check_type, make_method_table, split_signature
+
+
+class DummyDevice(object):
+    def __init__(self):
+        self.calls = []
+
+
+def set_brightness(self, brightness):
+    self.calls.append(('setBrightness', brightness))
+
+
+def set_static_effect(self, red, green, blue):
+    self.calls.append(('setStatic', bytes([red, green, blue])))
+
+
+def set_key_row(self, payload):
+    self.calls.append(('setKeyRow', payload))
+
+
+def get_battery(self):
+    return 100.0
+
+
+METHODS = [
+    ('razer.device.lighting.brightness', 'setBrightness', set_brightness, 'd', None, False, False),
+    ('razer.device.lighting.chroma', 'setStatic', set_static_effect, 'yyy', None, False, False),
+    ('razer.device.lighting.chroma', 'setKeyRow', set_key_row, 'ay', None, True, False),
+    ('razer.device.power', 'getBattery', get_battery, None, 'd', False, True),
+]
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.device = DummyDevice()
+        self.method_table = make_method_table(METHODS)
+
+    def test_split_signature(self):
+        self.assertEqual(split_signature(None), [])
+        self.assertEqual(split_signature('yyy'), ['y', 'y', 'y'])
+        self.assertEqual(split_signature('sa(yy)a{sv}aay'), ['s', 'a(yy)', 'a{sv}', 'aay'])
+
+        for signature in ('a', '(yy', 'y)', '(y}'):
+            with self.assertRaises(ValueError):
+                split_signature(signature)
+
+    def test_in_order(self):
+        results = apply_batch(self.device, self.method_table, [('setBrightness', [50.0]), ('setStatic', [255, 0, 0]), ('setKeyRow', [[0, 1, 2, 3]])])
+
+        self.assertEqual(results, [(True, ''), (True, ''), (True, '')])
+        self.assertEqual(self.device.calls, [('setBrightness', 50.0), ('setStatic', b'\xff\x00\x00'), ('setKeyRow', b'\x00\x01\x02\x03')])
+
+    def test_bad_operations(self):
+        logger = unittest.mock.MagicMock()
+
+        results = apply_batch(self.device, self.method_table, [('setWave', [1]), ('setStatic', [255, 0]), ('getBattery', []),
+                                                               ('setStatic', [256, 0, 0]), ('setBrightness', [100.0])], logger)
+
+        self.assertEqual([success for success, _ in results], [False, False, False, False, True])
+        self.assertIn('Unknown method setWave', results[0][1])
+        self.assertIn('takes 3 arguments, got 2', results[1][1])
+        self.assertIn('cant be batched', results[2][1])
+        self.assertIn('Argument 0 of setStatic is not a valid y', results[3][1])
+        self.assertEqual(self.device.calls, [('setBrightness', 100.0)])
+        self.assertEqual(logger.warning.call_count, 4)
+
+    def test_bad_types(self):
+        results = apply_batch(self.device, self.method_table, [('setStatic', ['255', 0, 0]), ('setBrightness', ['50']),
+                                                               ('setKeyRow', [[0, 1, 'a']]), ('setKeyRow', [[0, 256]]),
+                                                               ('setBrightness', [50])])
+
+        self.assertEqual([success for success, _ in results], [False, False, False, False, True])
+        self.assertIn('not a valid d', results[1][1])
+        self.assertIn('not a valid ay', results[2][1])
+        # Nothing is called with a bad argument
+        self.assertEqual(self.device.calls, [('setBrightness', 50)])
+
+    def test_check_type(self):
+        self.assertTrue(check_type('y', 255))
+        self.assertFalse(check_type('y', -1))
+        self.assertFalse(check_type('y', True))
+        self.assertTrue(check_type('n', -0x8000))
+        self.assertFalse(check_type('q', 0x10000))
+        self.assertTrue(check_type('t', 0xFFFFFFFFFFFFFFFF))
+        self.assertTrue(check_type('b', False))
+        self.assertFalse(check_type('b', 2))
+        self.assertTrue(check_type('d', 0.5))
+        self.assertFalse(check_type('s', 1))
+        self.assertTrue(check_type('ay', b'\x00'))
+        # Other containers are checked by the method
+        self.assertTrue(check_type('a{sv}', {}))
@@ -0,0 +1,89 @@
+"""
+Client library lighting tests, run against stubbed DBus interfaces
+"""
+import os
+import sys
+import unittest
+import unittest.mock
+
+PYLIB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'pylib'))
+if PYLIB_PATH not in sys.path:
+    sys.path.append(PYLIB_PATH)
+
+try:
+    from razer.client import fx
+except ImportError:
+    # The client library needs numpy and dbus
+    fx = None
+
+NEW_DAEMON_XML = """<node>
+  <interface name="org.freedesktop.DBus.Introspectable">
+    <method name="Introspect"><arg direction="out" type="s" /></method>
+  </interface>
+  <interface name="razer.device.lighting.chroma">
+    <method name="setKeyRow"><arg direction="in" type="ay" name="payload" /></method>
+    <method name="setCustom"></method>
+    <method name="setFrame"><arg direction="in" type="ay" name="payload" /><arg direction="out" type="u" /></method>
+  </interface>
+</node>"""
+
+OLD_DAEMON_XML = """<node>
+  <interface name="org.freedesktop.DBus.Introspectable">
+    <method name="Introspect"><arg direction="out" type="s" /></method>
+  </interface>
+  <interface name="razer.device.lighting.chroma">
+    <method name="setKeyRow"><arg direction="in" type="ay" name="payload" /></method>
+    <method name="setCustom"></method>
+  </interface>
+  <interface name="razer.device.misc">
+    <method name="setFrame"></method>
+  </interface>
+</node>"""
+
+
+@unittest.skipIf(fx is None, "razer.client can't be imported")
+class AdvancedFXTest(unittest.TestCase):
+    def setUp(self):
+        self.introspect_xml = NEW_DAEMON_XML
+        self.lighting = unittest.mock.MagicMock()
+
+        patcher = unittest.mock.patch.object(fx._dbus, 'Interface', self.get_interface)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_interface(self, daemon_dbus, interface):
+        if interface == 'org.freedesktop.DBus.Introspectable':
+            introspectable = unittest.mock.MagicMock()
+            introspectable.Introspect.return_value = self.introspect_xml
+            return introspectable
+
+        return self.lighting
+
+    def test_has_dbus_method(self):
+        self.assertTrue(fx.has_dbus_method(object(), 'razer.device.lighting.chroma', 'setFrame'))
+        self.assertFalse(fx.has_dbus_method(object(), 'razer.device.lighting.chroma', 'setWave'))
+
+        # Only methods of the given interface count
+        self.introspect_xml = OLD_DAEMON_XML
+        self.assertFalse(fx.has_dbus_method(object(), 'razer.device.lighting.chroma', 'setFrame'))
+
+        self.introspect_xml = '<node>'
+        self.assertFalse(fx.has_dbus_method(object(), 'razer.device.lighting.chroma', 'setFrame'))
+
+    def test_draw_new_daemon(self):
+        advanced = fx.RazerAdvancedFX('XX0000000000', {}, daemon_dbus=object(), matrix_dims=(6, 22))
+        advanced.draw()
+
+        self.lighting.setFrame.assert_called_once_with(bytes(advanced.matrix))
+        self.assertFalse(self.lighting.setKeyRow.called)
+        self.assertFalse(self.lighting.setCustom.called)
+
+    def test_draw_old_daemon(self):
+        self.introspect_xml = OLD_DAEMON_XML
+
+        advanced = fx.RazerAdvancedFX('XX0000000000', {}, daemon_dbus=object(), matrix_dims=(6, 22))
+        advanced.draw()
+
+        self.lighting.setKeyRow.assert_called_once_with(bytes(advanced.matrix))
+        self.lighting.setCustom.assert_called_once_with()
+        self.assertFalse(self.lighting.setFrame.called)
@@ -0,0 +1,73 @@
+"""
+Device attribute record tests
+"""
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.device_attributes
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class DummyDriver(object):
+    def __init__(self):
+        self.files = {
+            'get_serial': 'XX0000000001\n',
+            'get_firmware_version': 'v1.0\n',
+            'device_type': 'Razer BlackWidow Chroma\n',
+        }
+        self.reads = []
+
+    def read(self, driver_filename):
+        self.reads.append(driver_filename)
+        if self.files[driver_filename] is None:
+            raise OSError('Timed out')
+        return self.files[driver_filename]
+
+
+@unittest.mock.patch('razer_daemon.misc.device_attributes.logging.getLogger', logger_mock)
+class DeviceAttributesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = DummyDriver()
+
+    def test_read_once(self):
+        attributes = razer_daemon.misc.device_attributes.DeviceAttributes(self.driver.read)
+
+        for _ in range(3):
+            self.assertEqual(attributes.serial, 'XX0000000001')
+            self.assertEqual(attributes.firmware_version, 'v1.0')
+            self.assertEqual(attributes.device_name, 'Razer BlackWidow Chroma')
+
+        self.assertEqual(sorted(self.driver.reads), ['device_type', 'get_firmware_version', 'get_serial'])
+
+    def test_probed_serial(self):
+        attributes = razer_daemon.misc.device_attributes.DeviceAttributes(self.driver.read, 'XX0000000002')
+
+        self.assertEqual(attributes.serial, 'XX0000000002')
+        self.assertNotIn('get_serial', self.driver.reads)
+
+    def test_refresh(self):
+        attributes = razer_daemon.misc.device_attributes.DeviceAttributes(self.driver.read)
+        self.driver.files['get_firmware_version'] = 'v1.1\n'
+
+        self.assertEqual(attributes.firmware_version, 'v1.0')
+        self.assertEqual(attributes.refresh('firmware_version'), 'v1.1')
+        self.assertEqual(attributes.firmware_version, 'v1.1')
+
+        with self.assertRaises(ValueError):
+            attributes.refresh('serial')
+
+    def test_failed_read_retried(self):
+        self.driver.files['get_firmware_version'] = None
+        attributes = razer_daemon.misc.device_attributes.DeviceAttributes(self.driver.read)
+
+        with self.assertRaises(OSError):
+            attributes.firmware_version
+
+        self.driver.files['get_firmware_version'] = 'v1.0\n'
+        self.assertEqual(attributes.firmware_version, 'v1.0')
+        self.assertEqual(attributes.firmware_version, 'v1.0')
+        self.assertEqual(self.driver.reads.count('get_firmware_version'), 3)
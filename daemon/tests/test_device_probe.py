@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.device_probe
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+class DeviceProberTest(unittest.TestCase):
+    @unittest.mock.patch('razer_daemon.misc.device_probe.logging.getLogger', logger_mock)
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp(prefix='razer_test_sysfs_')
+        self.prober = razer_daemon.misc.device_probe.DeviceProber(max_workers=2, deadline=0.5, initial_backoff=0.01, max_backoff=0.05)
+
+    def tearDown(self):
+        self.prober.close()
+        shutil.rmtree(self.sysfs)
+
+    def make_device(self, device_id, serial):
+        device_path = os.path.join(self.sysfs, device_id)
+        os.mkdir(device_path)
+        with open(os.path.join(device_path, 'get_serial'), 'w') as serial_file:
+            serial_file.write(serial + '\n')
+        return device_path
+
+    def test_read_serial(self):
+        device_path = self.make_device('0003:1532:0203.0001', 'XX000001')
+
+        self.assertEqual(razer_daemon.misc.device_probe.read_serial(device_path), 'XX000001')
+
+    def test_probe_callback(self):
+        device_path = self.make_device('0003:1532:0203.0001', 'XX000001')
+        callback = unittest.mock.MagicMock()
+
+        self.prober.probe('0003:1532:0203.0001', device_path, callback).result(timeout=2)
+
+        callback.assert_called_once_with('0003:1532:0203.0001', 'XX000001')
+
+    def test_retry_until_answer(self):
+        device_path = self.make_device('0003:1532:0045.0001', 'XX000002')
+        read_func = unittest.mock.MagicMock(side_effect=['', OSError(), 'XX000002'])
+        self.prober._read_func = read_func
+
+        self.assertEqual(self.prober.probe_serial('0003:1532:0045.0001', device_path), 'XX000002')
+        self.assertEqual(read_func.call_count, 3)
+
+    def test_deadline(self):
+        device_path = self.make_device('0003:1532:0045.0001', '')
+
+        self.assertIsNone(self.prober.probe_serial('0003:1532:0045.0001', device_path))
+
+    def test_unplugged(self):
+        self.assertIsNone(self.prober.probe_serial('0003:1532:0045.0001', os.path.join(self.sysfs, 'missing')))
+
+    def test_slow_device_does_not_block_others(self):
+        fast_path = self.make_device('0003:1532:0203.0001', 'XX000001')
+        slow_path = self.make_device('0003:1532:0045.0002', '')
+        fast_done = threading.Event()
+        results = {}
+
+        def callback(device_id, serial):
+            results[device_id] = serial
+            if serial is not None:
+                fast_done.set()
+
+        slow_future = self.prober.probe('0003:1532:0045.0002', slow_path, callback)
+        self.prober.probe('0003:1532:0203.0001', fast_path, callback)
+
+        # Fast device finishes whilst the slow one is still retrying
+        self.assertTrue(fast_done.wait(timeout=0.4))
+        self.assertFalse(slow_future.done())
+
+        slow_future.result(timeout=2)
+        self.assertIsNone(results['0003:1532:0045.0002'])
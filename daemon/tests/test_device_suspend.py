@@ -0,0 +1,88 @@
+"""
+Device suspend and close tests, run against a device on a fake backend with DBus left out
+"""
+import asyncio
+import configparser
+import threading
+import unittest
+import unittest.mock
+
+from razer_daemon.hardware.device_base import RazerDeviceBrightnessSuspend
+from razer_daemon.misc.driver_backend import FakeBackend
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+def dbus_service_init(self, bus_name, object_path):
+    self.bus_name = bus_name
+    self.object_path = object_path
+    self._method_executor = None
+
+
+class BrightnessDevice(RazerDeviceBrightnessSuspend):
+    METHODS = ['get_brightness', 'set_brightness']
+
+
+@unittest.mock.patch('razer_daemon.hardware.device_base.logging.getLogger', logger_mock)
+class DeviceSuspendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.config = configparser.ConfigParser()
+        self.config['DEFAULT'] = {'custom_frame_rate': 30, 'hidraw_devices': '', 'driver_trace': '', 'io_stats': False}
+        self.config['General'] = {}
+
+        self.backend = FakeBackend({'device_type': 'Razer Test', 'get_firmware_version': 'v1.0', 'set_brightness': 128})
+
+        with unittest.mock.patch('razer_daemon.hardware.device_base.os.listdir', lambda path: []), \
+                unittest.mock.patch('razer_daemon.hardware.device_base.DBusService.__init__', dbus_service_init):
+            self.device = BrightnessDevice('/sys/bus/hid/devices/0003:1532:0000.0001', 0, self.config, 'XX0000000000', self.backend)
+
+    def tearDown(self):
+        self.device.close()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_suspend_resume(self):
+        observer = unittest.mock.MagicMock()
+        self.device.register_observer(observer)
+
+        self.device.suspend_device()
+        self.assertTrue(self.device.flush_writes())
+        self.assertEqual(self.backend.files['set_brightness'], b'0')
+        self.assertAlmostEqual(self.device.suspend_args['brightness'], 50.2, places=1)
+
+        self.device.resume_device()
+        self.assertTrue(self.device.flush_writes())
+        self.assertEqual(self.backend.files['set_brightness'], b'128')
+
+        # Suspending isnt an effect the other devices should copy
+        observer.notify.assert_not_called()
+
+    def test_stop_then_close(self):
+        self.device.write_attribute('set_brightness', 255)
+        with unittest.mock.patch.object(self.device.frame_pacer, 'close') as pacer_close:
+            self.device.stop()
+            self.device.stop()
+        pacer_close.assert_called_once_with()
+
+        # The blocking part can be done off the main thread once stopped
+        thread = threading.Thread(target=self.device.close)
+        thread.start()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.backend.files['set_brightness'], b'255')
+
+    def test_effect_resets_frame(self):
+        with unittest.mock.patch.object(self.device.frame_pacer, 'reset') as pacer_reset:
+            # Brightness keeps the waiting custom frame
+            self.device.send_effect_event('setBrightness', 50.0)
+            pacer_reset.assert_not_called()
+
+            self.device.send_effect_event('setStatic', 255, 0, 0)
+            pacer_reset.assert_called_once_with()
@@ -0,0 +1,158 @@
+"""
+Device writer tests
+"""
+import threading
+import time
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.device_writer
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class DummyDriver(object):
+    def __init__(self):
+        self.writes = []
+        # Cleared to hold the writer inside its first write
+        self.release = threading.Event()
+        self.release.set()
+        self.writing = threading.Event()
+
+    def write(self, driver_filename, payload):
+        self.writing.set()
+        self.release.wait()
+        if driver_filename == 'mode_missing':
+            raise FileNotFoundError(driver_filename)
+        if driver_filename == 'mode_broken':
+            raise TypeError(driver_filename)
+        self.writes.append((driver_filename, payload))
+
+
+@unittest.mock.patch('razer_daemon.misc.device_writer.logging.getLogger', logger_mock)
+class DeviceWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = DummyDriver()
+        self.writer = razer_daemon.misc.device_writer.DeviceWriter(self.driver.write, 0)
+        self.writer.start()
+
+    def tearDown(self):
+        self.driver.release.set()
+        self.writer.close()
+
+    def block_writer(self):
+        self.driver.release.clear()
+        self.writer.write('mode_none', b'1')
+        self.driver.writing.wait(1)
+
+    def test_write(self):
+        self.writer.write('set_brightness', b'255', wait=True)
+
+        self.assertEqual(self.driver.writes, [('set_brightness', b'255')])
+        self.assertEqual(self.writer.stats()['written'], 1)
+
+    def test_coalesce(self):
+        self.block_writer()
+
+        for brightness in range(100):
+            self.writer.write('set_brightness', str(brightness).encode())
+        self.writer.write('mode_static', b'\xff\x00\x00')
+        self.assertEqual(self.writer.stats()['queue_depth'], 2)
+
+        self.driver.release.set()
+        self.assertTrue(self.writer.flush())
+
+        self.assertEqual(self.driver.writes, [('mode_none', b'1'), ('set_brightness', b'99'), ('mode_static', b'\xff\x00\x00')])
+        stats = self.writer.stats()
+        self.assertEqual(stats['queued'], 102)
+        self.assertEqual(stats['coalesced'], 99)
+        self.assertEqual(stats['written'], 3)
+
+    def test_order_of_newest(self):
+        self.block_writer()
+
+        self.writer.write('mode_static', b'\x00\x00\xff')
+        self.writer.write('mode_breath', b'1')
+        self.writer.write('mode_static', b'\xff\x00\x00')
+
+        self.driver.release.set()
+        self.writer.flush()
+
+        # The last call was setStatic so it has to be written last
+        self.assertEqual(self.driver.writes[1:], [('mode_breath', b'1'), ('mode_static', b'\xff\x00\x00')])
+
+    def test_coalesce_key(self):
+        self.block_writer()
+
+        self.writer.write('set_key_row', b'\x00\xff', coalesce_key=('set_key_row', b'\x00'))
+        self.writer.write('set_key_row', b'\x01\xff', coalesce_key=('set_key_row', b'\x01'))
+
+        self.driver.release.set()
+        self.writer.flush()
+
+        self.assertEqual(len(self.driver.writes), 3)
+
+    def test_wait_error(self):
+        with self.assertRaises(FileNotFoundError):
+            self.writer.write('mode_missing', b'1', wait=True)
+
+        self.writer.write('mode_missing', b'1')
+        self.writer.flush()
+        self.assertEqual(self.writer.stats()['failed'], 2)
+
+    def test_unexpected_error(self):
+        with self.assertRaises(TypeError):
+            self.writer.write('mode_broken', b'1', wait=True)
+
+        # The thread carries on
+        self.assertFalse(self.writer.has_pending('mode_broken'))
+        self.writer.write('set_brightness', b'255', wait=True)
+        self.assertEqual(self.driver.writes, [('set_brightness', b'255')])
+        self.assertEqual(self.writer.stats()['failed'], 1)
+
+    def test_wait_for(self):
+        self.block_writer()
+        self.writer.write('set_brightness', b'128')
+
+        self.assertFalse(self.writer.wait_for('set_brightness', timeout=0.01))
+        self.assertTrue(self.writer.wait_for('set_key_row', timeout=0.01))
+
+        self.driver.release.set()
+        self.assertTrue(self.writer.wait_for('set_brightness'))
+        self.assertIn(('set_brightness', b'128'), self.driver.writes)
+
+    def test_close_drains(self):
+        self.block_writer()
+        self.writer.write('set_brightness', b'0')
+
+        self.driver.release.set()
+        self.writer.close()
+
+        self.assertFalse(self.writer.is_alive())
+        self.assertEqual(len(self.driver.writes), 2)
+        with self.assertRaises(OSError):
+            self.writer.write('set_brightness', b'255')
+
+    def test_hold(self):
+        with self.writer.hold():
+            self.writer.write('set_brightness', b'0')
+            self.writer.write('mode_static', b'\xff\x00\x00')
+            self.writer.write('set_brightness', b'255')
+            # Nothing is written while held
+            time.sleep(0.05)
+            self.assertEqual(self.driver.writes, [])
+            self.assertEqual(self.writer.stats()['queue_depth'], 2)
+
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.driver.writes, [('mode_static', b'\xff\x00\x00'), ('set_brightness', b'255')])
+
+    def test_hold_ends_on_own_wait(self):
+        with self.writer.hold():
+            self.writer.write('mode_static', b'\xff\x00\x00')
+            # Would wait on itself if the hold didnt end
+            self.writer.write('set_brightness', b'128', wait=True)
+
+            self.assertEqual(self.driver.writes, [('mode_static', b'\xff\x00\x00'), ('set_brightness', b'128')])
@@ -0,0 +1,93 @@
+"""
+Driver backend tests
+"""
+import errno
+import time
+import unittest
+
+from razer_daemon.misc import driver_backend
+from razer_daemon.misc.driver_backend import FakeBackend, RecordingBackend
+
+
+class FakeClock(object):
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class AttributeTypeTest(unittest.TestCase):
+
+    def test_encode(self):
+        self.assertEqual(driver_backend.encode_attribute('set_brightness', 128.0), b'128')
+        self.assertEqual(driver_backend.encode_attribute('mode_game', True), b'1')
+        self.assertEqual(driver_backend.encode_attribute('mode_macro', 0), b'0')
+        self.assertEqual(driver_backend.encode_attribute('mode_spectrum', None), b'1')
+        self.assertEqual(driver_backend.encode_attribute('mode_static', [255, 0, 128]), b'\xff\x00\x80')
+        # Unknown attributes are text
+        self.assertEqual(driver_backend.encode_attribute('set_logo', '1'), b'1')
+
+    def test_decode(self):
+        self.assertEqual(driver_backend.decode_attribute('get_battery', b'-1\n'), -1)
+        self.assertIs(driver_backend.decode_attribute('is_charging', b'1\n'), True)
+        self.assertEqual(driver_backend.decode_attribute('get_serial', b'XX0000000000\n'), 'XX0000000000')
+        self.assertEqual(driver_backend.decode_attribute('mode_pulsate', b'2\n'), 2)
+
+        with self.assertRaises(ValueError):
+            driver_backend.decode_attribute('get_battery', b'\n')
+
+
+class FakeBackendTest(unittest.TestCase):
+
+    def test_read_write(self):
+        backend = FakeBackend({'get_serial': 'XX0000000000', 'set_brightness': 255})
+
+        self.assertEqual(backend.read_attribute('get_serial'), 'XX0000000000')
+        self.assertEqual(backend.read('set_brightness'), b'255')
+
+        backend.write_attribute('set_brightness', 100)
+        self.assertEqual(backend.read_attribute('set_brightness'), 100)
+        self.assertEqual((backend.reads, backend.writes), (3, 1))
+
+        with self.assertRaises(FileNotFoundError):
+            backend.read('mode_game')
+
+        backend.errors['mode_game'] = OSError(errno.EIO, 'I/O error')
+        with self.assertRaises(OSError):
+            backend.write('mode_game', b'1')
+        self.assertEqual(backend.writes, 1)
+
+    def test_latency(self):
+        backend = FakeBackend(write_latency=0.02)
+
+        start_time = time.monotonic()
+        backend.write('set_key_row', b'\x00' * 67)
+        backend.write('mode_custom', b'1')
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.04)
+
+
+class RecordingBackendTest(unittest.TestCase):
+
+    def test_record(self):
+        backend = RecordingBackend(FakeBackend({'get_battery': 200}), clock=FakeClock(0.5))
+
+        backend.write_attribute('set_brightness', 128)
+        self.assertEqual(backend.read_attribute('get_battery'), 200)
+        with self.assertRaises(FileNotFoundError):
+            backend.read('mode_game')
+
+        calls = list(backend.calls)
+        self.assertEqual(calls[0], driver_backend.DriverCall('write', 'set_brightness', b'128', 0.5, 0.5, None))
+        self.assertEqual(calls[1], driver_backend.DriverCall('read', 'get_battery', b'200', 1.5, 0.5, None))
+        self.assertEqual((calls[2].operation, calls[2].driver_filename, calls[2].payload), ('read', 'mode_game', None))
+        self.assertIn('No such driver file', calls[2].error)
+
+    def test_max_calls(self):
+        backend = RecordingBackend(FakeBackend(), max_calls=2)
+        for row in range(3):
+            backend.write('temp_clear_row', str(row).encode())
+
+        self.assertEqual([call.payload for call in backend.calls], [b'1', b'2'])
@@ -0,0 +1,61 @@
+"""
+Driver file cache tests, a temporary directory stands in for the sysfs device directory
+"""
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.driver_files
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class DriverFileCacheTest(unittest.TestCase):
+
+    @unittest.mock.patch('razer_daemon.misc.driver_files.logging.getLogger', logger_mock)
+    def setUp(self):
+        self.device_dir = tempfile.TemporaryDirectory()
+        for driver_filename in ('set_brightness', 'set_key_row'):
+            with open(os.path.join(self.device_dir.name, driver_filename), 'wb') as driver_file:
+                driver_file.write(b'0\n')
+
+        self.driver_files = razer_daemon.misc.driver_files.DriverFileCache(self.device_dir.name)
+
+    def tearDown(self):
+        self.driver_files.close()
+        self.device_dir.cleanup()
+
+    def test_read_write(self):
+        self.driver_files.write('set_brightness', b'255')
+        self.assertEqual(self.driver_files.read('set_brightness'), b'255')
+
+        # Always at offset 0, like reopening the file
+        self.driver_files.write('set_brightness', b'128')
+        self.assertEqual(self.driver_files.read('set_brightness')[:3], b'128')
+        self.assertEqual(self.driver_files.read('set_brightness')[:3], b'128')
+
+    def test_opened_once(self):
+        with unittest.mock.patch('razer_daemon.misc.driver_files.os.open', wraps=os.open) as open_mock:
+            for _ in range(10):
+                self.driver_files.write('set_key_row', b'\x00\xff\xff\xff')
+            self.driver_files.read('set_key_row')
+
+        # One write and one read descriptor
+        self.assertEqual(open_mock.call_count, 2)
+        self.assertEqual(self.driver_files.open_files, 2)
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.driver_files.write('mode_missing', b'1')
+        self.assertEqual(self.driver_files.open_files, 0)
+
+    def test_close(self):
+        self.driver_files.write('set_key_row', b'\x00')
+        self.driver_files.close()
+
+        self.assertEqual(self.driver_files.open_files, 0)
+        with self.assertRaises(OSError):
+            self.driver_files.write('set_key_row', b'\x00')
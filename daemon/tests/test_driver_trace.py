@@ -0,0 +1,126 @@
+"""
+Driver trace tests
+"""
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from razer_daemon.misc import driver_trace
+from razer_daemon.misc.driver_backend import DriverCall, FakeBackend, RecordingBackend
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@unittest.mock.patch('razer_daemon.misc.driver_trace.logging.getLogger', logger_mock)
+class DriverTraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_dir = tempfile.TemporaryDirectory()
+        self.trace_path = os.path.join(self.trace_dir.name, 'trace.bin')
+
+    def tearDown(self):
+        driver_trace.close_trace_writers()
+        self.trace_dir.cleanup()
+
+    def write_trace(self, calls):
+        writer = driver_trace.get_trace_writer(self.trace_path)
+        for serial, call in calls:
+            writer.record(serial, call)
+        driver_trace.close_trace_writers()
+
+    def test_round_trip(self):
+        writer = driver_trace.get_trace_writer(self.trace_path)
+        self.assertIs(driver_trace.get_trace_writer(self.trace_path), writer)
+
+        keyboard = RecordingBackend(FakeBackend({'get_battery': 200}), max_calls=0, listener=lambda call: writer.record('XX0000000001', call))
+        mouse = RecordingBackend(FakeBackend(), max_calls=0, listener=lambda call: writer.record('XX0000000002', call))
+        keyboard.write('set_key_row', bytes(67))
+        mouse.write_attribute('set_idle_time', 300)
+        keyboard.read('get_battery')
+        with self.assertRaises(FileNotFoundError):
+            mouse.read('get_battery')
+        driver_trace.close_trace_writers()
+
+        records = list(driver_trace.read_trace(self.trace_path))
+        self.assertEqual([(record.serial, record.operation, record.driver_filename, record.payload, record.failed) for record in records], [
+            ('XX0000000001', 'write', 'set_key_row', bytes(67), False),
+            ('XX0000000002', 'write', 'set_idle_time', b'300', False),
+            ('XX0000000001', 'read', 'get_battery', b'200', False),
+            ('XX0000000002', 'read', 'get_battery', b'', True),
+        ])
+        self.assertLessEqual(records[0].timestamp, records[1].timestamp)
+
+        # Strings are only written once, each call is 24 bytes plus its payload
+        self.assertLess(os.path.getsize(self.trace_path), 10 + 4 * 24 + 67 + 3 + 3 + 120)
+
+    def test_trace_write_fails(self):
+        writer = driver_trace.get_trace_writer(self.trace_path)
+        backend = RecordingBackend(FakeBackend(), max_calls=0, listener=lambda call: writer.record('XX0000000001', call))
+
+        with unittest.mock.patch.object(writer._file, 'write', side_effect=OSError(28, 'No space left on device')):
+            # The driver call still succeeds
+            backend.write('set_key_row', bytes(67))
+        self.assertEqual(backend.backend.files['set_key_row'], bytes(67))
+        self.assertEqual(writer._logger.error.call_count, 1)
+
+        # Tracing stops, the device carries on
+        backend.write('set_key_row', bytes(67))
+        self.assertEqual(writer._logger.error.call_count, 1)
+        self.assertEqual(writer.records, 0)
+
+    def test_truncated(self):
+        self.write_trace([('XX0000000001', DriverCall('write', 'mode_custom', b'1', float(row), 0.001, None)) for row in range(3)])
+        with open(self.trace_path, 'r+b') as trace_file:
+            trace_file.truncate(os.path.getsize(self.trace_path) - 10)
+
+        self.assertEqual(len(list(driver_trace.read_trace(self.trace_path))), 2)
+
+        with open(self.trace_path, 'wb') as trace_file:
+            trace_file.write(b'not a trace at all')
+        with self.assertRaises(ValueError):
+            list(driver_trace.read_trace(self.trace_path))
+
+    def test_replay(self):
+        self.write_trace([
+            ('XX0000000001', DriverCall('write', 'set_key_row', bytes(67), 10.0, 0.001, None)),
+            ('XX0000000001', DriverCall('write', 'mode_custom', b'1', 10.5, 0.001, None)),
+            ('XX0000000001', DriverCall('write', 'mode_custom', b'1', 10.6, 0.001, 'I/O error')),
+            ('XX0000000002', DriverCall('read', 'get_battery', b'128', 11.0, 0.001, None)),
+        ])
+        backends = []
+
+        def backend_factory():
+            backends.append(FakeBackend())
+            return backends[-1]
+
+        clock = FakeClock()
+        stats = driver_trace.replay_trace(driver_trace.read_trace(self.trace_path), 2, backend_factory, clock, clock.sleep)
+
+        # Twice as fast, the failed write is skipped
+        self.assertEqual(clock.sleeps, [0.25, 0.25])
+        self.assertEqual(stats['serials'], ['XX0000000001', 'XX0000000002'])
+        self.assertEqual({name: attribute_stats['calls'] for name, attribute_stats in stats['attributes'].items()},
+                         {'set_key_row': 1, 'mode_custom': 1, 'get_battery': 1})
+        self.assertEqual(backends[0].files, {'set_key_row': bytes(67), 'mode_custom': b'1'})
+        self.assertEqual(backends[1].reads, 1)
+
+        # As fast as possible
+        clock = FakeClock()
+        driver_trace.replay_trace(driver_trace.read_trace(self.trace_path), 0, FakeBackend, clock, clock.sleep)
+        self.assertEqual(clock.sleeps, [])
@@ -0,0 +1,57 @@
+"""
+Frame diff tests
+"""
+import unittest
+
+import razer_daemon.misc.frame_diff
+
+ROW_LENGTH = 1 + 22 * 3
+
+
+def frame(colours):
+    return b''.join(bytes([row]) + bytes(colour) * 22 for row, colour in enumerate(colours))
+
+
+class FrameDiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frame_diff = razer_daemon.misc.frame_diff.FrameDiff(ROW_LENGTH)
+        self.black = [(0, 0, 0)] * 6
+
+    def test_row_length(self):
+        self.assertEqual(razer_daemon.misc.frame_diff.FrameDiff.row_length_for([6, 22]), ROW_LENGTH)
+        self.assertIsNone(razer_daemon.misc.frame_diff.FrameDiff.row_length_for([1, -1]))
+
+    def test_changed_rows(self):
+        self.assertEqual(self.frame_diff.diff(frame(self.black)), frame(self.black))
+
+        colours = list(self.black)
+        colours[2] = (255, 0, 0)
+        payload = self.frame_diff.diff(frame(colours))
+
+        self.assertEqual(len(payload), ROW_LENGTH)
+        self.assertEqual(payload[0], 2)
+        self.assertEqual(self.frame_diff.coalesce_key(payload), ('set_key_row', b'\x02'))
+
+    def test_identical_frame(self):
+        self.frame_diff.diff(frame(self.black))
+        self.assertTrue(self.frame_diff.custom_needed())
+
+        self.assertEqual(self.frame_diff.diff(frame(self.black)), b'')
+        self.assertFalse(self.frame_diff.custom_needed())
+
+    def test_reset(self):
+        self.frame_diff.diff(frame(self.black))
+        self.frame_diff.custom_needed()
+        self.frame_diff.reset()
+
+        self.assertEqual(self.frame_diff.diff(frame(self.black)), frame(self.black))
+        self.assertTrue(self.frame_diff.custom_needed())
+
+    def test_unknown_row_length(self):
+        frame_diff = razer_daemon.misc.frame_diff.FrameDiff()
+        payload = bytes([1]) + bytes([255, 0, 0]) * 15
+
+        self.assertEqual(frame_diff.diff(payload), payload)
+        self.assertEqual(frame_diff.diff(payload), b'')
+        self.assertEqual(frame_diff.coalesce_key(payload), ('set_key_row', b'\x01'))
@@ -0,0 +1,129 @@
+"""
+Frame pacer tests
+"""
+import asyncio
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.frame_pacer
+
+ROW_LENGTH = 1 + 22 * 3
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+def frame(value):
+    return b''.join(bytes([row]) + bytes([value, 0, 0]) * 22 for row in range(6))
+
+
+class DummyDevice(object):
+    def __init__(self):
+        self.writes = []
+        self.busy = False
+
+    def driver_write_pending(self, driver_filename):
+        return self.busy
+
+    def write_driver_file(self, driver_filename, payload, coalesce_key=None):
+        self.writes.append((driver_filename, payload))
+
+
+@unittest.mock.patch('razer_daemon.misc.frame_pacer.logging.getLogger', logger_mock)
+class FramePacerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.device = DummyDevice()
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def new_pacer(self, max_fps):
+        return razer_daemon.misc.frame_pacer.FramePacer(self.device, 0, max_fps, ROW_LENGTH)
+
+    def run_loop(self, seconds):
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+
+    def test_first_frame_immediate(self):
+        pacer = self.new_pacer(30)
+        pacer.add_rows(frame(1))
+        self.assertEqual(pacer.submit(), 0)
+
+        self.assertEqual(self.device.writes, [('set_key_row', frame(1)), ('mode_custom', b'1')])
+
+    def test_newest_frame_kept(self):
+        pacer = self.new_pacer(10)
+        pacer.add_rows(frame(1))
+        pacer.submit()
+
+        # Arrive within the same frame slot, only the last is sent
+        pacer.add_rows(frame(2))
+        self.assertEqual(pacer.submit(), 0)
+        pacer.add_rows(frame(3))
+        self.assertEqual(pacer.submit(), 1)
+        self.assertEqual(len(self.device.writes), 2)
+
+        self.run_loop(0.15)
+
+        self.assertEqual(self.device.writes[2:], [('set_key_row', frame(3)), ('mode_custom', b'1')])
+        self.assertEqual(pacer.stats(), {'max_fps': 10, 'submitted': 3, 'sent': 2, 'dropped': 1})
+
+    def test_backpressure(self):
+        pacer = self.new_pacer(100)
+        self.device.busy = True
+        pacer.add_rows(frame(1))
+        pacer.submit()
+
+        self.run_loop(0.05)
+        self.assertEqual(self.device.writes, [])
+
+        self.device.busy = False
+        self.run_loop(0.03)
+        self.assertEqual(len(self.device.writes), 2)
+
+    def test_rows_without_custom(self):
+        pacer = self.new_pacer(100)
+        pacer.add_rows(frame(1)[:ROW_LENGTH])
+        self.assertEqual(self.device.writes, [])
+
+        self.run_loop(0.03)
+        self.assertEqual(self.device.writes, [('set_key_row', frame(1)[:ROW_LENGTH])])
+
+    def test_reset(self):
+        pacer = self.new_pacer(10)
+        pacer.add_rows(frame(1))
+        pacer.submit()
+        pacer.add_rows(frame(2))
+        pacer.submit()
+
+        pacer.reset()
+        self.run_loop(0.15)
+        self.assertEqual(len(self.device.writes), 2)
+
+        # The whole frame is sent again as the matrix was changed
+        pacer.add_rows(frame(1))
+        pacer.submit()
+        self.assertEqual(self.device.writes[2:], [('set_key_row', frame(1)), ('mode_custom', b'1')])
+
+    def test_submit_frame(self):
+        pacer = self.new_pacer(0)
+        self.assertEqual(pacer.submit_frame(frame(1)), 0)
+        self.assertEqual(self.device.writes, [('set_key_row', frame(1)), ('mode_custom', b'1')])
+
+        # Already in custom mode, only the changed rows are written
+        pacer.submit_frame(frame(1)[:ROW_LENGTH] + frame(2)[ROW_LENGTH:2 * ROW_LENGTH])
+        self.assertEqual(self.device.writes[2:], [('set_key_row', frame(2)[ROW_LENGTH:2 * ROW_LENGTH])])
+
+        # setCustom frames still end with mode_custom
+        pacer.add_rows(frame(3))
+        pacer.submit()
+        self.assertEqual(self.device.writes[3:], [('set_key_row', frame(3)), ('mode_custom', b'1')])
+
+        # Something else was shown, so custom mode has to be set again
+        pacer.reset()
+        pacer.submit_frame(frame(3))
+        self.assertEqual(self.device.writes[5:], [('set_key_row', frame(3)), ('mode_custom', b'1')])
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import razer_daemon.hardware
+import razer_daemon.hardware.device_base
+
+CHROMA_ID = '0003:1532:0203.0001'
+MAMBA_ID = '0003:1532:0045.0002'
+UNKNOWN_ID = '0003:046D:C52B.0003'
+
+class HardwareIndexTest(unittest.TestCase):
+    def test_parse_device_id(self):
+        self.assertEqual(razer_daemon.hardware.device_base.parse_device_id(CHROMA_ID), (0x1532, 0x0203))
+        self.assertIsNone(razer_daemon.hardware.device_base.parse_device_id('0003:1532:0203'))
+        self.assertIsNone(razer_daemon.hardware.device_base.parse_device_id('event0'))
+
+    def test_index_covers_all_classes(self):
+        classes = razer_daemon.hardware.get_device_classes()
+
+        for device_class in classes:
+            self.assertIn(device_class, razer_daemon.hardware._DEVICE_CLASS_INDEX[(device_class.USB_VID, device_class.USB_PID)])
+
+    @unittest.mock.patch('razer_daemon.hardware.device_base.os.path.exists', lambda path: True)
+    def test_single_candidate(self):
+        device_class = razer_daemon.hardware.get_device_class(MAMBA_ID, event_files=[])
+
+        self.assertIs(device_class, razer_daemon.hardware.RazerMambaChromaWireless)
+
+    @unittest.mock.patch('razer_daemon.hardware.device_base.os.path.exists', lambda path: True)
+    def test_shared_pid_by_event_file(self):
+        chroma_x = razer_daemon.hardware.get_device_class(CHROMA_ID, event_files=['usb-Razer_Razer_BlackWidow_X_Chroma-event-kbd'])
+        chroma = razer_daemon.hardware.get_device_class(CHROMA_ID, event_files=['usb-Razer_Razer_BlackWidow_Chroma-if01-event-kbd'])
+
+        self.assertIs(chroma_x, razer_daemon.hardware.RazerBlackWidowChromaX)
+        self.assertIs(chroma, razer_daemon.hardware.RazerBlackWidowChroma)
+
+    @unittest.mock.patch('razer_daemon.hardware.device_base.os.path.exists', lambda path: True)
+    @unittest.mock.patch('logging.getLogger')
+    def test_shared_pid_fallback(self, logger_mock):
+        device_class = razer_daemon.hardware.get_device_class(CHROMA_ID, event_files=['usb-Logitech_USB_Receiver-event-kbd'])
+
+        self.assertIs(device_class, razer_daemon.hardware.RazerBlackWidowChroma)
+        logger_mock.return_value.warning.assert_called_once()
+
+    def test_find_event_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hid_devices_path = os.path.join(tmp_dir, 'hid')
+            by_id_path = os.path.join(tmp_dir, 'by-id')
+            usb_device_path = os.path.join(tmp_dir, 'usb1', '1-1')
+            os.makedirs(hid_devices_path)
+            os.makedirs(by_id_path)
+
+            # The driver files are on interface 0, the keyboard events on interface 1
+            interface0 = os.path.join(usb_device_path, '1-1:1.0', CHROMA_ID)
+            interface1 = os.path.join(usb_device_path, '1-1:1.1', '0003:1532:0203.0002')
+            os.makedirs(os.path.join(interface0, 'input', 'input3', 'event3'))
+            os.makedirs(os.path.join(interface1, 'input', 'input4', 'event4'))
+            os.symlink(interface0, os.path.join(hid_devices_path, CHROMA_ID))
+
+            # Another keyboard on a different USB device
+            os.makedirs(os.path.join(tmp_dir, 'usb1', '1-2', '1-2:1.0', '0003:1532:0203.0003', 'input', 'input5', 'event5'))
+
+            os.symlink('../event3', os.path.join(by_id_path, 'usb-Razer_Razer_BlackWidow_X_Chroma-event-kbd'))
+            os.symlink('../event4', os.path.join(by_id_path, 'usb-Razer_Razer_BlackWidow_X_Chroma-if01-event-kbd'))
+            os.symlink('../event5', os.path.join(by_id_path, 'usb-Razer_Razer_BlackWidow_Chroma-event-kbd'))
+
+            with unittest.mock.patch('razer_daemon.hardware.device_base.HID_DEVICES_PATH', hid_devices_path), \
+                    unittest.mock.patch('razer_daemon.hardware.device_base.EVENT_FILES_PATH', by_id_path):
+                event_files = razer_daemon.hardware.device_base.find_event_files(CHROMA_ID)
+
+                self.assertEqual(event_files, ['usb-Razer_Razer_BlackWidow_X_Chroma-event-kbd', 'usb-Razer_Razer_BlackWidow_X_Chroma-if01-event-kbd'])
+                self.assertEqual(razer_daemon.hardware.device_base.find_event_files('0003:1532:0203.0009'), [])
+
+    @unittest.mock.patch('razer_daemon.hardware.device_base.os.path.exists', lambda path: True)
+    def test_unknown_device(self):
+        self.assertIsNone(razer_daemon.hardware.get_device_class(UNKNOWN_ID, event_files=[]))
+        self.assertIsNone(razer_daemon.hardware.get_device_class('garbage', event_files=[]))
+
+    @unittest.mock.patch('razer_daemon.hardware.device_base.os.path.exists', lambda path: False)
+    def test_driver_not_bound(self):
+        self.assertIsNone(razer_daemon.hardware.get_device_class(MAMBA_ID, event_files=[]))
@@ -0,0 +1,156 @@
+"""
+Razer report and hidraw backend tests, against the fake report device
+"""
+import errno
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from razer_daemon.misc import razer_report
+from razer_daemon.misc.fake_report_device import FakeReportDevice
+from razer_daemon.misc.hidraw import HidrawDriverFiles, find_hidraw_node
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class DummyDriverFiles(object):
+    def __init__(self):
+        self.writes = []
+        self.open_files = 0
+        self.is_closed = False
+
+    def read(self, driver_filename):
+        return b'1\n'
+
+    def write(self, driver_filename, payload):
+        self.writes.append((driver_filename, payload))
+        return len(payload)
+
+    def close(self):
+        self.is_closed = True
+
+
+def frame(rows):
+    return b''.join(bytes([row]) + bytes([row, 0x10, 0x20]) * razer_report.CHROMA_ROW_LEN for row in rows)
+
+
+class RazerReportTest(unittest.TestCase):
+
+    def test_build_report(self):
+        # Matches what razer_set_static_mode in razerkbd_driver.c sends
+        report = razer_report.static_report(b'\xff\x00\x80')
+
+        self.assertEqual(len(report), razer_report.REPORT_LEN)
+        self.assertEqual(report[:12], bytes([0x00, 0xFF, 0x00, 0x00, 0x00, 0x04, 0x03, 0x0A, 0x06, 0xFF, 0x00, 0x80]))
+        self.assertEqual(report[88], 0x04 ^ 0x03 ^ 0x0A ^ 0x06 ^ 0xFF ^ 0x80)
+        self.assertEqual(report[88], razer_report.calculate_crc(report))
+
+        # Status and transaction ID are not in the CRC
+        self.assertEqual(razer_report.calculate_crc(b'\x02\x80' + report[2:]), report[88])
+
+    def test_parse_report(self):
+        fields = razer_report.parse_report(razer_report.key_row_report(3, bytes(range(66))))
+
+        self.assertEqual((fields.command_class, fields.command_id, fields.data_size), (0x03, 0x0B, 0x46))
+        self.assertEqual(fields.arguments[:4], bytes([0xFF, 3, 0x00, 21]))
+        self.assertEqual(fields.arguments[4:70], bytes(range(66)))
+
+        with self.assertRaises(razer_report.ReportError):
+            razer_report.parse_report(b'\x00' * 64)
+        with self.assertRaises(ValueError):
+            razer_report.build_report(0x03, 0x0B, 0x50, bytes(81))
+
+    def test_check_response(self):
+        request = razer_report.brightness_request()
+        response = bytearray(razer_report.build_report(0x03, 0x83, 0x03, [0x01, 0x05, 0x80]))
+
+        response[0] = razer_report.STATUS_BUSY
+        with self.assertRaises(razer_report.ReportError) as context:
+            razer_report.check_response(request, bytes(response))
+        # Retried by the I/O policy
+        self.assertEqual(context.exception.errno, errno.EIO)
+
+        response[0] = razer_report.STATUS_SUCCESSFUL
+        self.assertEqual(razer_report.check_response(request, bytes(response)).arguments[2], 0x80)
+
+
+@unittest.mock.patch('razer_daemon.misc.hidraw.logging.getLogger', logger_mock)
+class HidrawDriverFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.device = FakeReportDevice()
+        self.fallback = DummyDriverFiles()
+        self.driver_files = HidrawDriverFiles(self.device, self.fallback)
+
+    def commands(self):
+        return [(fields.command_class, fields.command_id, fields.arguments[0]) for _, fields in self.device.transactions]
+
+    def test_frame(self):
+        payload = frame(range(6))
+        self.assertEqual(self.driver_files.write('set_key_row', payload), len(payload))
+        self.driver_files.write('mode_custom', b'1')
+
+        # A report per row, then reset and custom mode
+        self.assertEqual(self.commands(), [(0x03, 0x0B, 0xFF)] * 6 + [(0x03, 0x00, 0x01), (0x03, 0x0A, 0x05)])
+        self.assertEqual(self.device.rows[5], bytes([5, 0x10, 0x20]) * razer_report.CHROMA_ROW_LEN)
+        self.assertEqual(self.device.effect, (0x05, b'\x01'))
+        self.assertEqual(self.device.bad_reports, 0)
+
+        with self.assertRaises(OSError):
+            self.driver_files.write('set_key_row', payload[:-1])
+
+    def test_effects(self):
+        self.driver_files.write('mode_breath', b'\x00\xff\x00\xff\x00\x00')
+        self.assertEqual(self.device.effect, (0x03, b'\x02\x00\xff\x00\xff\x00\x00'))
+
+        self.driver_files.write('mode_reactive', b'\x02\x00\x00\xff')
+        self.assertEqual(self.device.effect, (0x02, b'\x02\x00\x00\xff'))
+
+        # Ignored like the driver does
+        self.driver_files.write('mode_reactive', b'\x09\x00\x00\xff')
+        self.assertEqual(self.device.effect, (0x02, b'\x02\x00\x00\xff'))
+
+        self.driver_files.write('mode_wave', b'2')
+        self.assertEqual(self.device.effect, (0x01, b'\x02'))
+
+    def test_brightness(self):
+        self.driver_files.write('set_brightness', b'128')
+        self.assertEqual(self.device.brightness, 128)
+        self.assertEqual(self.driver_files.read('set_brightness'), b'128\n')
+        self.assertEqual(self.device.transactions[-1][0], 'request')
+
+    def test_fallback(self):
+        self.driver_files.write('mode_game', b'1')
+        self.assertEqual(self.fallback.writes, [('mode_game', b'1')])
+        self.assertEqual(self.driver_files.read('mode_macro'), b'1\n')
+        self.assertEqual(self.device.transactions, [])
+
+        self.driver_files.close()
+        self.assertTrue(self.device.is_closed)
+        self.assertTrue(self.fallback.is_closed)
+
+    def test_bad_crc(self):
+        report = bytearray(razer_report.none_report())
+        report[88] ^= 0xFF
+
+        with self.assertRaises(razer_report.ReportError):
+            self.device.send(bytes(report))
+        self.assertEqual(self.device.bad_reports, 1)
+        self.assertEqual(self.device.transactions, [])
+
+
+class FindHidrawNodeTest(unittest.TestCase):
+
+    def test_find_node(self):
+        with tempfile.TemporaryDirectory() as sysfs:
+            usb_device = os.path.join(sysfs, 'usb1', '1-1')
+            for interface, hidraw in ((0, 'hidraw3'), (2, 'hidraw5')):
+                hid_device = os.path.join(usb_device, '1-1:1.{0}'.format(interface), '0003:1532:0203.000{0}'.format(interface))
+                os.makedirs(os.path.join(hid_device, 'hidraw', hidraw))
+
+            device_path = os.path.join(usb_device, '1-1:1.0', '0003:1532:0203.0000')
+            self.assertEqual(find_hidraw_node(device_path, 2), '/dev/hidraw5')
+            self.assertIsNone(find_hidraw_node(device_path, 1))
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.hotplug
+
+DEVICE1_ID = '0003:1532:0203.0001'
+DEVICE2_ID = '0003:046D:C52B.0002'
+
+
+def make_uevent(action, device_id, subsystem='hid'):
+    devpath = '/devices/pci0000:00/0000:00:14.0/usb1/1-1/1-1:1.0/' + device_id
+    fields = [
+        '{0}@{1}'.format(action, devpath),
+        'ACTION=' + action,
+        'DEVPATH=' + devpath,
+        'SUBSYSTEM=' + subsystem,
+        'SEQNUM=1234',
+    ]
+    return '\0'.join(fields).encode() + b'\0'
+
+
+class FakeUeventSource(object):
+    def __init__(self, messages=None):
+        self.messages = list(messages or [])
+        self.closed = False
+
+    def fileno(self):
+        return -1
+
+    def receive(self):
+        if len(self.messages) > 0:
+            return self.messages.pop(0)
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+class ParseUeventTest(unittest.TestCase):
+    def test_parse_kernel_event(self):
+        event = razer_daemon.misc.hotplug.parse_uevent(make_uevent('add', DEVICE1_ID))
+
+        self.assertEqual(event['ACTION'], 'add')
+        self.assertEqual(event['SUBSYSTEM'], 'hid')
+        self.assertTrue(event['DEVPATH'].endswith(DEVICE1_ID))
+
+    def test_parse_udev_event(self):
+        # Messages rebroadcast by udevd have a binary header and are ignored
+        self.assertIsNone(razer_daemon.misc.hotplug.parse_uevent(b'libudev\0\xfe\xed\xca\xfe'))
+
+    def test_parse_garbage(self):
+        self.assertIsNone(razer_daemon.misc.hotplug.parse_uevent(b''))
+        self.assertIsNone(razer_daemon.misc.hotplug.parse_uevent(b'add@/devices/x\0'))
+
+class HotplugMonitorTest(unittest.TestCase):
+    @unittest.mock.patch('razer_daemon.misc.hotplug.logging.getLogger', logger_mock)
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp(prefix='razer_test_sysfs_')
+        self.source = FakeUeventSource()
+        self.on_add = unittest.mock.MagicMock()
+        self.on_remove = unittest.mock.MagicMock()
+
+        self.monitor = razer_daemon.misc.hotplug.HotplugMonitor(self.on_add, self.on_remove, uevent_source=self.source, hid_path=self.sysfs)
+
+    def tearDown(self):
+        self.monitor.close()
+        shutil.rmtree(self.sysfs)
+
+    def test_add_existing_device(self):
+        os.mkdir(os.path.join(self.sysfs, DEVICE1_ID))
+        self.source.messages.append(make_uevent('add', DEVICE1_ID))
+
+        self.assertEqual(self.monitor.process_events(), 1)
+        self.on_add.assert_called_once_with(DEVICE1_ID)
+        self.assertFalse(self.on_remove.called)
+
+    def test_add_vanished_device(self):
+        # Device was unplugged before the event was read
+        self.source.messages.append(make_uevent('add', DEVICE1_ID))
+
+        self.monitor.process_events()
+        self.assertFalse(self.on_add.called)
+
+    def test_bind_device(self):
+        os.mkdir(os.path.join(self.sysfs, DEVICE1_ID))
+        self.source.messages.append(make_uevent('bind', DEVICE1_ID))
+
+        self.monitor.process_events()
+        self.on_add.assert_called_once_with(DEVICE1_ID)
+
+    def test_remove_device(self):
+        self.source.messages.append(make_uevent('remove', DEVICE1_ID))
+
+        self.monitor.process_events()
+        self.on_remove.assert_called_once_with(DEVICE1_ID)
+        self.assertFalse(self.on_add.called)
+
+    def test_other_subsystem_ignored(self):
+        os.mkdir(os.path.join(self.sysfs, DEVICE2_ID))
+        self.source.messages.append(make_uevent('add', DEVICE2_ID, subsystem='input'))
+        self.source.messages.append(make_uevent('remove', DEVICE2_ID, subsystem='usb'))
+
+        self.assertEqual(self.monitor.process_events(), 2)
+        self.assertFalse(self.on_add.called)
+        self.assertFalse(self.on_remove.called)
+
+    def test_drain_in_order(self):
+        os.mkdir(os.path.join(self.sysfs, DEVICE1_ID))
+        os.mkdir(os.path.join(self.sysfs, DEVICE2_ID))
+        self.source.messages.extend([make_uevent('add', DEVICE1_ID), make_uevent('add', DEVICE2_ID), make_uevent('remove', DEVICE1_ID)])
+
+        self.assertEqual(self.monitor.process_events(), 3)
+        self.assertEqual([call[0][0] for call in self.on_add.call_args_list], [DEVICE1_ID, DEVICE2_ID])
+        self.on_remove.assert_called_once_with(DEVICE1_ID)
+
+    def test_close(self):
+        self.monitor.close()
+        self.assertTrue(self.source.closed)
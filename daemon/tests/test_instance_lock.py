@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import razer_daemon.misc.instance_lock
+
+
+class InstanceLockTest(unittest.TestCase):
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp(prefix='razer_test_run_')
+        self.lock_path = razer_daemon.misc.instance_lock.get_lock_path(self.run_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.run_dir)
+
+    def test_lock_path(self):
+        self.assertEqual(self.lock_path, os.path.join(self.run_dir, razer_daemon.misc.instance_lock.LOCK_FILENAME))
+        self.assertTrue(razer_daemon.misc.instance_lock.get_lock_path(None).endswith('.lock'))
+
+    def test_acquire_release(self):
+        lock = razer_daemon.misc.instance_lock.InstanceLock(self.lock_path)
+
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.locked)
+        self.assertEqual(lock.owner_pid(), os.getpid())
+
+        lock.release()
+        self.assertFalse(lock.locked)
+        self.assertIsNone(lock.owner_pid())
+
+    def test_second_instance(self):
+        lock1 = razer_daemon.misc.instance_lock.InstanceLock(self.lock_path)
+        lock2 = razer_daemon.misc.instance_lock.InstanceLock(self.lock_path)
+
+        self.assertTrue(lock1.acquire())
+        self.assertFalse(lock2.acquire())
+        self.assertFalse(lock2.acquire(timeout=0.1))
+
+        lock1.release()
+        self.assertTrue(lock2.acquire())
+        lock2.release()
@@ -0,0 +1,128 @@
+"""
+Retry and circuit breaker tests
+"""
+import errno
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.io_policy
+from razer_daemon.misc.io_policy import Backoff, CircuitBreaker, DeviceDegradedError, IOPolicy
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyFile(object):
+    """
+    Driver file which answers with a queue of results, exceptions are raised
+    """
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def read(self):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@unittest.mock.patch('razer_daemon.misc.io_policy.logging.getLogger', logger_mock)
+@unittest.mock.patch('razer_daemon.misc.io_policy.time.sleep', lambda seconds: None)
+class IOPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def new_policy(self, threshold=2, timeout=10):
+        return IOPolicy(0, attempts=3, breaker=CircuitBreaker(threshold, timeout, clock=self.clock))
+
+    def test_retry_until_success(self):
+        policy = self.new_policy()
+        driver_file = FlakyFile(OSError(errno.EIO, 'I/O error'), OSError(errno.ETIMEDOUT, 'Timed out'), '255')
+
+        self.assertEqual(policy.call(driver_file.read), '255')
+        self.assertEqual(driver_file.calls, 3)
+        self.assertEqual(policy.breaker.state, razer_daemon.misc.io_policy.HEALTH_HEALTHY)
+
+    def test_single_attempt(self):
+        policy = self.new_policy()
+        driver_file = FlakyFile(OSError(errno.EIO, 'I/O error'), '255')
+
+        with self.assertRaises(OSError):
+            policy.call(driver_file.read, retry=False)
+        self.assertEqual(driver_file.calls, 1)
+
+    def test_non_retryable(self):
+        policy = self.new_policy(threshold=1)
+        driver_file = FlakyFile(OSError(errno.ENOENT, 'No such file'))
+
+        with self.assertRaises(FileNotFoundError):
+            policy.call(driver_file.read)
+        self.assertEqual(driver_file.calls, 1)
+        # Not the device's fault
+        self.assertEqual(policy.breaker.state, razer_daemon.misc.io_policy.HEALTH_HEALTHY)
+
+    def test_invalid_result(self):
+        policy = self.new_policy()
+        driver_file = FlakyFile('-1', '-1', '200')
+        self.assertEqual(policy.call(driver_file.read, valid_func=lambda value: value != '-1'), '200')
+
+        # Still invalid after the retries, the last result is returned and counted as a failure
+        driver_file = FlakyFile('-1')
+        self.assertEqual(policy.call(driver_file.read, valid_func=lambda value: value != '-1'), '-1')
+        self.assertEqual(driver_file.calls, 3)
+        self.assertEqual(policy.breaker.to_dict()['consecutive_failures'], 1)
+
+    def test_degraded_and_recovery(self):
+        policy = self.new_policy(threshold=2, timeout=10)
+        driver_file = FlakyFile(OSError(errno.EIO, 'I/O error'))
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                policy.call(driver_file.read)
+        self.assertEqual(driver_file.calls, 6)
+        self.assertEqual(policy.breaker.state, razer_daemon.misc.io_policy.HEALTH_DEGRADED)
+
+        # Fails fast without touching the device
+        with self.assertRaises(DeviceDegradedError):
+            policy.call(driver_file.read)
+        self.assertEqual(driver_file.calls, 6)
+        self.assertEqual(policy.breaker.to_dict()['retry_in'], 10)
+
+        # Failed probe, degraded for another timeout
+        self.clock.now = 10
+        with self.assertRaises(OSError):
+            policy.call(driver_file.read, retry=False)
+        self.assertEqual(driver_file.calls, 7)
+        self.assertEqual(policy.breaker.state, razer_daemon.misc.io_policy.HEALTH_DEGRADED)
+        with self.assertRaises(DeviceDegradedError):
+            policy.call(driver_file.read)
+
+        # Device is back
+        self.clock.now = 20
+        driver_file.results = ['100']
+        self.assertEqual(policy.call(driver_file.read), '100')
+        self.assertEqual(policy.breaker.to_dict()['state'], razer_daemon.misc.io_policy.HEALTH_HEALTHY)
+        self.assertEqual(policy.breaker.to_dict()['failures'], 3)
+
+    def test_backoff(self):
+        backoff = Backoff(0.1, 0.4, jitter=0.5)
+        delays = [backoff.next() for _ in range(5)]
+
+        for delay, maximum in zip(delays, (0.1, 0.2, 0.4, 0.4, 0.4)):
+            self.assertLessEqual(delay, maximum)
+            self.assertGreaterEqual(delay, maximum / 2)
+
+        backoff.reset()
+        self.assertLessEqual(backoff.next(), 0.1)
@@ -0,0 +1,79 @@
+"""
+Driver I/O latency stats tests
+"""
+import errno
+import unittest
+
+from razer_daemon.misc import io_stats
+from razer_daemon.misc.driver_backend import FakeBackend
+from razer_daemon.misc.io_stats import IoStatsBackend, LatencyHistogram
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.latency = 0.0
+
+    def __call__(self):
+        # Each call is latency after the last, so a timed call takes latency
+        self.now += self.latency
+        return self.now
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_buckets(self):
+        # Every value falls in the bucket whose range holds it, buckets are contiguous
+        last_index = -1
+        for value in range(5000):
+            index = io_stats.bucket_index(value)
+            low, high = io_stats.bucket_range(index)
+            self.assertTrue(low <= value <= high, value)
+            self.assertIn(index, (last_index, last_index + 1))
+            last_index = index
+
+        # Within an eighth of the value
+        low, high = io_stats.bucket_range(io_stats.bucket_index(1000000))
+        self.assertLessEqual(high - low, 1000000 / io_stats.SUB_BUCKETS)
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.record(0.0005)
+        for _ in range(10):
+            histogram.record(0.02)
+
+        stats = histogram.to_dict()
+        self.assertEqual((stats['count'], stats['min_us'], stats['max_us']), (100, 500, 20000))
+        self.assertAlmostEqual(stats['mean_us'], 2450)
+        self.assertTrue(500 <= stats['p50_us'] < 500 * 1.125)
+        self.assertTrue(500 <= stats['p90_us'] < 500 * 1.125)
+        self.assertEqual(stats['p99_us'], 20000)
+        self.assertEqual(sum(stats['buckets'].values()), 100)
+
+        self.assertEqual(LatencyHistogram().to_dict()['p99_us'], 0)
+
+
+class IoStatsBackendTest(unittest.TestCase):
+
+    def test_stats(self):
+        clock = FakeClock()
+        fake_backend = FakeBackend({'get_battery': 200})
+        backend = IoStatsBackend(fake_backend, clock)
+
+        clock.latency = 0.001
+        for _ in range(6):
+            backend.write('set_key_row', bytes(67))
+        clock.latency = 0.01
+        self.assertEqual(backend.read_attribute('get_battery'), 200)
+
+        fake_backend.errors['mode_custom'] = OSError(errno.EIO, 'I/O error')
+        with self.assertRaises(OSError):
+            backend.write('mode_custom', b'1')
+
+        stats = backend.stats()
+        self.assertEqual(stats['set_key_row']['write']['count'], 6)
+        self.assertEqual(stats['set_key_row']['write']['max_us'], 1000)
+        self.assertEqual(stats['get_battery']['read']['p50_us'], 10000)
+        self.assertEqual((stats['mode_custom']['write']['count'], stats['mode_custom']['write']['errors']), (1, 1))
+        self.assertNotIn('read', stats['set_key_row'])
@@ -0,0 +1,109 @@
+"""
+Scheduler tests, runs on a plain asyncio loop
+"""
+import asyncio
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.scheduler
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class SchedulerTest(unittest.TestCase):
+
+    @unittest.mock.patch('razer_daemon.misc.scheduler.logging.getLogger', logger_mock)
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.scheduler = razer_daemon.misc.scheduler.Scheduler(self.loop)
+
+    def tearDown(self):
+        self.scheduler.close()
+        self.loop.close()
+
+    def run_for(self, seconds):
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+
+    def test_call_later(self):
+        callback = unittest.mock.MagicMock(__name__='callback')
+        job = self.scheduler.call_later(0.01, callback, 1, 2)
+
+        self.run_for(0.05)
+
+        callback.assert_called_once_with(1, 2)
+        self.assertEqual(job.stats.runs, 1)
+        # One-shot jobs are dropped once run
+        self.assertEqual(self.scheduler.jobs, [])
+
+    def test_call_every(self):
+        callback = unittest.mock.MagicMock()
+        job = self.scheduler.call_every(0.01, callback, name='periodic', delay=0)
+
+        self.run_for(0.1)
+
+        # Loose bounds, the loop can be late and runs can start up to the coalescing window early
+        max_runs = 1 + int((0.1 + razer_daemon.misc.scheduler.COALESCE_WINDOW) / 0.01)
+        self.assertGreaterEqual(callback.call_count, 3)
+        self.assertLessEqual(callback.call_count, max_runs)
+        self.assertEqual(self.scheduler.stats()[job.job_id]['runs'], callback.call_count)
+        self.assertEqual(self.scheduler.stats()[job.job_id]['name'], 'periodic')
+
+    def test_cancel(self):
+        callback = unittest.mock.MagicMock()
+        job = self.scheduler.call_every(0.01, callback, name='periodic')
+        job.cancel()
+
+        self.run_for(0.03)
+
+        self.assertFalse(callback.called)
+        self.assertNotIn(job.job_id, self.scheduler.stats())
+        # Nothing left so no timer should be armed
+        self.assertIsNone(self.scheduler._timer)
+
+    def test_coalescing(self):
+        order = []
+        self.scheduler.call_later(0.01, order.append, 'first')
+        self.scheduler.call_later(0.015, order.append, 'second')
+        self.scheduler.call_later(0.2, order.append, 'later')
+
+        with unittest.mock.patch.object(self.scheduler, '_run_due', wraps=self.scheduler._run_due) as run_due:
+            # Rearm so the wrapped method is the one called
+            self.scheduler._timer.cancel()
+            self.scheduler._timer = None
+            self.scheduler._arm()
+
+            self.run_for(0.05)
+
+            # Both jobs within the window ran in one wakeup
+            self.assertEqual(order, ['first', 'second'])
+            self.assertEqual(run_due.call_count, 1)
+
+    def test_jitter(self):
+        job = self.scheduler.call_every(1, unittest.mock.MagicMock(), jitter=0.5)
+        start = self.loop.time()
+
+        self.assertGreaterEqual(job.due, start + 0.99)
+        self.assertLessEqual(job.due, start + 1.5)
+
+    def test_failing_job(self):
+        callback = unittest.mock.MagicMock(side_effect=ValueError)
+        job = self.scheduler.call_every(0.01, callback, name='failing', delay=0)
+
+        self.run_for(0.025)
+
+        stats = self.scheduler.stats()[job.job_id]
+        self.assertGreaterEqual(stats['failures'], 2)
+        self.assertEqual(stats['failures'], stats['runs'])
+        self.assertTrue(self.scheduler._logger.exception.called)
+
+    def test_same_name(self):
+        first = self.scheduler.call_every(1, unittest.mock.MagicMock(), name='battery Razer Mamba')
+        second = self.scheduler.call_every(1, unittest.mock.MagicMock(), name='battery Razer Mamba')
+
+        stats = self.scheduler.stats()
+
+        self.assertNotEqual(first.job_id, second.job_id)
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats[second.job_id]['name'], 'battery Razer Mamba')
@@ -1,9 +1,8 @@
 """
-Hardcore mocking to remove the need for starting the thread and dbus
+Hardcore mocking to remove the need for dbus
 """
 import unittest
 import unittest.mock
-import time
 
 import razer_daemon.misc.screensaver_thread
 
@@ -11,109 +10,77 @@ class DummyParent(object):
     def __init__(self):
         self.suspend_devices = unittest.mock.MagicMock()
         self.resume_devices = unittest.mock.MagicMock()
-    #     self.resume_called = False
-    #     self.suspend_called = False
-    #
-    # def resume_devices(self):
-    #     self.resume_called = True
-    #
-    # def suspend_devices(self):
-    #     self.suspend_called = True
-
-
-def get_dbus_session(*args):
-    # Setup dbus mock
-    dbus_session_mock = unittest.mock.MagicMock()
-    dbus_session_mock.get_object.return_value = 'screensaver_object'
-    return dbus_session_mock
 
-def get_dbus_session_exception(*args):
-    # Setup dbus mock
-    raise razer_daemon.misc.screensaver_thread.dbus.exceptions.DBusException
 
-def get_dbus_interface(*args):
-    # Setup dbus interface mock
-    dbus_interface = unittest.mock.MagicMock()
-    dbus_interface.GetActive.side_effect = [False,False,True,True,True,True,True,False,False]
-    return dbus_interface
+class DummySessionBus(object):
+    def __init__(self):
+        self.receivers = []
+
+    def add_signal_receiver(self, handler, signal_name=None, dbus_interface=None, bus_name=None, path=None):
+        signal_match = unittest.mock.MagicMock()
+        self.receivers.append((handler, signal_name, dbus_interface, bus_name, path, signal_match))
+        return signal_match
 
-def get_dbus_interface_exception(*args):
-    # Setup dbus interface mock
+
+def get_dbus_session_exception(*args):
     raise razer_daemon.misc.screensaver_thread.dbus.exceptions.DBusException
 
 def logger_mock(*args):
     return unittest.mock.MagicMock()
 
-class ScreensaverThreadTest(unittest.TestCase):
-
-    def __init__(self, *args):
-        super(ScreensaverThreadTest, self).__init__(*args)
-
-        self.screensaver_active = False
+class ScreensaverMonitorTest(unittest.TestCase):
 
     @unittest.mock.patch('razer_daemon.misc.screensaver_thread.logging.getLogger', logger_mock)
     def setUp(self):
         self.parent = DummyParent()
-        self.screensaver = razer_daemon.misc.screensaver_thread.ScreensaverThread(self.parent, active=True)
+        self.screensaver = razer_daemon.misc.screensaver_thread.ScreensaverMonitor(self.parent, active=True)
+        self.session_bus = DummySessionBus()
 
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.time.sleep', get_dbus_session)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.SessionBus', get_dbus_session)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.Interface', get_dbus_interface)
-    def test_thread_start_stop(self):
-        self.screensaver.start()
-
-        time.sleep(0.5)
+    def tearDown(self):
+        self.screensaver.close()
 
-        self.screensaver.shutdown = True
-        self.screensaver.join(timeout=2)
-        self.assertFalse(self.screensaver.is_alive())
+    def test_start_stop(self):
+        with unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.SessionBus', lambda: self.session_bus):
+            self.screensaver.start()
+        self.assertTrue(self.screensaver.running)
 
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.SessionBus', get_dbus_session)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.Interface', get_dbus_interface)
-    def test_load_dbus(self):
-        self.screensaver.load_dbus()
+        # One receiver per screensaver, nothing is polled
+        self.assertEqual(len(self.session_bus.receivers), len(razer_daemon.misc.screensaver_thread.DBUS_OPTIONS))
+        for handler, signal_name, dbus_interface, _, _, _ in self.session_bus.receivers:
+            self.assertEqual(handler, self.screensaver.screensaver_active_changed)
+            self.assertEqual(signal_name, 'ActiveChanged')
+        self.assertEqual(self.session_bus.receivers[0][2], 'org.gnome.ScreenSaver')
 
-        self.assertTrue(isinstance(self.screensaver._dbus_interface, unittest.mock.MagicMock))
+        self.screensaver.close()
+        self.assertFalse(self.screensaver.running)
+        for receiver in self.session_bus.receivers:
+            self.assertTrue(receiver[-1].remove.called)
 
     @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.SessionBus', get_dbus_session_exception)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.Interface', get_dbus_interface)
-    def test_load_dbus_exception(self):
+    def test_start_no_bus(self):
         # Exception should be caught
-        self.screensaver.load_dbus()
+        self.screensaver.start()
 
-        self.assertIsNone(self.screensaver._dbus_interface)
+        self.assertFalse(self.screensaver.running)
         self.assertTrue(self.screensaver.logger.exception.called)
 
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.SessionBus', get_dbus_session)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.Interface', get_dbus_interface_exception)
-    def test_load_dbus_no_screensaver(self):
-        # Exception should be caught
-        self.screensaver.load_dbus()
+    def test_active_changed(self):
+        for screensaver_active in (False, True, True, False, False):
+            self.screensaver.screensaver_active_changed(screensaver_active)
 
-        self.assertIsNone(self.screensaver._dbus_interface)
-        self.assertTrue(self.screensaver.logger.warning.called)
+        self.assertEqual(self.parent.suspend_devices.call_count, 1)
+        self.assertEqual(self.parent.resume_devices.call_count, 1)
 
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.time.sleep', get_dbus_session)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.SessionBus', get_dbus_session)
-    @unittest.mock.patch('razer_daemon.misc.screensaver_thread.dbus.Interface', get_dbus_interface)
-    def test_run_active(self):
-        type(self.screensaver)._shutdown = unittest.mock.PropertyMock(side_effect=[False,False,False,False,False,False,False,False,False,False,False,False,False,True])
-        self.screensaver.run()
-
-        self.assertTrue(self.screensaver._dbus_interface.GetActive.called)
-        self.assertTrue(self.parent.resume_devices.called)
-        self.assertTrue(self.parent.suspend_devices.called)
+    def test_active_changed_disabled(self):
+        self.screensaver.active = False
+        self.screensaver.screensaver_active_changed(True)
 
-        type(self.screensaver)._shutdown = False
+        self.assertFalse(self.parent.suspend_devices.called)
 
     def test_properties(self):
-        self.screensaver.shutdown = True
-        self.assertTrue(self.screensaver.shutdown)
-        self.screensaver.shutdown = False
-        self.assertFalse(self.screensaver.shutdown)
-
         self.screensaver.active = True
         self.assertTrue(self.screensaver.active)
         self.screensaver.active = False
         self.assertFalse(self.screensaver.active)
 
+        self.assertFalse(self.screensaver.running)
@@ -0,0 +1,61 @@
+import unittest
+
+import razer_daemon.hardware
+from razer_daemon.dbus_services.dbus_methods import ENDPOINTS
+from razer_daemon.hardware.device_base import DEVICE_METHODS, RazerDevice
+
+
+class ServiceClassTest(unittest.TestCase):
+    def test_endpoint_registry(self):
+        self.assertIn('get_battery', ENDPOINTS)
+        self.assertIn('set_custom_effect', ENDPOINTS)
+        self.assertEqual(ENDPOINTS['get_battery'].name, 'getBattery')
+        # The decorator isnt an endpoint
+        self.assertNotIn('endpoint', ENDPOINTS)
+
+        for device_class in razer_daemon.hardware.get_device_classes():
+            for method_name in device_class.METHODS:
+                self.assertIn(method_name, ENDPOINTS, "{0} of {1}".format(method_name, device_class.__name__))
+
+    def test_service_class_cached(self):
+        mamba = razer_daemon.hardware.RazerMambaChromaWireless
+
+        service_class = mamba.get_service_class()
+
+        self.assertIs(mamba.get_service_class(), service_class)
+        self.assertIs(service_class.get_service_class(), service_class)
+        self.assertTrue(issubclass(service_class, mamba))
+        self.assertEqual(service_class.__name__, mamba.__name__)
+
+    def test_methods_on_service_class_only(self):
+        mamba = razer_daemon.hardware.RazerMambaChromaWireless
+        chroma = razer_daemon.hardware.RazerBlackWidowChroma
+
+        mamba_service = mamba.get_service_class()
+        chroma_service = chroma.get_service_class()
+
+        self.assertIn('getBattery', mamba_service.__dict__)
+        self.assertEqual(mamba_service.__dict__['getBattery']._dbus_interface, 'razer.device.power')
+        self.assertNotIn('getBattery', chroma_service.__dict__)
+        self.assertFalse(hasattr(chroma_service, 'getBattery'))
+        # The hardware classes are left as they are
+        self.assertFalse(hasattr(mamba, 'getBattery'))
+        self.assertFalse(hasattr(mamba, 'getSerial'))
+
+        # Batches are checked against the methods of the device
+        self.assertIn('getBattery', mamba_service.METHOD_TABLE)
+        self.assertNotIn('getBattery', chroma_service.METHOD_TABLE)
+
+        for _, function_name, _, _, _, _ in DEVICE_METHODS:
+            self.assertIn(function_name, mamba_service.__dict__)
+            self.assertIn(function_name, chroma_service.__dict__)
+
+    def test_new_device_is_service_class(self):
+        mamba = razer_daemon.hardware.RazerMambaChromaWireless
+
+        device = RazerDevice.__new__(mamba)
+        # Never initialised, so theres nothing to close
+        device._is_closed = True
+
+        self.assertIs(type(device), mamba.get_service_class())
+        self.assertIsInstance(device, mamba)
@@ -0,0 +1,120 @@
+"""
+Shadow state tests
+"""
+import asyncio
+import concurrent.futures
+import threading
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.shadow_state
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class DummyDriver(object):
+    def __init__(self):
+        self.files = {'set_brightness': '255\n', 'mode_game': '0\n'}
+        self.reads = 0
+
+        self.threads = set()
+
+    def read(self, driver_filename):
+        self.reads += 1
+        self.threads.add(threading.current_thread())
+        return self.files[driver_filename]
+
+
+@unittest.mock.patch('razer_daemon.misc.shadow_state.logging.getLogger', logger_mock)
+class ShadowStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.driver = DummyDriver()
+        self.shadow_state = razer_daemon.misc.shadow_state.ShadowState(self.driver.read, 0)
+        self.shadow_state.add('brightness', 'set_brightness', float)
+        self.shadow_state.add('game_mode', 'mode_game', lambda value: value == '1')
+
+    def tearDown(self):
+        self.shadow_state.close()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_seeded_once(self):
+        self.assertEqual(self.driver.reads, 2)
+
+        for _ in range(10):
+            self.assertEqual(self.shadow_state.get('brightness'), 255.0)
+            self.assertFalse(self.shadow_state.get('game_mode'))
+
+        self.assertEqual(self.driver.reads, 2)
+
+    def test_write_through(self):
+        self.shadow_state.set('game_mode', True)
+        self.assertTrue(self.shadow_state.get('game_mode'))
+        self.assertEqual(self.driver.reads, 2)
+
+        # Not shadowed, ignored
+        self.shadow_state.set('macro_mode', True)
+        with self.assertRaises(KeyError):
+            self.shadow_state.get('macro_mode')
+
+    def test_force_refresh(self):
+        self.driver.files['set_brightness'] = '128\n'
+
+        self.assertEqual(self.shadow_state.get('brightness'), 255.0)
+        self.assertEqual(self.shadow_state.get('brightness', force_refresh=True), 128.0)
+        self.assertEqual(self.shadow_state.get('brightness'), 128.0)
+
+    def test_reconcile(self):
+        self.driver.files['mode_game'] = '1\n'
+
+        self.assertEqual(self.shadow_state.reconcile(), ['game_mode'])
+        self.assertTrue(self.shadow_state.get('game_mode'))
+        self.assertEqual(self.shadow_state.reconcile(), [])
+
+    def test_periodic_reconcile(self):
+        with unittest.mock.patch('razer_daemon.misc.shadow_state.SHADOW_RECONCILE_INTERVAL', 0.01), \
+                unittest.mock.patch('razer_daemon.misc.shadow_state.SHADOW_RECONCILE_JITTER', 0):
+            self.shadow_state.start()
+
+        self.driver.files['set_brightness'] = '0\n'
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        self.assertEqual(self.shadow_state.get('brightness'), 0.0)
+        self.assertEqual(self.driver.threads, {threading.current_thread()})
+
+    def test_reconcile_on_executor(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+
+        shadow_state = razer_daemon.misc.shadow_state.ShadowState(self.driver.read, 1, executor)
+        shadow_state.add('brightness', 'set_brightness', float)
+        self.addCleanup(shadow_state.close)
+
+        with unittest.mock.patch('razer_daemon.misc.shadow_state.SHADOW_RECONCILE_INTERVAL', 0.01), \
+                unittest.mock.patch('razer_daemon.misc.shadow_state.SHADOW_RECONCILE_JITTER', 0):
+            shadow_state.start()
+
+        self.driver.files['set_brightness'] = '0\n'
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        self.assertEqual(shadow_state.get('brightness'), 0.0)
+        # The driver is only read on the main loop for the seed
+        self.assertEqual(len(self.driver.threads), 2)
+
+    def test_set_during_read(self):
+        def read_then_set(driver_filename):
+            value = self.driver.read(driver_filename)
+            # A setter runs while the read is on its way back
+            self.shadow_state.set('brightness', 50.0)
+            return value
+
+        self.shadow_state._read_func = read_then_set
+        self.shadow_state.reconcile()
+
+        self.assertEqual(self.shadow_state.get('brightness'), 50.0)
@@ -0,0 +1,52 @@
+"""
+Shutdown coordinator tests
+"""
+import threading
+import time
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.shutdown
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class ShutdownCoordinatorTest(unittest.TestCase):
+
+    @unittest.mock.patch('razer_daemon.misc.shutdown.logging.getLogger', logger_mock)
+    def setUp(self):
+        self.shutdown = razer_daemon.misc.shutdown.ShutdownCoordinator(deadline=0.5)
+
+    def test_parallel_close(self):
+        closed = []
+        for index in range(5):
+            self.shutdown.add('device{0}'.format(index), lambda index=index: (time.sleep(0.1), closed.append(index)))
+
+        start_time = time.monotonic()
+        missed = self.shutdown.run()
+
+        self.assertEqual(missed, [])
+        self.assertEqual(sorted(closed), list(range(5)))
+        # Would take 0.5s if closed one after another
+        self.assertLess(time.monotonic() - start_time, 0.4)
+
+    def test_deadline(self):
+        release = threading.Event()
+        self.shutdown.add('quick', lambda: None)
+        self.shutdown.add('stuck', release.wait)
+
+        start_time = time.monotonic()
+        missed = self.shutdown.run()
+        release.set()
+
+        self.assertEqual(missed, ['stuck'])
+        self.assertLess(time.monotonic() - start_time, 0.7)
+        self.assertTrue(self.shutdown._logger.warning.called)
+
+    def test_close_exception(self):
+        self.shutdown.add('broken', unittest.mock.MagicMock(side_effect=OSError))
+
+        self.assertEqual(self.shutdown.run(), [])
+        self.assertTrue(self.shutdown._logger.exception.called)
@@ -0,0 +1,37 @@
+"""
+Startup profiler tests
+"""
+import unittest
+import unittest.mock
+
+from razer_daemon.misc.startup_profile import StartupProfiler
+
+
+class StartupProfilerTest(unittest.TestCase):
+    def test_disabled(self):
+        profiler = StartupProfiler()
+        logger = unittest.mock.MagicMock()
+
+        with profiler.phase('read config'):
+            pass
+        profiler.mark('entering main loop')
+        profiler.report(logger)
+
+        self.assertFalse(logger.info.called)
+
+    def test_marks(self):
+        profiler = StartupProfiler(enabled=True)
+        logger = unittest.mock.MagicMock()
+
+        profiler.mark('published device.0 0003:1532:0045.0002')
+        self.assertFalse(logger.info.called)
+
+        # Marks made before the report are written with it
+        profiler.report(logger)
+        messages = [call[0][1] for call in logger.info.call_args_list if len(call[0]) > 1]
+        self.assertIn('published device.0 0003:1532:0045.0002', messages)
+
+        # Later ones straight away
+        logger.reset_mock()
+        profiler.mark('entering main loop')
+        logger.info.assert_called_once_with("Startup profile: %s at %.3fs", 'entering main loop', unittest.mock.ANY)
@@ -0,0 +1,143 @@
+"""
+State checkpoint tests, devices are plain objects with the DBus method names
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import razer_daemon.misc.state_checkpoint
+
+
+def logger_mock(*args):
+    return unittest.mock.MagicMock()
+
+
+class DummyDevice(object):
+    def __init__(self, serial):
+        self.serial = serial
+        self.observers = []
+        self.calls = []
+
+    def register_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def setBrightness(self, brightness):
+        self.calls.append(('setBrightness', brightness))
+
+    def setGameMode(self, enable):
+        self.calls.append(('setGameMode', enable))
+
+    def setStatic(self, red, green, blue):
+        self.calls.append(('setStatic', red, green, blue))
+
+
+@unittest.mock.patch('razer_daemon.misc.state_checkpoint.logging.getLogger', logger_mock)
+@unittest.mock.patch('razer_daemon.misc.state_checkpoint.get_boot_id', lambda: 'boot1')
+class StateCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.run_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        self.run_dir.cleanup()
+
+    def new_checkpoint(self):
+        return razer_daemon.misc.state_checkpoint.StateCheckpoint(self.run_dir.name, write_delay=0.01)
+
+    def test_round_trip(self):
+        checkpoint = self.new_checkpoint()
+        device = DummyDevice('XX0000000001')
+        checkpoint.attach('0003:1532:0203.0001', device)
+
+        tracker = device.observers[0]
+        tracker.notify(('effect', device, 'setBrightness', 50.0))
+        tracker.notify(('effect', device, 'setStatic', 255, 0, 0))
+        tracker.notify(('state', device, 'setGameMode', True))
+        checkpoint.flush()
+
+        restored = DummyDevice('XX0000000001')
+        self.assertTrue(self.new_checkpoint().restore(restored))
+        # State setters go before the effect
+        self.assertEqual(restored.calls, [('setBrightness', 50.0), ('setGameMode', True), ('setStatic', 255, 0, 0)])
+
+    def test_restore_unknown(self):
+        self.assertFalse(self.new_checkpoint().restore(DummyDevice('unknown')))
+
+    def test_other_device_state_ignored(self):
+        checkpoint = self.new_checkpoint()
+        device = DummyDevice('XX0000000001')
+        other = DummyDevice('XX0000000002')
+        checkpoint.attach('0003:1532:0203.0001', device)
+
+        tracker = device.observers[0]
+        # Synced effect the device supports is recorded, others and foreign state are not
+        tracker.notify(('effect', other, 'setStatic', 0, 255, 0))
+        tracker.notify(('effect', other, 'setWave', 1))
+        tracker.notify(('state', other, 'setGameMode', True))
+        checkpoint.flush()
+
+        restored = DummyDevice('XX0000000001')
+        self.new_checkpoint().restore(restored)
+        self.assertEqual(restored.calls, [('setStatic', 0, 255, 0)])
+
+    def test_throttled_write(self):
+        checkpoint = self.new_checkpoint()
+        device = DummyDevice('XX0000000001')
+        checkpoint.attach('0003:1532:0203.0001', device)
+
+        with unittest.mock.patch.object(checkpoint, 'write', wraps=checkpoint.write) as write:
+            checkpoint._write_job.cancel()
+            checkpoint._write_job = None
+
+            for brightness in range(10):
+                device.observers[0].notify(('effect', device, 'setBrightness', float(brightness)))
+            self.loop.run_until_complete(asyncio.sleep(0.05))
+
+            self.assertEqual(write.call_count, 1)
+        self.assertTrue(os.path.exists(checkpoint.path))
+        # Only the temporary file is ever written to, it gets renamed over the checkpoint
+        self.assertEqual(os.listdir(self.run_dir.name), ['state.json'])
+
+    def test_known_serial(self):
+        checkpoint = self.new_checkpoint()
+        checkpoint.attach('0003:1532:0203.0001', DummyDevice('XX0000000001'))
+        checkpoint.flush()
+
+        checkpoint = self.new_checkpoint()
+        self.assertEqual(checkpoint.known_serial('0003:1532:0203.0001', 'DummyDevice'), 'XX0000000001')
+        self.assertIsNone(checkpoint.known_serial('0003:1532:0203.0001', 'OtherClass'))
+        self.assertIsNone(checkpoint.known_serial('0003:1532:0203.0002', 'DummyDevice'))
+
+        # IDs get reused after a reboot
+        with unittest.mock.patch('razer_daemon.misc.state_checkpoint.get_boot_id', lambda: 'boot2'):
+            self.assertIsNone(self.new_checkpoint().known_serial('0003:1532:0203.0001', 'DummyDevice'))
+
+    def test_corrupt_checkpoint(self):
+        with open(os.path.join(self.run_dir.name, 'state.json'), 'w') as checkpoint_file:
+            checkpoint_file.write('{not json')
+
+        checkpoint = self.new_checkpoint()
+        self.assertTrue(checkpoint._logger.warning.called)
+        self.assertFalse(checkpoint.restore(DummyDevice('XX0000000001')))
+
+    def test_file_format(self):
+        checkpoint = self.new_checkpoint()
+        checkpoint.attach('0003:1532:0203.0001', DummyDevice('XX0000000001'))
+        checkpoint.flush()
+
+        with open(checkpoint.path, 'r') as checkpoint_file:
+            data = json.load(checkpoint_file)
+
+        self.assertEqual(data['version'], razer_daemon.misc.state_checkpoint.CHECKPOINT_VERSION)
+        self.assertEqual(data['boot_id'], 'boot1')
+        self.assertEqual(data['devices']['XX0000000001']['device_id'], '0003:1532:0203.0001')
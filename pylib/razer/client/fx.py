@@ -1,3 +1,5 @@
+from xml.etree import ElementTree as _ET
+
 import numpy as _np
 import dbus as _dbus
 #from razer.client.constants import WAVE_LEFT, WAVE_RIGHT, REACTIVE_500MS, REACTIVE_1000MS, REACTIVE_1500MS, REACTIVE_2000MS
@@ -22,6 +24,34 @@ def clamp_ubyte(value):
     return value
 
 
+def has_dbus_method(daemon_dbus, interface:str, method:str) -> bool:
+    """
+    Check if the daemon advertises a method, older daemons lack newer methods
+
+    :param daemon_dbus: Device DBus object
+    :type daemon_dbus: object
+
+    :param interface: DBus interface name
+    :type interface: str
+
+    :param method: DBus method name
+    :type method: str
+
+    :return: True if the method is in the introspection data
+    :rtype: bool
+    """
+    try:
+        xml_spec = _dbus.Interface(daemon_dbus, 'org.freedesktop.DBus.Introspectable').Introspect()
+        root = _ET.fromstring(xml_spec)
+    except (_dbus.DBusException, _ET.ParseError):
+        return False
+
+    for child in root:
+        if child.tag == 'interface' and child.attrib.get('name') == interface:
+            return any(node.tag == 'method' and node.attrib.get('name') == method for node in child)
+    return False
+
+
 # Default Chroma lighting
 class RazerFX(object):
     def __init__(self, serial:str, capabilities:dict, daemon_dbus=None, matrix_dims=(-1, -1)):
@@ -362,10 +392,16 @@ class RazerAdvancedFX(object):
             daemon_dbus = session_bus.get_object("org.razer", "/org/razer/device/{0}".format(serial))
 
         self._lighting_dbus = _dbus.Interface(daemon_dbus, "razer.device.lighting.chroma")
+        # Newer daemons take a frame in one call
+        self._has_set_frame = has_dbus_method(daemon_dbus, "razer.device.lighting.chroma", "setFrame")
 
         self.matrix = Frame(matrix_dims)
 
     def _draw(self, ba):
+        if self._has_set_frame:
+            self._lighting_dbus.setFrame(ba)
+            return
+
         self._lighting_dbus.setKeyRow(ba)
 
         self._lighting_dbus.setCustom()
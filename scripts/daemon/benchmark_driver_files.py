@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Compare writing custom frames by opening the driver files each time against the daemon's cached file descriptors
+
+A frame is what the ripple effect and the custom effect clients send, one set_key_row write per row followed by a
+mode_custom write. Run against a real device directory to include the driver's cost, by default a temporary directory
+of plain files is used. When strace is installed the script re-runs itself under strace -c to count the syscalls per
+frame, otherwise only the time is reported.
+
+  ./benchmark_driver_files.py [--device-path /sys/bus/hid/devices/0003:1532:0203.0001] [--frames 1000] [--rows 6]
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'daemon'))
+
+# pylint: disable=wrong-import-position
+from razer_daemon.misc.driver_files import DriverFileCache
+
+ROW_LENGTH = 22
+
+
+def frame_payloads(rows):
+    """
+    Build the row payloads of a frame
+
+    :param rows: Number of rows
+    :type rows: int
+
+    :return: Payloads
+    :rtype: list of bytes
+    """
+    return [bytes([row]) + bytes([0xFF, 0x00, 0x00] * ROW_LENGTH) for row in range(rows)]
+
+
+def write_frames_open(device_path, frames, rows):
+    """
+    Write frames like the endpoints used to, opening each file per write
+    """
+    payloads = frame_payloads(rows)
+    key_row_path = os.path.join(device_path, 'set_key_row')
+    custom_path = os.path.join(device_path, 'mode_custom')
+
+    for _ in range(frames):
+        for payload in payloads:
+            with open(key_row_path, 'wb') as driver_file:
+                driver_file.write(payload)
+        with open(custom_path, 'wb') as driver_file:
+            driver_file.write(b'1')
+
+
+def write_frames_cached(device_path, frames, rows):
+    """
+    Write frames through the file descriptor cache
+    """
+    payloads = frame_payloads(rows)
+    driver_files = DriverFileCache(device_path)
+
+    try:
+        for _ in range(frames):
+            for payload in payloads:
+                driver_files.write('set_key_row', payload)
+            driver_files.write('mode_custom', b'1')
+    finally:
+        driver_files.close()
+
+
+METHODS = {
+    'open': write_frames_open,
+    'cached': write_frames_cached,
+}
+
+
+def count_syscalls(method, device_path, frames, rows):
+    """
+    Run one method under strace -c
+
+    :return: Dict of syscall name to count
+    :rtype: dict
+    """
+    with tempfile.NamedTemporaryFile('r', suffix='.strace') as strace_file:
+        subprocess.check_call(['strace', '-f', '-c', '-o', strace_file.name, sys.executable, os.path.abspath(__file__),
+                               '--device-path', device_path, '--frames', str(frames), '--rows', str(rows),
+                               '--run', method])
+        counts = {}
+        for line in strace_file:
+            # % time, seconds, usecs/call, calls, [errors], syscall
+            match = re.match(r'^\s*[\d.]+\s+[\d.]+\s+\d+\s+(\d+)\s+(?:\d+\s+)?(\w+)\s*$', line)
+            if match is not None:
+                counts[match.group(2)] = int(match.group(1))
+        return counts
+
+
+def main():
+    """
+    Run the benchmark
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--device-path', help='Device directory, defaults to a temporary directory')
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--run', choices=METHODS.keys(), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    temp_dir = None
+    device_path = args.device_path
+    if device_path is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        device_path = temp_dir.name
+        for driver_filename in ('set_key_row', 'mode_custom'):
+            open(os.path.join(device_path, driver_filename), 'wb').close()
+
+    try:
+        if args.run is not None:
+            METHODS[args.run](device_path, args.frames, args.rows)
+            return
+
+        print("{0} frames of {1} rows to {2}".format(args.frames, args.rows, device_path))
+        for method_name, method in sorted(METHODS.items()):
+            start_time = time.perf_counter()
+            method(device_path, args.frames, args.rows)
+            frame_time = (time.perf_counter() - start_time) / args.frames
+            print("{0:>7}: {1:8.2f} us per frame".format(method_name, frame_time * 1e6))
+
+        if shutil.which('strace') is None:
+            print("strace not found, syscalls not counted")
+            return
+
+        # The interpreter's own start up syscalls are removed by running with no frames
+        per_frame = {}
+        for method_name in sorted(METHODS):
+            baseline = count_syscalls(method_name, device_path, 0, args.rows)
+            counts = count_syscalls(method_name, device_path, args.frames, args.rows)
+            per_frame[method_name] = sum(counts.values()) - sum(baseline.values())
+            calls = {name: count - baseline.get(name, 0) for name, count in counts.items()}
+            calls = ', '.join('{0}={1:.1f}'.format(name, count / args.frames)
+                              for name, count in sorted(calls.items(), key=lambda item: -item[1]) if count >= args.frames)
+            print("{0:>7}: {1:6.1f} syscalls per frame ({2})".format(method_name, per_frame[method_name] / args.frames, calls))
+
+        print("  saved: {0:6.1f} syscalls per frame".format((per_frame['open'] - per_frame['cached']) / args.frames))
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Replay a driver trace recorded by the daemon against fake backends
+
+Set driver_trace in razer.conf to record one. Calls are replayed at the recorded pace by default, --speed 4 replays
+four times as fast and --speed 0 as fast as possible. The fake backends take --write-latency and --read-latency per
+call, to see how a slower device would have kept up with the same workload.
+
+  ./replay_trace.py trace.bin [--speed 1] [--serial XX0000000000] [--write-latency 0.001] [--read-latency 0]
+"""
+import argparse
+import functools
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'daemon'))
+
+# pylint: disable=wrong-import-position
+from razer_daemon.misc.driver_backend import FakeBackend
+from razer_daemon.misc.driver_trace import read_trace, replay_trace
+
+
+def main():
+    """
+    Run the replay
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('trace', help='Trace file')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed, 0 for as fast as possible')
+    parser.add_argument('--serial', action='append', help='Only replay this device, can be given more than once')
+    parser.add_argument('--write-latency', type=float, default=0.0, help='Seconds each fake write takes')
+    parser.add_argument('--read-latency', type=float, default=0.0, help='Seconds each fake read takes')
+    args = parser.parse_args()
+
+    records = read_trace(args.trace)
+    if args.serial is not None:
+        records = (record for record in records if record.serial in args.serial)
+
+    backend_factory = functools.partial(FakeBackend, read_latency=args.read_latency, write_latency=args.write_latency)
+
+    try:
+        stats = replay_trace(records, args.speed, backend_factory)
+    except ValueError as err:
+        print("Stopped early: {0}".format(err))
+        return 1
+
+    print("Replayed {0} devices in {1:.3f}s, at most {2:.1f} ms behind the recorded pace".format(len(stats['serials']), stats['duration'], stats['max_lag'] * 1e3))
+    for driver_filename, attribute_stats in sorted(stats['attributes'].items()):
+        print("{0:>20}: {1:7d} calls, mean {2:8.1f} us, max {3:8.1f} us".format(driver_filename, attribute_stats['calls'],
+                                                                                 attribute_stats['total_time'] / attribute_stats['calls'] * 1e6,
+                                                                                 attribute_stats['max_time'] * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())